@@ -0,0 +1,225 @@
+"""
+Load test: the read-heavy endpoints under WSGI and ASGI.
+
+Sends concurrent GET requests straight to Django's WSGIHandler (one
+thread per concurrent client, like a threaded WSGI server) and to its
+ASGIHandler (one asyncio task per client, like uvicorn), on the same
+seeded test database, and reports throughput and latency of each.
+
+Everything runs in this process, so the numbers compare the two entry
+points and the async views, not a production server.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from .suite import BenchmarkError, benchmark_database, percentile, run_metadata
+
+
+HOST = 'testserver'
+
+# (name, url) pairs of the read endpoints served by async views
+SCENARIOS = [
+    ('reports.summary', lambda ctx, i: '/api/reports/summary/'),
+    ('reports.monthly', lambda ctx, i: (
+        f'/api/reports/monthly/?year={ctx.today.year}&month={ctx.today.month}'
+    )),
+    ('orders.list', lambda ctx, i: '/api/orders/'),
+    ('orders.retrieve', lambda ctx, i: f'/api/orders/{ctx.next_order_id()}/'),
+    ('products.list', lambda ctx, i: '/api/products/'),
+]
+
+
+def _cookie(context):
+    return '; '.join(
+        f'{name}={morsel.value}' for name, morsel in context.client.cookies.items()
+    )
+
+
+def _wsgi_get(handler, url, cookie):
+    """Send a GET through the WSGI handler; return the status code."""
+    parts = urlsplit(url)
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': parts.path,
+        'QUERY_STRING': parts.query,
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': HOST,
+        'HTTP_COOKIE': cookie,
+        'wsgi.input': BytesIO(),
+        'wsgi.errors': BytesIO(),
+        'wsgi.url_scheme': 'http',
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+        'wsgi.version': (1, 0),
+    }
+    status = []
+    response = handler(environ, lambda line, headers, exc_info=None: status.append(line))
+    try:
+        for _ in response:
+            pass
+    finally:
+        # Sends request_finished, as a WSGI server does
+        response.close()
+    return int(status[0].split()[0])
+
+
+async def _asgi_get(handler, url, cookie):
+    """Send a GET through the ASGI handler; return the status code."""
+    parts = urlsplit(url)
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': parts.path,
+        'raw_path': parts.path.encode('utf-8'),
+        'query_string': parts.query.encode('utf-8'),
+        'root_path': '',
+        'headers': [(b'host', HOST.encode('ascii')), (b'cookie', cookie.encode('ascii'))],
+        'client': ('127.0.0.1', 0),
+        'server': (HOST, 80),
+    }
+    status = []
+    
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+    
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+    
+    await handler(scope, receive, send)
+    return status[0]
+
+
+def _summary(durations, elapsed, errors):
+    return {
+        'requests': len(durations),
+        'errors': errors,
+        'requests_per_second': round(len(durations) / elapsed, 1),
+        'p50_ms': round(percentile(durations, 50), 2),
+        'p95_ms': round(percentile(durations, 95), 2),
+    }
+
+
+def run_wsgi(context, url, concurrency, requests):
+    """Send `requests` GETs from `concurrency` threads through WSGIHandler."""
+    handler = WSGIHandler()
+    cookie = _cookie(context)
+    per_client = requests // concurrency
+    
+    def client(index):
+        durations = []
+        errors = 0
+        try:
+            for number in range(per_client):
+                start = time.perf_counter()
+                status = _wsgi_get(handler, url(context, index * per_client + number), cookie)
+                durations.append((time.perf_counter() - start) * 1000)
+                if status >= 400:
+                    errors += 1
+        finally:
+            connections.close_all()
+        return durations, errors
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(client, range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return _summary(
+        [duration for durations, _ in results for duration in durations],
+        elapsed,
+        sum(errors for _, errors in results),
+    )
+
+
+def run_asgi(context, url, concurrency, requests):
+    """Send `requests` GETs from `concurrency` asyncio tasks through ASGIHandler."""
+    handler = ASGIHandler()
+    cookie = _cookie(context)
+    per_client = requests // concurrency
+    
+    async def client(index):
+        durations = []
+        errors = 0
+        for number in range(per_client):
+            start = time.perf_counter()
+            status = await _asgi_get(handler, url(context, index * per_client + number), cookie)
+            durations.append((time.perf_counter() - start) * 1000)
+            if status >= 400:
+                errors += 1
+        return durations, errors
+    
+    async def main():
+        return await asyncio.gather(*(client(index) for index in range(concurrency)))
+    
+    start = time.perf_counter()
+    results = asyncio.run(main())
+    elapsed = time.perf_counter() - start
+    return _summary(
+        [duration for durations, _ in results for duration in durations],
+        elapsed,
+        sum(errors for _, errors in results),
+    )
+
+
+def run_load_test(size='small', concurrency=8, requests=200, scenarios=None, progress=None):
+    """
+    Load test each scenario under WSGI and ASGI.
+    
+    Args:
+        size: Key of seeding.SCALES
+        concurrency: Clients sending requests at the same time
+        requests: Requests per scenario and entry point
+        scenarios: Optional scenario names to run (default: all)
+        progress: Optional callable receiving a status message
+    
+    Returns:
+        dict with the run metadata and, per scenario, the results of each
+        entry point
+    """
+    if concurrency < 1 or requests < concurrency:
+        raise BenchmarkError('Se necesita al menos un request por cliente.')
+    
+    setup_test_environment()
+    try:
+        with benchmark_database(size, progress) as context:
+            results = {}
+            for name, url in SCENARIOS:
+                if scenarios and name not in scenarios:
+                    continue
+                results[name] = {}
+                for server, run in (('wsgi', run_wsgi), ('asgi', run_asgi)):
+                    if progress:
+                        progress(f'{size}: {name} ({server})')
+                    # Unmeasured round so both start with warm caches
+                    run(context, url, concurrency, concurrency)
+                    result = run(context, url, concurrency, requests)
+                    if result['errors']:
+                        raise BenchmarkError(f'{name} ({server}): {result["errors"]} requests fallaron')
+                    results[name][server] = result
+    finally:
+        teardown_test_environment()
+    
+    return {
+        'meta': dict(
+            run_metadata(),
+            size=size,
+            concurrency=concurrency,
+            requests=requests,
+        ),
+        'results': results,
+    }
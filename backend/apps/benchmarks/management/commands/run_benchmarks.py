@@ -0,0 +1,126 @@
+"""
+Run the API benchmark suite and compare it against a baseline.
+
+Each dataset size is generated in a fresh test database (the configured
+database is not touched). Fails (exit code 1) when a scenario regresses
+against the baseline.
+
+Usage:
+    python manage.py run_benchmarks --sizes small,medium --output resultados.json
+    python manage.py run_benchmarks --baseline benchmarks/baseline.json
+    python manage.py run_benchmarks --baseline benchmarks/baseline.json --update-baseline
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.benchmarks.seeding import SCALES
+from apps.benchmarks.suite import SCENARIOS, BenchmarkError, run_suite, compare
+
+
+def parse_sizes(value):
+    sizes = [size.strip() for size in value.split(',') if size.strip()]
+    unknown = [size for size in sizes if size not in SCALES]
+    if unknown or not sizes:
+        raise CommandError(f'Tamaños inválidos: {value}. Opciones: {", ".join(SCALES)}')
+    return sizes
+
+
+class Command(BaseCommand):
+    help = 'Mide latencia y consultas SQL de los endpoints principales.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=parse_sizes,
+            default=['small'],
+            help=f'Tamaños separados por coma ({", ".join(SCALES)}; por defecto small)'
+        )
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=[name for name, _ in SCENARIOS],
+            help='Escenario a correr (repetible; por defecto todos)'
+        )
+        parser.add_argument('--iterations', type=int, default=20, help='Requests medidos por escenario')
+        parser.add_argument('--warmup', type=int, default=2, help='Requests previos sin medir')
+        parser.add_argument('--output', help='Archivo JSON donde guardar los resultados')
+        parser.add_argument('--baseline', help='Archivo JSON de referencia para comparar')
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help='Aumento de p95 tolerado respecto de la referencia (0.25 = 25%%)'
+        )
+        parser.add_argument(
+            '--update-baseline',
+            action='store_true',
+            help='Guardar los resultados como nueva referencia en --baseline.'
+        )
+    
+    def handle(self, *args, **options):
+        if options['iterations'] < 2:
+            raise CommandError('Se necesitan al menos 2 iteraciones.')
+        if options['update_baseline'] and not options['baseline']:
+            raise CommandError('--update-baseline requiere --baseline.')
+        
+        baseline = None
+        if options['baseline'] and not options['update_baseline']:
+            try:
+                with open(options['baseline'], encoding='utf-8') as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"No se pudo leer {options['baseline']}: {exc}")
+        
+        try:
+            results = run_suite(
+                options['sizes'],
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+                scenarios=options['scenario'],
+                progress=lambda message: self.stderr.write(message),
+            )
+        except BenchmarkError as exc:
+            raise CommandError(f'Falló un escenario: {exc}')
+        
+        self.print_results(results)
+        
+        if options['output']:
+            self.save(results, options['output'])
+        if options['update_baseline']:
+            self.save(results, options['baseline'])
+            self.stdout.write(self.style.SUCCESS(f"Referencia actualizada: {options['baseline']}"))
+            return
+        
+        if baseline is not None:
+            rows = compare(results, baseline, options['tolerance'])
+            self.print_comparison(rows)
+            regressions = [row for row in rows if row['regression']]
+            if regressions:
+                raise CommandError(f'{len(regressions)} escenarios empeoraron.')
+            self.stdout.write(self.style.SUCCESS('Sin regresiones.'))
+    
+    def save(self, results, path):
+        with open(path, 'w', encoding='utf-8') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+            output.write('\n')
+    
+    def print_results(self, results):
+        self.stdout.write(
+            f"{'tamaño':8} {'escenario':22} {'p50':>9} {'p95':>9} {'p99':>9} {'consultas':>9}"
+        )
+        for size, scenarios in results['results'].items():
+            for name, result in scenarios.items():
+                self.stdout.write(
+                    f"{size:8} {name:22} {result['p50_ms']:9.1f} {result['p95_ms']:9.1f} "
+                    f"{result['p99_ms']:9.1f} {result['queries']:9}"
+                )
+    
+    def print_comparison(self, rows):
+        for row in rows:
+            line = (
+                f"{row['size']:8} {row['scenario']:22} "
+                f"p95 {row['baseline_p95_ms']:.1f} -> {row['p95_ms']:.1f} ms ({row['change']:+.0%}), "
+                f"consultas {row['baseline_queries']} -> {row['queries']}"
+            )
+            self.stdout.write(self.style.ERROR(line) if row['regression'] else line)
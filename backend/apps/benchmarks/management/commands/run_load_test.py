@@ -0,0 +1,61 @@
+"""
+Compare the read-heavy endpoints under WSGI and ASGI with concurrent clients.
+
+The dataset is generated in a fresh test database (the configured
+database is not touched).
+
+Usage:
+    python manage.py run_load_test
+    python manage.py run_load_test --size medium --concurrency 16 --requests 400
+    python manage.py run_load_test --scenario reports.summary --output carga.json
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.benchmarks.load import SCENARIOS, run_load_test
+from apps.benchmarks.seeding import SCALES
+from apps.benchmarks.suite import BenchmarkError
+
+
+class Command(BaseCommand):
+    help = 'Prueba de carga de los endpoints de lectura bajo WSGI y ASGI.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--size', choices=list(SCALES), default='small', help='Tamaño del dataset')
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=[name for name, _ in SCENARIOS],
+            help='Escenario a correr (repetible; por defecto todos)'
+        )
+        parser.add_argument('--concurrency', type=int, default=8, help='Clientes simultáneos')
+        parser.add_argument('--requests', type=int, default=200, help='Requests por escenario y servidor')
+        parser.add_argument('--output', help='Archivo JSON donde guardar los resultados')
+    
+    def handle(self, *args, **options):
+        try:
+            results = run_load_test(
+                options['size'],
+                concurrency=options['concurrency'],
+                requests=options['requests'],
+                scenarios=options['scenario'],
+                progress=lambda message: self.stderr.write(message),
+            )
+        except BenchmarkError as exc:
+            raise CommandError(f'Falló la prueba de carga: {exc}')
+        
+        self.stdout.write(
+            f"{'escenario':18} {'servidor':8} {'req/s':>9} {'p50':>9} {'p95':>9}"
+        )
+        for name, servers in results['results'].items():
+            for server, result in servers.items():
+                self.stdout.write(
+                    f"{name:18} {server:8} {result['requests_per_second']:9.1f} "
+                    f"{result['p50_ms']:9.1f} {result['p95_ms']:9.1f}"
+                )
+        
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(results, output, indent=2, sort_keys=True)
+                output.write('\n')
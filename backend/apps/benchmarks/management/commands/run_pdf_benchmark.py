@@ -0,0 +1,54 @@
+"""
+Time the order PDF render on its own.
+
+Renders one order of a freshly seeded test database (the configured
+database is not touched) many times, without the API or the PDF cache,
+and times building the shared fonts, styles and logo (PDFAssets).
+
+Usage:
+    python manage.py run_pdf_benchmark
+    python manage.py run_pdf_benchmark --size small --renders 100 --output pdf.json
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.benchmarks.suite import run_pdf_benchmark
+from .run_benchmarks import parse_sizes
+
+
+def parse_size(value):
+    sizes = parse_sizes(value)
+    if len(sizes) > 1:
+        raise CommandError('Indique un solo tamaño.')
+    return sizes[0]
+
+
+class Command(BaseCommand):
+    help = 'Mide el tiempo de render del PDF de un pedido y de sus recursos compartidos.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=parse_size, default='tiny', help='Tamaño de los datos (por defecto tiny)')
+        parser.add_argument('--renders', type=int, default=30, help='Renders medidos')
+        parser.add_argument('--output', help='Archivo JSON donde guardar los resultados')
+    
+    def handle(self, *args, **options):
+        if options['renders'] < 2:
+            raise CommandError('Se necesitan al menos 2 renders.')
+        
+        run = run_pdf_benchmark(
+            options['size'],
+            renders=options['renders'],
+            progress=lambda message: self.stderr.write(message),
+        )
+        results = run['results']
+        self.stdout.write(f"recursos (PDFAssets): {results['assets_ms']:.1f} ms")
+        self.stdout.write(
+            f"render: p50 {results['p50_ms']:.1f} ms, p95 {results['p95_ms']:.1f} ms, "
+            f"media {results['mean_ms']:.1f} ms, {results['bytes']:,} bytes"
+        )
+        
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(run, output, indent=2, sort_keys=True)
+                output.write('\n')
@@ -0,0 +1,68 @@
+"""
+Generate a synthetic dataset (products, customers and orders).
+
+Usage:
+    python manage.py seed_data --scale medium
+    python manage.py seed_data --orders 50000 --years 2 --seed 7
+    python manage.py seed_data --scale small --clear
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.benchmarks.seeding import SCALES, seed_data, clear_data
+from apps.orders.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Genera productos, clientes y pedidos sintéticos para desarrollo y benchmarks.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            choices=list(SCALES),
+            default='small',
+            help='Tamaño del conjunto de datos (por defecto small)'
+        )
+        parser.add_argument('--products', type=int, help='Cantidad de productos')
+        parser.add_argument('--customers', type=int, help='Cantidad de clientes')
+        parser.add_argument('--orders', type=int, help='Cantidad de pedidos')
+        parser.add_argument('--years', type=int, help='Años de historial de pedidos')
+        parser.add_argument('--seed', type=int, default=1, help='Semilla aleatoria')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Pedidos por transacción'
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Borrar antes TODOS los pedidos, clientes y productos.'
+        )
+    
+    def handle(self, *args, **options):
+        sizes = dict(SCALES[options['scale']])
+        for name in sizes:
+            if options[name] is not None:
+                sizes[name] = options[name]
+        if min(sizes.values()) < 1:
+            raise CommandError('Las cantidades y los años deben ser mayores a cero.')
+        
+        if options['clear']:
+            clear_data()
+            self.stdout.write('Datos anteriores borrados.')
+        elif Order.objects.exists():
+            self.stdout.write(self.style.WARNING(
+                'La base ya tiene pedidos: los datos generados se agregan a los existentes.'
+            ))
+        
+        result = seed_data(
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            progress=lambda created: self.stdout.write(f'{created}/{sizes["orders"]} pedidos...'),
+            **sizes
+        )
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['products']} productos, {result['customers']} clientes y "
+            f"{result['orders']} pedidos generados."
+        ))
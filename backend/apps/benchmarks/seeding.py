@@ -0,0 +1,267 @@
+"""
+Synthetic data generator for development and benchmarks.
+
+Generates a product catalog, a pool of customers and years of orders
+with their items, inserted in batches with bulk_create like the order
+importer: search fields, customers, rollups and customer stats are kept
+consistent, so every endpoint works on the generated data.
+
+The same seed and scale always generate the same data.
+"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+
+from apps.customers.models import Customer
+from apps.orders.models import Order, OrderItem
+from apps.products.cache import bump_catalog_version
+from apps.products.models import Product
+from apps.reports.models import DailyRevenue
+from apps.reports.rollups import apply_rollup_changes, order_snapshot
+
+
+# Dataset sizes: products, customers, orders and years of history
+SCALES = {
+    # Smoke tests of the suite (apps.benchmarks.tests)
+    'tiny': {'products': 16, 'customers': 20, 'orders': 120, 'years': 1},
+    'small': {'products': 40, 'customers': 300, 'orders': 2000, 'years': 1},
+    'medium': {'products': 120, 'customers': 3000, 'orders': 25000, 'years': 3},
+    'large': {'products': 300, 'customers': 20000, 'orders': 200000, 'years': 5},
+}
+
+# Days after today covered by pending orders
+FUTURE_DAYS = 90
+
+# category: (names, price range, stock range, quantity range)
+CATALOG = {
+    'vajilla': (
+        ['Plato playo', 'Plato hondo', 'Plato de postre', 'Bowl', 'Taza de café', 'Fuente'],
+        (80, 450), (300, 3000), (20, 200),
+    ),
+    'cubiertos': (
+        ['Tenedor', 'Cuchillo', 'Cuchara', 'Cucharita', 'Cuchillo de asado'],
+        (40, 150), (500, 4000), (20, 200),
+    ),
+    'cristaleria': (
+        ['Copa de vino', 'Copa de agua', 'Copa de champagne', 'Vaso trago largo', 'Jarra'],
+        (90, 500), (300, 2500), (20, 150),
+    ),
+    'sillas': (
+        ['Silla Tiffany', 'Silla plegable', 'Silla Crossback', 'Banqueta alta'],
+        (600, 2500), (200, 1500), (10, 150),
+    ),
+    'mesas': (
+        ['Mesa redonda', 'Mesa rectangular', 'Mesa imperial', 'Mesa alta'],
+        (3000, 15000), (20, 200), (1, 20),
+    ),
+    'manteles': (
+        ['Mantel redondo', 'Mantel rectangular', 'Camino de mesa', 'Servilleta de tela'],
+        (500, 3500), (100, 1500), (2, 100),
+    ),
+    'decoracion': (
+        ['Centro de mesa', 'Candelabro', 'Guirnalda de luces', 'Florero'],
+        (1500, 9000), (20, 300), (1, 30),
+    ),
+    'otros': (
+        ['Conservadora', 'Hielera', 'Carro de servicio', 'Calentador de comida'],
+        (2000, 12000), (10, 100), (1, 10),
+    ),
+}
+VARIANTS = ['blanco', 'negro', 'dorado', 'plateado', 'clásico', 'rústico', 'premium', 'vintage']
+
+FIRST_NAMES = [
+    'María', 'Juan', 'Lucía', 'Martín', 'Sofía', 'Nicolás', 'Valentina', 'Mateo',
+    'Camila', 'Santiago', 'Julieta', 'Joaquín', 'Florencia', 'Tomás', 'Agustina', 'Ramón',
+]
+LAST_NAMES = [
+    'González', 'Rodríguez', 'Fernández', 'López', 'Martínez', 'Pérez', 'Gómez', 'Díaz',
+    'Sánchez', 'Romero', 'Álvarez', 'Acuña', 'Benítez', 'Muñoz', 'Ibáñez', 'Peña',
+]
+BUSINESS_NAMES = [
+    'Salón Los Álamos', 'Eventos del Sur', 'Catering Doña Rosa', 'Quinta La Esperanza',
+    'Club Social y Deportivo', 'Estudio Jurídico Norte', 'Colegio San José', 'Hotel Central',
+]
+STREETS = [
+    'Av. Rivadavia', 'San Martín', 'Belgrano', 'Mitre', 'Sarmiento', '9 de Julio',
+    'Av. Corrientes', 'Moreno', 'Lavalle', 'Güemes',
+]
+OBSERVATIONS = [
+    '', '', '', 'Entregar por la mañana', 'Llamar antes de llegar', 'Retira el cliente',
+    'Casamiento', 'Cumpleaños de 15', 'Evento corporativo', 'Dejar en portería',
+]
+
+
+def _products(rng, count):
+    products = []
+    categories = list(CATALOG)
+    for index in range(count):
+        category = categories[index % len(categories)]
+        names, (min_price, max_price), (min_stock, max_stock), _ = CATALOG[category]
+        name = names[(index // len(categories)) % len(names)]
+        variant = VARIANTS[(index // (len(categories) * len(names))) % len(VARIANTS)]
+        product = Product(
+            name=f'{name} {variant}',
+            category=category,
+            price_per_unit=Decimal(rng.randint(min_price, max_price)),
+            stock=rng.randint(min_stock, max_stock),
+            description=f'{name} color {variant}.',
+            # A few discontinued products, as in a real catalog
+            is_active=rng.random() > 0.05,
+        )
+        product.update_search_fields()
+        products.append(product)
+    return products
+
+
+def _customers(rng, count):
+    """(name, phone, address) of each customer; phones are unique."""
+    customers = []
+    phones = set()
+    while len(customers) < count:
+        if rng.random() < 0.1:
+            name = f'{rng.choice(BUSINESS_NAMES)} {rng.randint(1, 99)}'
+        else:
+            name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+        phone = f'11-{rng.randint(2000, 6999)}-{rng.randint(0, 9999):04d}'
+        if phone in phones:
+            continue
+        phones.add(phone)
+        address = f'{rng.choice(STREETS)} {rng.randint(1, 5000)}, CABA'
+        customers.append((name, phone, address))
+    return customers
+
+
+def _event_date(rng, start, days):
+    """Random event date, weighted towards weekends and the end of the year."""
+    while True:
+        event_date = start + timedelta(days=rng.randrange(days))
+        weight = 1.0
+        if event_date.weekday() >= 4:
+            weight += 1.5
+        if event_date.month in (11, 12):
+            weight += 0.8
+        if rng.random() * 3.3 < weight:
+            return event_date
+
+
+def _status(rng, event_date, today):
+    if rng.random() < 0.06:
+        return 'cancelado'
+    if event_date < today - timedelta(days=3):
+        return 'entregado'
+    return 'pendiente'
+
+
+def _items(rng, order, products):
+    items = []
+    for product in rng.sample(products, min(len(products), rng.randint(1, 6))):
+        min_quantity, max_quantity = CATALOG[product.category][3]
+        quantity = rng.randint(min_quantity, max_quantity)
+        # Leave room in the stock so new orders over the same dates still fit
+        quantity = max(1, min(quantity, product.stock // 10))
+        items.append(OrderItem(
+            order=order,
+            product=product,
+            quantity=quantity,
+            unit_price=product.price_per_unit,
+            category=product.category,
+        ))
+    return items
+
+
+def _order(rng, customer, event_date, today):
+    name, phone, address = customer
+    delivery_date = event_date - timedelta(days=rng.choice([0, 1, 1, 2]))
+    order = Order(
+        customer_name=name,
+        # Some orders were taken without the phone or address
+        customer_phone=phone if rng.random() > 0.05 else '',
+        customer_address=address if rng.random() > 0.1 else '',
+        event_date=event_date,
+        delivery_date=delivery_date,
+        return_date=event_date + timedelta(days=rng.choice([1, 1, 2, 3])),
+        status=_status(rng, event_date, today),
+        observations=rng.choice(OBSERVATIONS),
+    )
+    order.update_search_fields()
+    return order
+
+
+@transaction.atomic
+def _insert_orders(orders, order_items):
+    Customer.objects.resolve(orders)
+    orders = Order.objects.bulk_create(orders)
+    for order, items in zip(orders, order_items):
+        for item in items:
+            item.order = order
+    OrderItem.objects.bulk_create([item for items in order_items for item in items])
+    apply_rollup_changes([
+        (None, order_snapshot(order, items))
+        for order, items in zip(orders, order_items)
+    ])
+
+
+def clear_data():
+    """Delete every order, customer, rollup row and product."""
+    with transaction.atomic():
+        OrderItem.objects.all().delete()
+        Order.objects.all().delete()
+        DailyRevenue.objects.all().delete()
+        Customer.objects.all().delete()
+        Product.objects.all().delete()
+    bump_catalog_version()
+
+
+def seed_data(products=40, customers=300, orders=2000, years=1, seed=1,
+              batch_size=1000, progress=None):
+    """
+    Generate and insert a synthetic dataset.
+    
+    Orders have event dates from `years` years ago up to FUTURE_DAYS
+    days ahead; the older ones are mostly delivered and the upcoming ones
+    pending, with a few cancelled. A fifth of the customers place most of
+    the orders.
+    
+    Args:
+        products, customers, orders: Number of rows to generate
+        years: Years of order history
+        seed: Random seed (same seed and sizes, same data)
+        batch_size: Orders inserted per transaction
+        progress: Optional callable receiving the number of orders inserted
+    
+    Returns:
+        dict with the number of products, customers and orders created
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    start = today - timedelta(days=365 * years)
+    days = (today - start).days + FUTURE_DAYS
+    
+    catalog = Product.objects.bulk_create(_products(rng, products), batch_size=batch_size)
+    bump_catalog_version()
+    
+    pool = _customers(rng, customers)
+    regulars = pool[:max(1, len(pool) // 5)]
+    
+    created = 0
+    while created < orders:
+        batch = []
+        batch_items = []
+        for _ in range(min(batch_size, orders - created)):
+            # Regular customers (party venues, caterers) order most of the time
+            customer = rng.choice(regulars if rng.random() < 0.6 else pool)
+            order = _order(rng, customer, _event_date(rng, start, days), today)
+            batch.append(order)
+            batch_items.append(_items(rng, order, catalog))
+        _insert_orders(batch, batch_items)
+        created += len(batch)
+        if progress:
+            progress(created)
+    
+    return {
+        'products': len(catalog),
+        'customers': Customer.objects.count(),
+        'orders': created,
+    }
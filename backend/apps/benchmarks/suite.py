@@ -0,0 +1,368 @@
+"""
+Benchmark suite for the API.
+
+Each dataset size is seeded (apps.benchmarks.seeding, fixed seed) into a
+fresh test database, then every scenario sends real requests through the
+Django test client and the whole middleware and DRF stack. Per scenario
+the suite records latency percentiles and the number of SQL queries.
+
+Results are plain dicts, saved as JSON and compared against a baseline:
+a scenario regresses when its p95 latency grows more than the tolerance
+(ignoring changes under a few milliseconds, which are noise) or when it
+runs more queries than before.
+"""
+import json
+import platform
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import django
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from apps.orders.models import Order
+from apps.orders.pdf_assets import PDFAssets
+from apps.orders.services import generate_order_pdf
+from apps.products.models import Product
+from config.profiling import QueryProfile, record_queries
+from .seeding import SCALES, seed_data
+
+
+SEED = 1
+# Latency changes smaller than this (milliseconds) are never regressions
+NOISE_FLOOR_MS = 5.0
+
+
+class BenchmarkContext:
+    """Client and sample data shared by the scenarios of one dataset."""
+    
+    def __init__(self, client):
+        self.client = client
+        self.today = date.today()
+        self.product_ids = list(
+            Product.objects.filter(is_active=True).order_by('id').values_list('id', flat=True)
+        )
+        # Recent orders, the ones usually opened, edited and printed
+        self.order_ids = list(
+            Order.objects.exclude(status='cancelado')
+            .order_by('-event_date', '-id').values_list('id', flat=True)[:500]
+        )
+        self.created_ids = []
+        self.calls = 0
+    
+    def next_order_id(self):
+        """A different order on each call, so PDFs and detail pages are not cached."""
+        self.calls += 1
+        return self.order_ids[self.calls % len(self.order_ids)]
+    
+    def order_payload(self, index):
+        # Far in the future, so the stock of the seeded orders never blocks it
+        event_date = self.today + timedelta(days=400 + index % 30)
+        products = [
+            self.product_ids[(index * 7 + offset) % len(self.product_ids)]
+            for offset in range(4)
+        ]
+        return {
+            'customer_name': f'Cliente benchmark {index % 50}',
+            'customer_phone': f'11-5000-{index % 50:04d}',
+            'customer_address': 'Av. Rivadavia 1234, CABA',
+            'event_date': event_date.isoformat(),
+            'delivery_date': (event_date - timedelta(days=1)).isoformat(),
+            'return_date': (event_date + timedelta(days=1)).isoformat(),
+            'observations': '',
+            'items': [
+                {'product': product_id, 'quantity': 1 + index % 3}
+                for product_id in products
+            ],
+        }
+
+
+def _json(context, method, url, payload):
+    return getattr(context.client, method)(
+        url, json.dumps(payload), content_type='application/json'
+    )
+
+
+def _create_order(context, index):
+    response = _json(context, 'post', '/api/orders/', context.order_payload(index))
+    if response.status_code == 201:
+        context.created_ids.append(response.json()['id'])
+    return response
+
+
+def _update_order(context, index):
+    order_id = context.created_ids[index % len(context.created_ids)]
+    payload = context.order_payload(index + 1)
+    payload['observations'] = f'Editado {index}'
+    return _json(context, 'put', f'/api/orders/{order_id}/', payload)
+
+
+def _month_params(context):
+    return f'year={context.today.year}&month={context.today.month}'
+
+
+def _custom_params(context):
+    start = context.today - timedelta(days=90)
+    return f'start_date={start.isoformat()}&end_date={context.today.isoformat()}'
+
+
+# (name, request) pairs, run in this order: order.create comes before
+# order.update, which edits the orders it created
+SCENARIOS = [
+    ('orders.list', lambda ctx, i: ctx.client.get('/api/orders/')),
+    ('orders.list_search', lambda ctx, i: ctx.client.get('/api/orders/?search=gonzalez')),
+    ('orders.list_pending', lambda ctx, i: ctx.client.get('/api/orders/pending/')),
+    ('orders.retrieve', lambda ctx, i: ctx.client.get(f'/api/orders/{ctx.next_order_id()}/')),
+    ('orders.pdf', lambda ctx, i: ctx.client.get(f'/api/orders/{ctx.next_order_id()}/pdf/')),
+    ('orders.create', _create_order),
+    ('orders.update', _update_order),
+    ('reports.daily', lambda ctx, i: ctx.client.get('/api/reports/daily/')),
+    ('reports.weekly', lambda ctx, i: ctx.client.get('/api/reports/weekly/')),
+    ('reports.monthly', lambda ctx, i: ctx.client.get(f'/api/reports/monthly/?{_month_params(ctx)}')),
+    ('reports.custom', lambda ctx, i: ctx.client.get(f'/api/reports/custom/?{_custom_params(ctx)}')),
+    ('reports.summary', lambda ctx, i: ctx.client.get('/api/reports/summary/')),
+]
+
+
+class BenchmarkError(Exception):
+    """A scenario request failed (the benchmark would measure an error page)."""
+
+
+def percentile(values, percent):
+    """Linear interpolation percentile of a list of numbers."""
+    values = sorted(values)
+    if len(values) == 1:
+        return values[0]
+    position = (len(values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def run_scenario(context, request, iterations, warmup):
+    """
+    Time one scenario.
+    
+    Queries are counted like the profiling middleware does (without
+    savepoints), so they compare with the views' query_budgets.
+    
+    Returns:
+        dict with the latency percentiles (ms) and the most queries run
+        by a single request
+    """
+    durations = []
+    queries = 0
+    for index in range(warmup + iterations):
+        profile = QueryProfile()
+        with record_queries(profile):
+            start = time.perf_counter()
+            response = request(context, index)
+            duration = time.perf_counter() - start
+        if response.status_code >= 400:
+            raise BenchmarkError(f'{response.status_code}: {response.content[:500]!r}')
+        if index >= warmup:
+            durations.append(duration * 1000)
+            queries = max(queries, profile.count)
+    
+    return {
+        'p50_ms': round(percentile(durations, 50), 2),
+        'p95_ms': round(percentile(durations, 95), 2),
+        'p99_ms': round(percentile(durations, 99), 2),
+        'mean_ms': round(statistics.mean(durations), 2),
+        'queries': queries,
+    }
+
+
+@contextmanager
+def benchmark_database(size, progress=None):
+    """
+    Create a fresh test database seeded with one dataset size.
+    
+    Yields:
+        BenchmarkContext with a logged-in client
+    """
+    runner = DiscoverRunner(verbosity=0, interactive=False)
+    old_config = runner.setup_databases()
+    try:
+        for cache in caches.all():
+            cache.clear()
+        
+        if progress:
+            progress(f'{size}: generando datos...')
+        seed_data(seed=SEED, **SCALES[size])
+        
+        user = User.objects.create_user('benchmark', password='benchmark')
+        client = Client()
+        client.force_login(user)
+        yield BenchmarkContext(client)
+    finally:
+        runner.teardown_databases(old_config)
+
+
+def run_size(size, iterations, warmup, scenarios=None, progress=None):
+    """
+    Seed a fresh test database with one dataset size and run the scenarios.
+    
+    Args:
+        size: Key of seeding.SCALES
+        iterations: Measured requests per scenario
+        warmup: Requests per scenario run before measuring
+        scenarios: Optional scenario names to run (default: all)
+        progress: Optional callable receiving a status message
+    
+    Returns:
+        dict mapping scenario name to its results
+    """
+    with benchmark_database(size, progress) as context:
+        results = {}
+        for name, request in SCENARIOS:
+            if scenarios and name not in scenarios:
+                continue
+            if progress:
+                progress(f'{size}: {name}')
+            try:
+                results[name] = run_scenario(context, request, iterations, warmup)
+            except BenchmarkError as exc:
+                raise BenchmarkError(f'{size} {name}: {exc}')
+        return results
+
+
+def run_suite(sizes, iterations=20, warmup=2, scenarios=None, progress=None):
+    """
+    Run the benchmark suite on each dataset size.
+    
+    PDFs are cached in memory during the run, never in the configured
+    PDF cache.
+    
+    Returns:
+        dict with the run metadata and the results per size and scenario
+    """
+    setup_test_environment()
+    try:
+        with override_settings(PDF_CACHE={'BACKEND': 'apps.orders.pdf_cache.MemoryPDFStore'}):
+            results = {
+                size: run_size(size, iterations, warmup, scenarios, progress)
+                for size in sizes
+            }
+    finally:
+        teardown_test_environment()
+    
+    return {
+        'meta': dict(run_metadata(), iterations=iterations),
+        'results': results,
+    }
+
+
+def time_pdf_renders(order, renders):
+    """
+    Time the PDF of one order, without the API or the PDF cache.
+    
+    Also times building a fresh PDFAssets (styles and logo; the fonts
+    stay registered), the work each render saves by sharing them.
+    
+    Args:
+        order: Order instance with items
+        renders: Number of measured renders
+    
+    Returns:
+        dict with the assets build time and render percentiles (ms) and
+        the PDF size in bytes
+    """
+    start = time.perf_counter()
+    PDFAssets()
+    assets_ms = (time.perf_counter() - start) * 1000
+    
+    # Warm up the shared assets and the fonts' glyph caches
+    size = len(generate_order_pdf(order).getvalue())
+    durations = []
+    for _ in range(renders):
+        start = time.perf_counter()
+        generate_order_pdf(order)
+        durations.append((time.perf_counter() - start) * 1000)
+    
+    return {
+        'assets_ms': round(assets_ms, 2),
+        'p50_ms': round(percentile(durations, 50), 2),
+        'p95_ms': round(percentile(durations, 95), 2),
+        'mean_ms': round(statistics.mean(durations), 2),
+        'bytes': size,
+    }
+
+
+def run_pdf_benchmark(size, renders=30, progress=None):
+    """
+    Seed a fresh test database and time the PDF of one of its recent orders.
+    
+    Returns:
+        dict with the run metadata and the time_pdf_renders() results
+    """
+    setup_test_environment()
+    try:
+        with benchmark_database(size, progress) as context:
+            order = Order.objects.with_items().get(pk=context.order_ids[0])
+            if progress:
+                progress(f'{size}: pedido #{order.pk}, {len(order.items.all())} items')
+            results = time_pdf_renders(order, renders)
+    finally:
+        teardown_test_environment()
+    
+    return {
+        'meta': dict(run_metadata(), renders=renders),
+        'results': results,
+    }
+
+
+def run_metadata():
+    """When and where a run happened, saved with its results."""
+    return {
+        'created_at': timezone.now().isoformat(),
+        'database': connection.vendor,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'machine': platform.machine(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare a run against a baseline.
+    
+    Args:
+        results, baseline: Dicts returned by run_suite (or loaded JSON)
+        tolerance: Allowed relative p95 growth (0.25 = 25%)
+    
+    Returns:
+        List of dicts, one per scenario present in both, with the
+        changes and whether it regressed
+    """
+    rows = []
+    for size, scenarios in results['results'].items():
+        base_scenarios = baseline.get('results', {}).get(size, {})
+        for name, current in scenarios.items():
+            base = base_scenarios.get(name)
+            if base is None:
+                continue
+            slower = current['p95_ms'] - base['p95_ms']
+            latency_regression = (
+                slower > NOISE_FLOOR_MS
+                and current['p95_ms'] > base['p95_ms'] * (1 + tolerance)
+            )
+            query_regression = current['queries'] > base['queries']
+            rows.append({
+                'size': size,
+                'scenario': name,
+                'p95_ms': current['p95_ms'],
+                'baseline_p95_ms': base['p95_ms'],
+                'change': (slower / base['p95_ms']) if base['p95_ms'] else 0.0,
+                'queries': current['queries'],
+                'baseline_queries': base['queries'],
+                'regression': latency_regression or query_regression,
+            })
+    return rows
@@ -0,0 +1,43 @@
+"""
+Smoke tests of the benchmark suite on the tiny dataset.
+"""
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+from apps.orders.models import Order
+from .suite import SCENARIOS, BenchmarkContext, compare, run_scenario, time_pdf_renders
+
+
+@override_settings(PDF_CACHE={'BACKEND': 'apps.orders.pdf_cache.MemoryPDFStore'})
+class BenchmarkSuiteTests(TestCase):
+    
+    def setUp(self):
+        call_command('seed_data', '--scale', 'tiny', stdout=StringIO())
+        client = Client()
+        client.force_login(User.objects.create_user('benchmark'))
+        self.context = BenchmarkContext(client)
+    
+    def test_seeds_the_tiny_dataset(self):
+        self.assertEqual(Order.objects.count(), 120)
+        self.assertTrue(self.context.order_ids)
+    
+    def test_every_scenario_runs(self):
+        results = {}
+        for name, request in SCENARIOS:
+            with self.subTest(scenario=name):
+                results[name] = run_scenario(self.context, request, iterations=2, warmup=1)
+                self.assertGreater(results[name]['queries'], 0)
+        
+        run = {'results': {'tiny': results}}
+        rows = compare(run, run, tolerance=0.25)
+        self.assertEqual(len(rows), len(SCENARIOS))
+        self.assertFalse(any(row['regression'] for row in rows))
+    
+    def test_pdf_benchmark_runs(self):
+        order = Order.objects.with_items().get(pk=self.context.order_ids[0])
+        results = time_pdf_renders(order, renders=2)
+        self.assertGreater(results['bytes'], 0)
+        self.assertLessEqual(results['p50_ms'], results['p95_ms'])
@@ -0,0 +1,13 @@
+"""
+Admin configuration for Customers.
+"""
+from django.contrib import admin
+from .models import Customer
+
+
+@admin.register(Customer)
+class CustomerAdmin(admin.ModelAdmin):
+    list_display = ['name', 'phone', 'orders_count', 'total_revenue', 'last_event_date']
+    search_fields = ['name', 'phone']
+    ordering = ['name_key']
+    readonly_fields = ['orders_count', 'total_revenue', 'last_event_date', 'created_at', 'updated_at']
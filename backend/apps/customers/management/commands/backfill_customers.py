@@ -0,0 +1,56 @@
+"""
+Create customers from the existing orders and recompute their stats.
+
+Orders without a customer are grouped by phone digits (or normalized
+name when there is no phone) into customers, processed in id order so
+each customer keeps the details of its latest order. Safe to run again.
+
+Usage:
+    python manage.py backfill_customers
+    python manage.py backfill_customers --stats-only
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.customers.models import Customer
+from apps.customers.stats import rebuild_customer_stats
+from apps.orders.models import Order
+
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Crea los clientes a partir de los pedidos existentes y recalcula sus estadísticas.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stats-only',
+            action='store_true',
+            help='Solo recalcular las estadísticas de los clientes.'
+        )
+    
+    def handle(self, *args, **options):
+        if not options['stats_only']:
+            linked = 0
+            last_id = 0
+            while True:
+                with transaction.atomic():
+                    orders = list(
+                        Order.objects.filter(customer__isnull=True, id__gt=last_id)
+                        .only('id', 'customer_name', 'customer_phone', 'customer_address')
+                        .order_by('id')[:BATCH_SIZE]
+                    )
+                    if not orders:
+                        break
+                    Customer.objects.resolve(orders)
+                    Order.objects.bulk_update(orders, ['customer'])
+                linked += len(orders)
+                last_id = orders[-1].id
+            self.stdout.write(f'{linked} pedidos asociados a clientes.')
+        
+        with transaction.atomic():
+            updated = rebuild_customer_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Estadísticas recalculadas ({updated} clientes actualizados).'
+        ))
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:23
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Customer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='Nombre')),
+                ('phone', models.CharField(blank=True, max_length=50, verbose_name='Teléfono')),
+                ('address', models.TextField(blank=True, verbose_name='Dirección')),
+                ('phone_digits', models.CharField(blank=True, db_index=True, editable=False, max_length=50)),
+                ('name_key', models.CharField(db_index=True, editable=False, max_length=200)),
+                ('orders_count', models.PositiveIntegerField(default=0, verbose_name='Pedidos')),
+                ('total_revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Facturación total')),
+                ('last_event_date', models.DateField(blank=True, null=True, verbose_name='Último evento')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Cliente',
+                'verbose_name_plural': 'Clientes',
+                'ordering': ['name_key'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='customer',
+            constraint=models.UniqueConstraint(condition=models.Q(('phone_digits', ''), _negated=True), fields=('phone_digits',), name='customer_unique_phone'),
+        ),
+        migrations.AddConstraint(
+            model_name='customer',
+            constraint=models.UniqueConstraint(condition=models.Q(('phone_digits', '')), fields=('name_key',), name='customer_unique_name_without_phone'),
+        ),
+    ]
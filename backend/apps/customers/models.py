@@ -0,0 +1,207 @@
+"""
+Customer model: the people and businesses that place orders.
+
+Orders keep their own copy of the customer name, phone and address (what
+was agreed for that event) and are linked to a Customer identified by
+the phone digits or, without a phone, by the normalized name.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import models
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from config.search import normalize_text, digits_only
+
+
+def customer_key(name, phone):
+    """
+    Identity of a customer: (phone digits, '') or ('', normalized name).
+    
+    A phone number identifies the customer on its own, so the same phone
+    with a differently written name is still the same customer.
+    """
+    digits = digits_only(phone)
+    return (digits, '' if digits else normalize_text(name))
+
+
+class CustomerManager(models.Manager):
+    
+    def resolve(self, orders):
+        """
+        Link orders to their customers, creating the missing ones.
+        
+        New customers take the name, phone and address of their latest
+        order (by event date). Existing customers only take them from an
+        order at least as recent as their latest saved order, so editing
+        an old order never brings back stale details (blank values do not
+        overwrite either).
+        Costs at most five queries whatever the number of orders; the
+        orders themselves are not saved.
+        
+        Args:
+            orders: Order instances (saved or not)
+        """
+        groups = defaultdict(list)
+        for order in orders:
+            groups[customer_key(order.customer_name, order.customer_phone)].append(order)
+        if not groups:
+            return
+        
+        found = self._by_key(groups)
+        missing = [key for key in groups if key not in found]
+        if missing:
+            # A concurrent writer may create the same customer: ignore the
+            # conflict and load whichever row won
+            self.bulk_create([
+                self._updated(Customer(), self._latest(groups[key]))[0] for key in missing
+            ], ignore_conflicts=True)
+            found.update(self._by_key(missing))
+        
+        last_events = self._last_event_dates(
+            [found[key] for key in groups if key not in missing]
+        )
+        changed = []
+        for key, group in groups.items():
+            customer = found[key]
+            for order in group:
+                order.customer = customer
+            if key in missing:
+                continue
+            latest = self._latest(group)
+            if last_events.get(customer.pk) and latest.event_date < last_events[customer.pk]:
+                continue
+            customer, is_changed = self._updated(customer, latest)
+            if is_changed:
+                changed.append(customer)
+        if changed:
+            # bulk_update does not touch auto_now fields
+            now = timezone.now()
+            for customer in changed:
+                customer.updated_at = now
+            self.bulk_update(changed, ['name', 'name_key', 'phone', 'address', 'updated_at'])
+    
+    def _by_key(self, keys):
+        phones = {digits for digits, _ in keys if digits}
+        names = {name for digits, name in keys if not digits}
+        customers = self.filter(
+            Q(phone_digits__in=phones) | Q(phone_digits='', name_key__in=names)
+        )
+        return {customer.key: customer for customer in customers}
+    
+    def _last_event_dates(self, customers):
+        """Latest event date among the saved orders of each customer (one query)."""
+        if not customers:
+            return {}
+        return dict(
+            self.filter(pk__in=[customer.pk for customer in customers])
+            .order_by().annotate(last=Max('orders__event_date')).values_list('pk', 'last')
+        )
+    
+    @staticmethod
+    def _latest(orders):
+        """The order with the latest event date (the last given on ties)."""
+        return max(reversed(orders), key=lambda order: order.event_date)
+    
+    @staticmethod
+    def _updated(customer, order):
+        """Copy the contact details of an order to a customer."""
+        values = {
+            'name': order.customer_name,
+            'phone': order.customer_phone,
+            'address': order.customer_address,
+        }
+        is_changed = False
+        for field, value in values.items():
+            if value and getattr(customer, field) != value:
+                setattr(customer, field, value)
+                is_changed = True
+        customer.update_keys()
+        return customer, is_changed
+
+
+class Customer(models.Model):
+    """
+    A customer with the lifetime stats of its orders.
+    
+    orders_count, total_revenue and last_event_date only count orders that
+    are not cancelled. They are kept up to date incrementally with the
+    order rollups (see apps.customers.stats).
+    """
+    name = models.CharField(
+        max_length=200,
+        verbose_name='Nombre'
+    )
+    phone = models.CharField(
+        max_length=50,
+        blank=True,
+        verbose_name='Teléfono'
+    )
+    address = models.TextField(
+        blank=True,
+        verbose_name='Dirección'
+    )
+    # Lookup keys (autocomplete and deduplication), see update_keys
+    phone_digits = models.CharField(
+        max_length=50,
+        blank=True,
+        db_index=True,
+        editable=False
+    )
+    name_key = models.CharField(
+        max_length=200,
+        db_index=True,
+        editable=False
+    )
+    orders_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Pedidos'
+    )
+    total_revenue = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Facturación total'
+    )
+    last_event_date = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name='Último evento'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    objects = CustomerManager()
+    
+    class Meta:
+        verbose_name = 'Cliente'
+        verbose_name_plural = 'Clientes'
+        ordering = ['name_key']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['phone_digits'],
+                condition=~Q(phone_digits=''),
+                name='customer_unique_phone'
+            ),
+            models.UniqueConstraint(
+                fields=['name_key'],
+                condition=Q(phone_digits=''),
+                name='customer_unique_name_without_phone'
+            ),
+        ]
+    
+    def __str__(self):
+        return self.name
+    
+    @property
+    def key(self):
+        return (self.phone_digits, '' if self.phone_digits else self.name_key)
+    
+    def update_keys(self):
+        self.phone_digits = digits_only(self.phone)
+        self.name_key = normalize_text(self.name)
+    
+    def save(self, *args, **kwargs):
+        self.update_keys()
+        super().save(*args, **kwargs)
@@ -0,0 +1,24 @@
+"""
+Serializers for the Customer model.
+"""
+from rest_framework import serializers
+from .models import Customer
+
+
+class CustomerSerializer(serializers.ModelSerializer):
+    """Customer with its lifetime stats (read only, kept by the orders)."""
+    
+    class Meta:
+        model = Customer
+        fields = [
+            'id',
+            'name',
+            'phone',
+            'address',
+            'orders_count',
+            'total_revenue',
+            'last_event_date',
+            'created_at',
+            'updated_at',
+        ]
+        read_only_fields = fields
@@ -0,0 +1,49 @@
+"""
+Customer lookups for the API.
+"""
+from django.db import connections
+
+from config.search import normalize_text, phone_query_digits
+from .models import Customer
+
+
+AUTOCOMPLETE_LIMIT = 10
+
+
+def _prefix_filter(queryset, field, prefix):
+    """
+    Rows whose field starts with prefix, as an index range scan.
+    
+    SQLite's LIKE is case-insensitive and cannot use a plain index, so a
+    [prefix, next prefix) range is used there. PostgreSQL uses the
+    pattern_ops index Django creates for indexed CharFields.
+    """
+    if connections[queryset.db].vendor == 'sqlite':
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return queryset.filter(**{f'{field}__gte': prefix, f'{field}__lt': upper})
+    return queryset.filter(**{f'{field}__startswith': prefix})
+
+
+def autocomplete_customers(query, limit=AUTOCOMPLETE_LIMIT):
+    """
+    Customers whose name (or phone, for numeric queries) starts with query.
+    
+    A prefix lookup on the indexed name_key / phone_digits columns, so it
+    reads only the matching rows whatever the number of customers.
+    
+    Args:
+        query: Text typed by the user
+        limit: Maximum number of customers
+    
+    Returns:
+        QuerySet of customers ordered by name (or phone)
+    """
+    digits = phone_query_digits(query)
+    if digits:
+        field, prefix = 'phone_digits', digits
+    else:
+        field, prefix = 'name_key', normalize_text(query)
+    if not prefix:
+        return Customer.objects.none()
+    
+    return _prefix_filter(Customer.objects.all(), field, prefix).order_by(field, 'id')[:limit]
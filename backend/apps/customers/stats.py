@@ -0,0 +1,148 @@
+"""
+Lifetime stats of customers (orders count, revenue, last event date).
+
+Kept up to date from the same (before, after) order snapshots as the
+DailyRevenue rollups (see apps.reports.rollups), so every order write
+adjusts the stats of the affected customers in its own transaction.
+rebuild_customer_stats() recomputes them from the orders.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Sum, F, Count, Max
+
+from apps.orders.models import Order, OrderItem
+from .models import Customer
+
+
+CENT = Decimal('0.01')
+
+
+def _counts(snapshot):
+    return (
+        snapshot is not None
+        and snapshot.get('customer_id') is not None
+        and snapshot['status'] != 'cancelado'
+    )
+
+
+def _empty_stats():
+    return {'orders_count': 0, 'total_revenue': Decimal('0.00'), 'last_event_date': None}
+
+
+def _empty_delta():
+    return {'orders_count': 0, 'revenue': Decimal('0.00'), 'added': [], 'removed': []}
+
+
+def apply_customer_changes(changes):
+    """
+    Apply (before, after) order snapshots to the customer stats.
+    
+    Must run inside a transaction. Affected customers are locked in id
+    order, like the rollup rows. The last event date is only recomputed
+    (one indexed query) when the order that set it goes away.
+    """
+    deltas = defaultdict(_empty_delta)
+    for before, after in changes:
+        if _counts(before):
+            delta = deltas[before['customer_id']]
+            delta['orders_count'] -= 1
+            delta['revenue'] -= before['totals']['revenue']
+            delta['removed'].append(before['date'])
+        if _counts(after):
+            delta = deltas[after['customer_id']]
+            delta['orders_count'] += 1
+            delta['revenue'] += after['totals']['revenue']
+            delta['added'].append(after['date'])
+    
+    deltas = {
+        customer_id: delta for customer_id, delta in deltas.items()
+        if delta['orders_count'] or delta['revenue'] or sorted(delta['added']) != sorted(delta['removed'])
+    }
+    if not deltas:
+        return
+    
+    customers = Customer.objects.select_for_update().filter(id__in=deltas).order_by('id')
+    for customer in customers:
+        delta = deltas[customer.id]
+        customer.orders_count += delta['orders_count']
+        customer.total_revenue += delta['revenue']
+        
+        last_added = max(delta['added'], default=None)
+        last_removed = max(delta['removed'], default=None)
+        current = customer.last_event_date
+        if (
+            last_removed is not None
+            and (current is None or last_removed >= current)
+            and (last_added is None or last_removed > last_added)
+        ):
+            current = _last_event_date(customer.id)
+        elif last_added is not None and (current is None or last_added > current):
+            current = last_added
+        customer.last_event_date = current
+        
+        customer.save(update_fields=[
+            'orders_count', 'total_revenue', 'last_event_date', 'updated_at'
+        ])
+
+
+def _active_orders():
+    return Order.objects.exclude(status='cancelado')
+
+
+def _last_event_date(customer_id):
+    return _active_orders().filter(customer_id=customer_id).aggregate(
+        last=Max('event_date')
+    )['last']
+
+
+def compute_customer_stats():
+    """
+    Compute the stats of every customer with orders in two grouped queries.
+    
+    Returns:
+        dict mapping customer id to its stats
+    """
+    stats = defaultdict(_empty_stats)
+    
+    for row in _active_orders().filter(customer__isnull=False).order_by().values(
+        'customer_id'
+    ).annotate(count=Count('id'), last=Max('event_date')):
+        stats[row['customer_id']]['orders_count'] = row['count']
+        stats[row['customer_id']]['last_event_date'] = row['last']
+    
+    for row in OrderItem.objects.filter(
+        order__in=_active_orders().filter(customer__isnull=False)
+    ).order_by().values('order__customer_id').annotate(
+        revenue=Sum(F('quantity') * F('unit_price'))
+    ):
+        revenue = row['revenue'] or Decimal('0.00')
+        stats[row['order__customer_id']]['total_revenue'] = revenue.quantize(CENT)
+    
+    return stats
+
+
+def rebuild_customer_stats(batch_size=500):
+    """
+    Recompute the stats of every customer.
+    
+    Returns:
+        Number of customers updated
+    """
+    stats = compute_customer_stats()
+    changed = []
+    for customer in Customer.objects.only(
+        'id', 'orders_count', 'total_revenue', 'last_event_date'
+    ).order_by('id'):
+        values = stats.get(customer.id) or _empty_stats()
+        if any(getattr(customer, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(customer, field, value)
+            changed.append(customer)
+    
+    Customer.objects.bulk_update(
+        changed,
+        ['orders_count', 'total_revenue', 'last_event_date'],
+        batch_size=batch_size
+    )
+    return len(changed)
@@ -0,0 +1,55 @@
+"""
+Tests for customer resolution.
+"""
+from datetime import date
+
+from django.test import TestCase
+
+from apps.orders.models import Order
+from .models import Customer
+
+
+def create_order(name, address, event_date, phone='11-4000-1234'):
+    return Order.objects.create(
+        customer_name=name,
+        customer_phone=phone,
+        customer_address=address,
+        event_date=event_date,
+        delivery_date=event_date,
+        return_date=event_date,
+        status='entregado',
+    )
+
+
+class ResolveCustomerTests(TestCase):
+    
+    def test_new_customer_takes_latest_order_details(self):
+        orders = [
+            Order(customer_name='Ana', customer_phone='11-4000-1234', customer_address='Nueva 2',
+                  event_date=date(2024, 5, 1)),
+            Order(customer_name='Ana P.', customer_phone='11-4000-1234', customer_address='Vieja 1',
+                  event_date=date(2023, 1, 1)),
+        ]
+        Customer.objects.resolve(orders)
+        
+        customer = Customer.objects.get()
+        self.assertEqual((customer.name, customer.address), ('Ana', 'Nueva 2'))
+        self.assertEqual(orders[1].customer, customer)
+    
+    def test_editing_old_order_keeps_current_details(self):
+        old = create_order('Ana', 'Vieja 1', date(2023, 1, 1))
+        create_order('Ana Pérez', 'Nueva 2', date(2024, 5, 1))
+        
+        old.customer_address = 'Vieja 1, piso 3'
+        old.save()
+        
+        customer = Customer.objects.get()
+        self.assertEqual((customer.name, customer.address), ('Ana Pérez', 'Nueva 2'))
+        self.assertEqual(old.customer, customer)
+    
+    def test_newer_order_updates_details(self):
+        create_order('Ana', 'Vieja 1', date(2023, 1, 1))
+        create_order('Ana Pérez', 'Nueva 2', date(2024, 5, 1))
+        
+        customer = Customer.objects.get()
+        self.assertEqual((customer.name, customer.address), ('Ana Pérez', 'Nueva 2'))
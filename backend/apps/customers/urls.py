@@ -0,0 +1,13 @@
+"""
+URL routing for Customers API.
+"""
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import CustomerViewSet
+
+router = DefaultRouter()
+router.register('', CustomerViewSet, basename='customer')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,50 @@
+"""
+API views for Customer lookups.
+"""
+from rest_framework import viewsets, filters
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+
+from .models import Customer
+from .serializers import CustomerSerializer
+from .services import autocomplete_customers, AUTOCOMPLETE_LIMIT
+
+
+class CustomerViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for browsing customers.
+    
+    Customers are created and updated from their orders; their orders are
+    listed with GET /api/orders/?customer=<id>.
+    """
+    queryset = Customer.objects.all()
+    serializer_class = CustomerSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['name_key', 'orders_count', 'total_revenue']
+    ordering = ['name_key']
+    # Max queries per action, session and user included (see config.profiling)
+    query_budgets = {
+        'list': 4,
+        'retrieve': 3,
+        'autocomplete': 3,
+    }
+    
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Suggest customers while typing a new order.
+        
+        Query params:
+            q: Start of the customer name or phone
+            limit: Optional maximum number of results (up to 10)
+        """
+        try:
+            limit = int(request.query_params.get('limit', AUTOCOMPLETE_LIMIT))
+        except ValueError:
+            limit = AUTOCOMPLETE_LIMIT
+        limit = max(1, min(limit, AUTOCOMPLETE_LIMIT))
+        
+        customers = autocomplete_customers(request.query_params.get('q', ''), limit)
+        return Response(CustomerSerializer(customers, many=True).data)
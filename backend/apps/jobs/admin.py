@@ -0,0 +1,13 @@
+"""
+Admin configuration for Jobs.
+"""
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'attempts', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind']
+    ordering = ['-created_at']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.jobs'
+    verbose_name = 'Tareas'
+    
+    def ready(self):
+        # Register the job handlers
+        from . import handlers  # noqa: F401
@@ -0,0 +1,147 @@
+"""
+Job handlers for PDF batches, exports and reports.
+
+Each handler mirrors a synchronous endpoint, so the same output can be
+produced in the background for large selections.
+"""
+import json
+import tempfile
+
+from rest_framework import serializers
+from rest_framework.utils.encoders import JSONEncoder
+
+from apps.orders.models import Order
+from apps.orders.exports import (
+    EXPORT_FORMATS,
+    order_rows,
+    order_item_rows,
+    export_file,
+    export_format_error,
+)
+from apps.orders.pdf_batch import batch_orders, stream_batch_zip, MAX_BATCH_ORDERS
+from apps.orders.services import generate_orders_pdf
+from apps.reports.services import delivered_orders, get_revenue_report
+from .registry import register, JobResult
+
+
+class PDFBatchParamsSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+        max_length=MAX_BATCH_ORDERS
+    )
+    date = serializers.DateField(required=False)
+    file_format = serializers.ChoiceField(choices=['pdf', 'zip'], default='pdf')
+    
+    def validate(self, data):
+        if ('ids' in data) == ('date' in data):
+            raise serializers.ValidationError('Indique ids o date.')
+        return data
+
+
+class OrderExportParamsSerializer(serializers.Serializer):
+    file_format = serializers.ChoiceField(choices=EXPORT_FORMATS, default='csv')
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES, required=False)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    search = serializers.CharField(required=False, allow_blank=True)
+    phone = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate_file_format(self, value):
+        error = export_format_error(value)
+        if error:
+            raise serializers.ValidationError(error)
+        return value
+
+
+class DateRangeParamsSerializer(serializers.Serializer):
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    
+    def validate(self, data):
+        if data['start_date'] > data['end_date']:
+            raise serializers.ValidationError('start_date debe ser anterior a end_date')
+        return data
+
+
+class ReportExportParamsSerializer(DateRangeParamsSerializer):
+    file_format = serializers.ChoiceField(choices=EXPORT_FORMATS, default='csv')
+    
+    def validate_file_format(self, value):
+        error = export_format_error(value)
+        if error:
+            raise serializers.ValidationError(error)
+        return value
+
+
+@register('orders_pdf_batch', PDFBatchParamsSerializer, 'PDF de varios pedidos')
+def orders_pdf_batch(params):
+    orders = batch_orders(order_ids=params.get('ids'), delivery_date=params.get('date'))
+    if not orders:
+        raise ValueError('No hay pedidos para imprimir.')
+    
+    filename = f"pedidos_{params['date'].isoformat()}" if params.get('date') else 'pedidos'
+    if params['file_format'] == 'zip':
+        output = tempfile.TemporaryFile()
+        for chunk in stream_batch_zip(orders):
+            output.write(chunk)
+        output.seek(0)
+        return JobResult(f'{filename}.zip', output, 'application/zip')
+    
+    return JobResult(
+        f'{filename}.pdf',
+        generate_orders_pdf(orders).getvalue(),
+        'application/pdf'
+    )
+
+
+def _filtered_orders(params):
+    return Order.objects.filtered(
+        status=params.get('status'),
+        start_date=params.get('start_date'),
+        end_date=params.get('end_date'),
+        search=params.get('search'),
+        phone=params.get('phone'),
+    ).order_by('-created_at')
+
+
+def _export_result(filename, header, rows, file_format):
+    output, content_type = export_file(header, rows, file_format)
+    return JobResult(f'{filename}.{file_format}', output, content_type)
+
+
+@register('orders_export', OrderExportParamsSerializer, 'Exportación de pedidos')
+def orders_export(params):
+    header, rows = order_rows(_filtered_orders(params))
+    return _export_result('pedidos', header, rows, params['file_format'])
+
+
+@register('order_items_export', OrderExportParamsSerializer, 'Exportación de items de pedidos')
+def order_items_export(params):
+    header, rows = order_item_rows(_filtered_orders(params))
+    return _export_result('pedidos_items', header, rows, params['file_format'])
+
+
+@register('report_export', ReportExportParamsSerializer, 'Exportación de reporte')
+def report_export(params):
+    start, end = params['start_date'], params['end_date']
+    orders = delivered_orders(start, end).order_by('event_date', 'id')
+    header, rows = order_rows(orders)
+    return _export_result(
+        f'reporte_{start.isoformat()}_{end.isoformat()}',
+        header,
+        rows,
+        params['file_format']
+    )
+
+
+@register('revenue_report', DateRangeParamsSerializer, 'Reporte de facturación')
+def revenue_report(params):
+    start, end = params['start_date'], params['end_date']
+    report = get_revenue_report(start, end)
+    return JobResult(
+        f'reporte_{start.isoformat()}_{end.isoformat()}.json',
+        json.dumps(report, cls=JSONEncoder, ensure_ascii=False).encode('utf-8'),
+        'application/json'
+    )
@@ -0,0 +1,137 @@
+"""
+Run background job workers.
+
+Usage:
+    python manage.py run_workers
+    python manage.py run_workers --workers 4 --mode process
+    python manage.py run_workers --once
+"""
+import logging
+import os
+import signal
+import socket
+import threading
+import multiprocessing
+import time
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections, DatabaseError
+
+from apps.jobs.queue import claim_job, run_job, requeue_stale_jobs, delete_expired_jobs
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds between stale job / expired result checks
+MAINTENANCE_INTERVAL = 60
+
+
+def work(name, stop, poll_interval, once):
+    """Claim and run jobs until stop is set (or the queue is empty)."""
+    try:
+        while not stop.is_set():
+            try:
+                job = claim_job(name)
+            except DatabaseError:
+                # Keep the worker alive through connection hiccups
+                logger.exception('Worker %s could not claim a job', name)
+                connections.close_all()
+                stop.wait(poll_interval)
+                continue
+            if job is None:
+                if once:
+                    break
+                stop.wait(poll_interval)
+                continue
+            run_job(job)
+    finally:
+        connections.close_all()
+
+
+def _process_main(name, stop, poll_interval, once):
+    # Ctrl+C is handled by the parent, which lets running jobs finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    django.setup()
+    work(name, stop, poll_interval, once)
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta las tareas en segundo plano (PDFs, exportaciones y reportes).'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Cantidad de workers (por defecto 2).'
+        )
+        parser.add_argument(
+            '--mode',
+            choices=['thread', 'process'],
+            default='thread',
+            help='Ejecutar los workers como hilos o procesos (por defecto thread).'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Segundos de espera cuando no hay tareas (por defecto 2).'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Procesar las tareas pendientes y terminar.'
+        )
+    
+    def handle(self, *args, **options):
+        count = max(1, options['workers'])
+        mode = options['mode']
+        poll_interval = options['poll_interval']
+        once = options['once']
+        prefix = f'{socket.gethostname()}:{os.getpid()}'
+        
+        requeue_stale_jobs()
+        delete_expired_jobs()
+        
+        if mode == 'process':
+            # Children must open their own database connections
+            connections.close_all()
+            stop = multiprocessing.Event()
+            workers = [
+                multiprocessing.Process(
+                    target=_process_main,
+                    args=(f'{prefix}-p{i}', stop, poll_interval, once)
+                )
+                for i in range(count)
+            ]
+        else:
+            stop = threading.Event()
+            workers = [
+                threading.Thread(
+                    target=work,
+                    args=(f'{prefix}-t{i}', stop, poll_interval, once)
+                )
+                for i in range(count)
+            ]
+        
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f'{count} workers ({mode}) en ejecución.')
+        
+        last_maintenance = time.monotonic()
+        try:
+            while any(worker.is_alive() for worker in workers):
+                for worker in workers:
+                    worker.join(timeout=1)
+                if time.monotonic() - last_maintenance >= MAINTENANCE_INTERVAL:
+                    requeue_stale_jobs()
+                    delete_expired_jobs()
+                    last_maintenance = time.monotonic()
+        except KeyboardInterrupt:
+            self.stdout.write('Deteniendo workers, esperando las tareas en curso...')
+            stop.set()
+            for worker in workers:
+                worker.join()
+        
+        self.stdout.write(self.style.SUCCESS('Workers detenidos.'))
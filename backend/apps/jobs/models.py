@@ -0,0 +1,101 @@
+"""
+Background job model.
+"""
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+
+
+def job_results_storage():
+    """Storage for job result files (settings.JOBS['RESULTS_DIR'])."""
+    return FileSystemStorage(location=settings.JOBS['RESULTS_DIR'])
+
+
+def job_result_path(instance, filename):
+    return f'{instance.pk}/{filename}'
+
+
+class Job(models.Model):
+    """
+    A unit of background work (PDF batch, export or report).
+    
+    The table itself is the queue: workers claim the oldest pending job
+    (see apps.jobs.queue) and store its output in result.
+    """
+    STATUS_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('en_proceso', 'En proceso'),
+        ('completado', 'Completado'),
+        ('error', 'Error'),
+    ]
+    
+    kind = models.CharField(
+        max_length=50,
+        verbose_name='Tipo'
+    )
+    params = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Parámetros'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pendiente',
+        verbose_name='Estado'
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs',
+        verbose_name='Creado por'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Intentos'
+    )
+    worker = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='Worker'
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name='Error'
+    )
+    result = models.FileField(
+        upload_to=job_result_path,
+        storage=job_results_storage,
+        blank=True,
+        verbose_name='Resultado'
+    )
+    content_type = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='Tipo de contenido'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'Tarea'
+        verbose_name_plural = 'Tareas'
+        ordering = ['-created_at']
+        indexes = [
+            # Workers look up the oldest pending job
+            models.Index(
+                fields=['status', 'created_at'],
+                name='job_queue_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Tarea #{self.id} - {self.kind} ({self.status})"
+    
+    @property
+    def filename(self):
+        """Name of the result file, without the job directory."""
+        return self.result.name.rsplit('/', 1)[-1] if self.result else ''
@@ -0,0 +1,157 @@
+"""
+Database-backed job queue.
+
+Jobs are rows of the Job table. A worker claims the oldest pending job
+by flipping its status with a conditional UPDATE, so two workers never
+run the same job, without any broker besides the database. On
+PostgreSQL the candidate row is also read with SKIP LOCKED, so
+concurrent workers do not wait on each other.
+"""
+import logging
+from contextlib import nullcontext
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+from .registry import get_job_type
+
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(kind, params, user=None):
+    """
+    Add a job to the queue.
+    
+    Args:
+        kind: Registered job kind
+        params: JSON-serializable params (as returned by the kind's
+            serializer .data)
+        user: Optional user submitting the job
+    """
+    return Job.objects.create(kind=kind, params=params, created_by=user)
+
+
+def claim_job(worker):
+    """
+    Take the oldest pending job and mark it as running.
+    
+    Args:
+        worker: Name of the worker, stored on the job
+    
+    Returns:
+        The claimed Job, or None if the queue is empty
+    """
+    # Without row locks (SQLite) a transaction only adds lock upgrade
+    # conflicts; the conditional UPDATE alone keeps the claim safe
+    if connection.features.has_select_for_update:
+        locked = transaction.atomic
+    else:
+        locked = nullcontext
+    
+    while True:
+        with locked():
+            job_id = Job.objects.select_for_update(skip_locked=True).filter(
+                status='pendiente'
+            ).order_by('created_at', 'id').values_list('id', flat=True).first()
+            if job_id is None:
+                return None
+            
+            claimed = Job.objects.filter(id=job_id, status='pendiente').update(
+                status='en_proceso',
+                worker=worker,
+                started_at=timezone.now(),
+                attempts=F('attempts') + 1,
+            )
+        
+        # Another worker took it first (databases without row locks)
+        if claimed:
+            return Job.objects.get(id=job_id)
+
+
+def run_job(job):
+    """Run a claimed job and store its result or error."""
+    job_type = get_job_type(job.kind)
+    try:
+        if job_type is None:
+            raise ValueError(f'Tipo de tarea desconocido: {job.kind}')
+        
+        serializer = job_type.serializer_class(data=job.params)
+        serializer.is_valid(raise_exception=True)
+        result = job_type.handler(serializer.validated_data)
+        
+        content = result.content
+        if isinstance(content, bytes):
+            content = ContentFile(content)
+        else:
+            content = File(content)
+        try:
+            job.result.save(result.filename, content, save=False)
+        finally:
+            content.close()
+        
+        job.content_type = result.content_type
+        job.status = 'completado'
+        job.error = ''
+    except Exception as exc:
+        logger.exception('Job %s (%s) failed', job.id, job.kind)
+        job.status = 'error'
+        job.error = str(exc) or exc.__class__.__name__
+    
+    job.finished_at = timezone.now()
+    job.save(update_fields=['result', 'content_type', 'status', 'error', 'finished_at'])
+    return job
+
+
+def requeue_stale_jobs():
+    """
+    Put back in the queue the jobs whose worker died while running them.
+    
+    A job running for longer than JOBS['STALE_AFTER'] seconds is retried
+    until it has been attempted JOBS['MAX_ATTEMPTS'] times, then marked
+    as failed.
+    
+    Returns:
+        Number of jobs requeued or failed
+    """
+    config = settings.JOBS
+    stale = Job.objects.filter(
+        status='en_proceso',
+        started_at__lt=timezone.now() - timedelta(seconds=config['STALE_AFTER'])
+    )
+    requeued = stale.filter(attempts__lt=config['MAX_ATTEMPTS']).update(
+        status='pendiente',
+        worker=''
+    )
+    failed = stale.update(
+        status='error',
+        error='La tarea no terminó a tiempo.',
+        finished_at=timezone.now()
+    )
+    return requeued + failed
+
+
+def delete_expired_jobs():
+    """
+    Delete finished jobs older than JOBS['RESULT_TTL'] seconds and their
+    result files.
+    
+    Returns:
+        Number of deleted jobs
+    """
+    expired = Job.objects.filter(
+        status__in=['completado', 'error'],
+        finished_at__lt=timezone.now() - timedelta(seconds=settings.JOBS['RESULT_TTL'])
+    )
+    count = 0
+    for job in expired.iterator():
+        if job.result:
+            job.result.delete(save=False)
+        job.delete()
+        count += 1
+    return count
@@ -0,0 +1,47 @@
+"""
+Registry of the job kinds that can be submitted.
+
+Each kind has a handler, which receives the validated params and returns
+a JobResult, and a serializer that validates the params on submit.
+"""
+
+
+class JobResult:
+    """Output of a job handler: a file name, its content and type."""
+    
+    def __init__(self, filename, content, content_type):
+        self.filename = filename
+        # bytes or a binary file object positioned at the start
+        self.content = content
+        self.content_type = content_type
+
+
+class JobType:
+    def __init__(self, kind, handler, serializer_class, label):
+        self.kind = kind
+        self.handler = handler
+        self.serializer_class = serializer_class
+        self.label = label
+
+
+JOB_TYPES = {}
+
+
+def register(kind, serializer_class, label):
+    """
+    Register a job handler.
+    
+    Args:
+        kind: Name clients use to submit the job
+        serializer_class: Serializer validating the job params
+        label: Human readable description
+    """
+    def decorator(handler):
+        JOB_TYPES[kind] = JobType(kind, handler, serializer_class, label)
+        return handler
+    return decorator
+
+
+def get_job_type(kind):
+    """Return the registered JobType, or None."""
+    return JOB_TYPES.get(kind)
@@ -0,0 +1,58 @@
+"""
+Serializers for background jobs.
+"""
+from rest_framework import serializers
+from .models import Job
+from .registry import JOB_TYPES, get_job_type
+from .queue import enqueue
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Job state as returned to the client."""
+    status_display = serializers.CharField(
+        source='get_status_display',
+        read_only=True
+    )
+    filename = serializers.CharField(read_only=True)
+    
+    class Meta:
+        model = Job
+        fields = [
+            'id',
+            'kind',
+            'params',
+            'status',
+            'status_display',
+            'attempts',
+            'error',
+            'filename',
+            'content_type',
+            'created_at',
+            'started_at',
+            'finished_at',
+        ]
+        read_only_fields = fields
+
+
+class JobCreateSerializer(serializers.Serializer):
+    """Validate a job submission against the params of its kind."""
+    kind = serializers.ChoiceField(choices=[])
+    params = serializers.DictField(required=False, default=dict)
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['kind'].choices = [
+            (kind, job_type.label) for kind, job_type in JOB_TYPES.items()
+        ]
+    
+    def validate(self, data):
+        params_serializer = get_job_type(data['kind']).serializer_class(data=data['params'])
+        if not params_serializer.is_valid():
+            raise serializers.ValidationError({'params': params_serializer.errors})
+        # Store the normalized params (dates as ISO strings)
+        data['params'] = params_serializer.data
+        return data
+    
+    def create(self, validated_data):
+        user = self.context['request'].user
+        return enqueue(validated_data['kind'], validated_data['params'], user)
@@ -0,0 +1,203 @@
+"""
+Tests for the background job queue and its API.
+"""
+import json
+import os
+import tempfile
+import threading
+from datetime import date, timedelta
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.storage import FileSystemStorage
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from apps.orders.models import Order
+from apps.reports.rollups import rebuild_rollups
+from .models import Job
+from .queue import claim_job, delete_expired_jobs, enqueue, requeue_stale_jobs, run_job
+from .handlers import DateRangeParamsSerializer
+from .registry import JOB_TYPES, JobType
+
+
+REPORT_PARAMS = {'start_date': '2024-01-01', 'end_date': '2024-01-31'}
+
+
+class ResultsDirMixin:
+    """Store the job results in a temporary directory."""
+    
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patcher = mock.patch.object(
+            Job._meta.get_field('result'), 'storage', FileSystemStorage(location=directory.name)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class QueueTests(ResultsDirMixin, TestCase):
+    
+    def test_claims_oldest_job_once(self):
+        first = enqueue('revenue_report', REPORT_PARAMS)
+        second = enqueue('revenue_report', REPORT_PARAMS)
+        
+        claimed = claim_job('worker-1')
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertEqual((claimed.status, claimed.worker, claimed.attempts), ('en_proceso', 'worker-1', 1))
+        self.assertEqual(claim_job('worker-2').pk, second.pk)
+        self.assertIsNone(claim_job('worker-1'))
+    
+    def test_lost_claim_moves_to_the_next_job(self):
+        first = enqueue('revenue_report', REPORT_PARAMS)
+        second = enqueue('revenue_report', REPORT_PARAMS)
+        # Another worker claims the first job after this one read it
+        Job.objects.filter(pk=first.pk).update(status='en_proceso', worker='worker-2')
+        stale_read = mock.MagicMock()
+        stale_read.filter.return_value.order_by.return_value.values_list.return_value.first.return_value = first.pk
+        reads = iter([stale_read])
+        select_for_update = Job.objects.select_for_update
+        
+        with mock.patch.object(Job.objects, 'select_for_update',
+                               side_effect=lambda **kwargs: next(reads, None) or select_for_update(**kwargs)):
+            claimed = claim_job('worker-1')
+        
+        stale_read.filter.assert_called_once()
+        self.assertEqual(claimed.pk, second.pk)
+        self.assertEqual(Job.objects.get(pk=first.pk).worker, 'worker-2')
+    
+    def test_completed_job_stores_its_result(self):
+        enqueue('revenue_report', REPORT_PARAMS)
+        job = run_job(claim_job('worker-1'))
+        
+        self.assertEqual(job.status, 'completado')
+        self.assertEqual(job.filename, 'reporte_2024-01-01_2024-01-31.json')
+        with job.result.open('rb') as result:
+            self.assertEqual(json.load(result)['orders_count'], 0)
+    
+    def test_failed_job_stores_the_error(self):
+        def fail(params):
+            raise RuntimeError('sin datos')
+        
+        failing = JobType('failing', fail, DateRangeParamsSerializer, 'Falla')
+        enqueue('failing', REPORT_PARAMS)
+        enqueue('unknown', {})
+        with mock.patch.dict(JOB_TYPES, failing=failing), self.assertLogs('apps.jobs.queue', 'ERROR'):
+            failed = run_job(claim_job('worker-1'))
+            unknown = run_job(claim_job('worker-1'))
+        
+        self.assertEqual((failed.status, failed.error), ('error', 'sin datos'))
+        self.assertEqual(unknown.status, 'error')
+        self.assertIn('unknown', unknown.error)
+        self.assertFalse(failed.result)
+    
+    def test_stale_jobs_are_requeued_then_failed(self):
+        long_ago = timezone.now() - timedelta(hours=2)
+        retried = Job.objects.create(kind='revenue_report', status='en_proceso', worker='w', attempts=1,
+                                     started_at=long_ago)
+        exhausted = Job.objects.create(kind='revenue_report', status='en_proceso', worker='w', attempts=3,
+                                       started_at=long_ago)
+        running = Job.objects.create(kind='revenue_report', status='en_proceso', worker='w', attempts=1,
+                                     started_at=timezone.now())
+        
+        with self.settings(JOBS=dict(settings.JOBS, STALE_AFTER=1800, MAX_ATTEMPTS=3)):
+            self.assertEqual(requeue_stale_jobs(), 2)
+        
+        retried.refresh_from_db()
+        exhausted.refresh_from_db()
+        running.refresh_from_db()
+        self.assertEqual((retried.status, retried.worker), ('pendiente', ''))
+        self.assertEqual(exhausted.status, 'error')
+        self.assertIsNotNone(exhausted.finished_at)
+        self.assertEqual(running.status, 'en_proceso')
+        # The requeued job is claimed again
+        self.assertEqual(claim_job('worker-2').pk, retried.pk)
+    
+    def test_expired_jobs_are_deleted_with_their_files(self):
+        enqueue('revenue_report', REPORT_PARAMS)
+        expired = run_job(claim_job('worker-1'))
+        path = expired.result.path
+        Job.objects.filter(pk=expired.pk).update(finished_at=timezone.now() - timedelta(days=30))
+        recent = Job.objects.create(kind='revenue_report', status='error', finished_at=timezone.now())
+        
+        self.assertEqual(delete_expired_jobs(), 1)
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(list(Job.objects.values_list('pk', flat=True)), [recent.pk])
+
+
+@skipUnless(connection.features.has_select_for_update, 'Requiere bloqueos de filas (PostgreSQL).')
+class ConcurrentClaimTests(TransactionTestCase):
+    """Workers claiming at the same time never get the same job."""
+    
+    def test_each_job_is_claimed_once(self):
+        jobs = [enqueue('revenue_report', REPORT_PARAMS).pk for _ in range(20)]
+        barrier = threading.Barrier(4, timeout=5)
+        claimed = []
+        
+        def work(name):
+            try:
+                barrier.wait()
+                while (job := claim_job(name)) is not None:
+                    claimed.append(job.pk)
+            finally:
+                connection.close()
+        
+        threads = [threading.Thread(target=work, args=(f'worker-{index}',)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(sorted(claimed), jobs)
+
+
+class JobAPITests(ResultsDirMixin, TestCase):
+    
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('ana')
+        self.client.force_login(self.user)
+    
+    def test_submit_poll_download(self):
+        Order.objects.create(
+            customer_name='Ana', customer_phone='11-4000-1234', status='entregado',
+            event_date=date(2024, 1, 10), delivery_date=date(2024, 1, 10), return_date=date(2024, 1, 10),
+        )
+        rebuild_rollups()
+        response = self.client.post(
+            '/api/jobs/', {'kind': 'revenue_report', 'params': REPORT_PARAMS}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()['id']
+        self.assertEqual(response.json()['status'], 'pendiente')
+        self.assertEqual(self.client.get(f'/api/jobs/{job_id}/download/').status_code, 409)
+        
+        run_job(claim_job('worker-1'))
+        
+        response = self.client.get(f'/api/jobs/{job_id}/')
+        self.assertEqual(response.json()['status'], 'completado')
+        response = self.client.get(f'/api/jobs/{job_id}/download/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        report = json.loads(b''.join(response.streaming_content))
+        response.close()
+        self.assertEqual(report['orders_count'], 1)
+        self.assertEqual(report['orders'][0]['customer_name'], 'Ana')
+    
+    def test_invalid_params_are_rejected(self):
+        response = self.client.post(
+            '/api/jobs/',
+            {'kind': 'revenue_report', 'params': {'start_date': '2024-02-01', 'end_date': '2024-01-01'}},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Job.objects.exists())
+    
+    def test_jobs_of_other_users_are_hidden(self):
+        job = enqueue('revenue_report', REPORT_PARAMS, user=User.objects.create_user('bruno'))
+        self.assertEqual(self.client.get(f'/api/jobs/{job.pk}/').status_code, 404)
+        self.assertEqual(self.client.get('/api/jobs/').json()['count'], 0)
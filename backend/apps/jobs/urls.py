@@ -0,0 +1,13 @@
+"""
+URL routing for Jobs API.
+"""
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import JobViewSet
+
+router = DefaultRouter()
+router.register('', JobViewSet, basename='job')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
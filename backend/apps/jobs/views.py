@@ -0,0 +1,79 @@
+"""
+API views for background jobs.
+"""
+from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from django.http import FileResponse
+
+from .models import Job
+from .serializers import JobSerializer, JobCreateSerializer
+
+
+class JobViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet
+):
+    """
+    Submit background jobs, poll their state and download the result.
+    
+    Each user sees the jobs they submitted.
+    """
+    permission_classes = [IsAuthenticated]
+    # Max queries per action, session and user included (see config.profiling)
+    query_budgets = {
+        'list': 4,
+        'retrieve': 3,
+        'create': 3,
+        'download': 3,
+    }
+    
+    def get_queryset(self):
+        return Job.objects.filter(created_by=self.request.user)
+    
+    def get_serializer_class(self):
+        if self.action == 'create':
+            return JobCreateSerializer
+        return JobSerializer
+    
+    def create(self, request, *args, **kwargs):
+        """
+        Submit a job.
+        
+        Body:
+            kind: Job kind (orders_pdf_batch, orders_export,
+                order_items_export, report_export, revenue_report)
+            params: Params of the kind, same as its synchronous endpoint
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = serializer.save()
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Download the result file of a completed job."""
+        job = self.get_object()
+        if job.status != 'completado' or not job.result:
+            return Response(
+                {'error': 'La tarea todavía no tiene un resultado.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        try:
+            result = job.result.open('rb')
+        except FileNotFoundError:
+            return Response(
+                {'error': 'El resultado ya no está disponible.'},
+                status=status.HTTP_410_GONE
+            )
+        
+        return FileResponse(
+            result,
+            as_attachment=True,
+            filename=job.filename,
+            content_type=job.content_type
+        )
@@ -3,19 +3,59 @@ Admin configuration for Orders.
 """
 from django.contrib import admin
 from .models import Order, OrderItem
+from apps.reports.rollups import order_snapshot, update_order_rollups
 
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 1
     readonly_fields = ['subtotal']
+    
+    def get_queryset(self, request):
+        """Load the products with the items: each row shows str(item)."""
+        return super().get_queryset(request).select_related('product')
 
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ['id', 'customer_name', 'event_date', 'status', 'total', 'created_at']
+    list_display = ['id', 'customer_name', 'event_date', 'status', 'order_total', 'created_at']
     list_filter = ['status', 'event_date']
     search_fields = ['customer_name', 'customer_phone']
     ordering = ['-created_at']
     inlines = [OrderItemInline]
     readonly_fields = ['total', 'created_at', 'updated_at']
+    
+    def get_queryset(self, request):
+        """Annotate totals so the changelist does not query per row."""
+        return super().get_queryset(request).with_totals()
+    
+    @admin.display(description='Total', ordering='annotated_total')
+    def order_total(self, obj):
+        return obj.total
+    
+    def save_model(self, request, obj, form, change):
+        """Remember the stored state of the order for the rollups."""
+        if change:
+            obj._rollup_before = order_snapshot(Order.objects.get(pk=obj.pk))
+        super().save_model(request, obj, form, change)
+    
+    def save_related(self, request, form, formsets, change):
+        """Update rollups once the inline items are saved."""
+        super().save_related(request, form, formsets, change)
+        order = form.instance
+        order.invalidate_totals()
+        update_order_rollups(
+            getattr(order, '_rollup_before', None),
+            order_snapshot(order)
+        )
+    
+    def delete_model(self, request, obj):
+        before = order_snapshot(obj)
+        super().delete_model(request, obj)
+        update_order_rollups(before, None)
+    
+    def delete_queryset(self, request, queryset):
+        snapshots = [order_snapshot(order) for order in queryset.with_items()]
+        super().delete_queryset(request, queryset)
+        for before in snapshots:
+            update_order_rollups(before, None)
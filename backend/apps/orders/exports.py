@@ -0,0 +1,184 @@
+"""
+Streaming CSV/XLSX export of orders and report data.
+
+Rows come from querysets read with .iterator(chunk_size=...) (a
+server-side cursor on PostgreSQL unless DB_DISABLE_SERVER_SIDE_CURSORS),
+so memory use stays constant however many rows are exported. CSV responses are
+streamed as they are generated; XLSX files are written with an openpyxl
+write-only workbook to a temporary file and then streamed from disk.
+"""
+import csv
+import importlib.util
+import tempfile
+from decimal import Decimal
+
+from django.http import StreamingHttpResponse, FileResponse
+from django.utils import timezone
+
+from apps.products.models import Product
+from config.async_views import streaming_content
+from .models import Order, OrderItem
+
+
+CHUNK_SIZE = 2000
+
+CENT = Decimal('0.01')
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+
+CSV_CONTENT_TYPE = 'text/csv; charset=utf-8'
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+STATUS_LABELS = dict(Order.STATUS_CHOICES)
+CATEGORY_LABELS = dict(Product.CATEGORY_CHOICES)
+
+
+class Echo:
+    """File-like object that returns what is written (for csv.writer)."""
+    
+    def write(self, value):
+        return value
+
+
+def _local(value):
+    """Convert an aware datetime to naive local time (XLSX has no zones)."""
+    return timezone.localtime(value).replace(tzinfo=None, microsecond=0)
+
+
+def order_rows(queryset):
+    """Header and rows for an order export (one row per order)."""
+    header = [
+        'Pedido', 'Cliente', 'Teléfono', 'Dirección', 'Fecha del evento',
+        'Entrega', 'Devolución', 'Estado', 'Items', 'Total', 'Creado',
+    ]
+    rows = queryset.with_totals().values_list(
+        'id',
+        'customer_name',
+        'customer_phone',
+        'customer_address',
+        'event_date',
+        'delivery_date',
+        'return_date',
+        'status',
+        'annotated_items_count',
+        'annotated_total',
+        'created_at',
+    ).iterator(chunk_size=CHUNK_SIZE)
+    
+    def generate():
+        for row in rows:
+            row = list(row)
+            row[7] = STATUS_LABELS.get(row[7], row[7])
+            row[9] = row[9].quantize(CENT)
+            row[10] = _local(row[10])
+            yield row
+    
+    return header, generate()
+
+
+def order_item_rows(queryset):
+    """Header and rows for an order items export (one row per line)."""
+    header = [
+        'Pedido', 'Cliente', 'Fecha del evento', 'Estado', 'Producto',
+        'Categoría', 'Cantidad', 'Precio unitario', 'Subtotal',
+    ]
+    rows = OrderItem.objects.filter(
+        order__in=queryset.order_by().values('id')
+    ).order_by('order_id', 'id').values_list(
+        'order_id',
+        'order__customer_name',
+        'order__event_date',
+        'order__status',
+        'product__name',
+        'product__category',
+        'quantity',
+        'unit_price',
+    ).iterator(chunk_size=CHUNK_SIZE)
+    
+    def generate():
+        for row in rows:
+            row = list(row)
+            row[3] = STATUS_LABELS.get(row[3], row[3])
+            row[5] = CATEGORY_LABELS.get(row[5], row[5])
+            unit_price = row[7]
+            row.append(row[6] * unit_price if unit_price is not None else Decimal('0.00'))
+            yield row
+    
+    return header, generate()
+
+
+def _stream_csv(header, rows):
+    writer = csv.writer(Echo())
+    # BOM so Excel opens the UTF-8 file with the right accents
+    yield '\ufeff' + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _write_xlsx(header, rows):
+    # Imported lazily: only XLSX exports need openpyxl
+    from openpyxl import Workbook
+    
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+def export_file(header, rows, file_format='csv'):
+    """
+    Write an export to a temporary file (for background jobs).
+    
+    Returns:
+        (file object positioned at the start, content type)
+    """
+    if file_format == 'xlsx':
+        return _write_xlsx(header, rows), XLSX_CONTENT_TYPE
+    
+    output = tempfile.TemporaryFile()
+    for chunk in _stream_csv(header, rows):
+        output.write(chunk.encode('utf-8'))
+    output.seek(0)
+    return output, CSV_CONTENT_TYPE
+
+
+def export_format_error(file_format):
+    """Return an error message if the format cannot be exported, else None."""
+    if file_format not in EXPORT_FORMATS:
+        return 'Formato no soportado. Use csv o xlsx.'
+    if file_format == 'xlsx' and importlib.util.find_spec('openpyxl') is None:
+        return 'La exportación XLSX requiere el paquete openpyxl.'
+    return None
+
+
+def export_response(request, filename, header, rows, file_format='csv'):
+    """
+    Build a streaming download response.
+    
+    Args:
+        request: The export request
+        filename: File name without extension
+        header: List of column titles
+        rows: Iterable of row lists
+        file_format: 'csv' or 'xlsx'
+    """
+    if file_format == 'xlsx':
+        return FileResponse(
+            _write_xlsx(header, rows),
+            as_attachment=True,
+            filename=f'{filename}.xlsx',
+            content_type=XLSX_CONTENT_TYPE
+        )
+    
+    response = StreamingHttpResponse(
+        streaming_content(request, _stream_csv(header, rows)),
+        content_type=CSV_CONTENT_TYPE
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
@@ -0,0 +1,264 @@
+"""
+Bulk order import from CSV or JSON-lines files.
+
+Rows are read as a stream, validated with OrderCreateSerializer and
+inserted in batches (one transaction, one bulk_create for orders and one
+for items per batch), so memory use does not depend on the file size.
+
+Like the create endpoint, an order is rejected if it does not fit in the
+free stock of its rental window, counting the stored orders and the
+rows accepted before it in the file.
+"""
+import csv
+import json
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.serializers import as_serializer_error
+
+from apps.products.cache import get_products
+from apps.products.models import Product
+from apps.products.services import get_daily_reservations
+from apps.customers.models import Customer
+from apps.reports.rollups import order_snapshot, apply_rollup_changes
+from .models import Order, OrderItem
+from .serializers import OrderCreateSerializer, build_order_item, item_product_ids, stock_error
+
+
+ORDER_FIELDS = [
+    'customer_name',
+    'customer_phone',
+    'customer_address',
+    'event_date',
+    'delivery_date',
+    'return_date',
+    'observations',
+]
+
+ITEM_FIELDS = ['product', 'quantity', 'unit_price']
+
+
+class ImportRowError:
+    """A row that failed before validation (e.g. malformed JSON)."""
+    
+    def __init__(self, errors):
+        self.errors = errors
+
+
+def iter_csv_orders(lines):
+    """
+    Read orders from CSV text, one row per order item.
+    
+    Columns: order_ref, the order fields and the item fields (product id,
+    quantity, optional unit_price). Consecutive rows with the same
+    non-empty order_ref belong to the same order; the order fields are
+    taken from its first row. Rows without order_ref are single-item
+    orders.
+    
+    Yields:
+        (line number, order data) tuples
+    """
+    reader = csv.DictReader(lines)
+    current_ref = None
+    current = None
+    
+    for row in reader:
+        row = {key: (value or '').strip() for key, value in row.items() if key}
+        ref = row.get('order_ref') or None
+        
+        if current is None or ref is None or ref != current_ref:
+            if current is not None:
+                yield current
+            order_data = {
+                field: row[field] for field in ORDER_FIELDS if row.get(field)
+            }
+            order_data['items'] = []
+            current = (reader.line_num, order_data)
+            current_ref = ref
+        
+        item = {field: row[field] for field in ITEM_FIELDS if row.get(field)}
+        if item:
+            current[1]['items'].append(item)
+    
+    if current is not None:
+        yield current
+
+
+def iter_jsonl_orders(lines):
+    """
+    Read orders from JSON-lines text, one order object per line.
+    
+    Each object has the same shape as the order create endpoint payload.
+    Lines that are not valid JSON objects are yielded as errors.
+    
+    Yields:
+        (line number, order data or ImportRowError) tuples
+    """
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield line_number, ImportRowError({'non_field_errors': [f'JSON inválido: {exc}']})
+            continue
+        if not isinstance(data, dict):
+            yield line_number, ImportRowError({'non_field_errors': ['Se esperaba un objeto JSON.']})
+            continue
+        yield line_number, data
+
+
+def _load_products(batch):
+    """Load every product referenced in a batch with one cached lookup."""
+    product_ids = set()
+    for _, data in batch:
+        if not isinstance(data, ImportRowError):
+            product_ids |= item_product_ids(data.get('items'))
+    return get_products(product_ids)
+
+
+def _check_stock(valid):
+    """
+    Reject the validated orders that do not fit in the free stock.
+    
+    Orders are checked in file order against the stored reservations plus
+    the orders accepted before them. The batch's products stay locked
+    until it commits, as validate_stock() does for a single order. Two
+    queries per batch.
+    
+    Args:
+        valid: List of (line number, validated data)
+    
+    Returns:
+        (accepted validated data, per-row errors)
+    """
+    products = {
+        item['product'].id: item['product']
+        for _, validated in valid for item in validated['items']
+    }
+    if not products:
+        return [], []
+    stock = dict(
+        Product.objects.select_for_update().filter(id__in=products).order_by('id').values_list('id', 'stock')
+    )
+    usage = get_daily_reservations(
+        min(validated['delivery_date'] for _, validated in valid),
+        max(validated['return_date'] for _, validated in valid),
+        list(products),
+    )
+    
+    accepted = []
+    errors = []
+    for line_number, validated in valid:
+        requested = defaultdict(int)
+        for item in validated['items']:
+            requested[item['product'].id] += item['quantity']
+        days = [
+            validated['delivery_date'] + timedelta(days=offset)
+            for offset in range((validated['return_date'] - validated['delivery_date']).days + 1)
+        ]
+        
+        messages = []
+        for product_id, quantity in requested.items():
+            available = stock[product_id] - max(usage[product_id][day] for day in days)
+            if quantity > available:
+                messages.append(stock_error(products[product_id], available, quantity))
+        if messages:
+            errors.append({'row': line_number, 'errors': {'items': messages}})
+            continue
+        
+        for product_id, quantity in requested.items():
+            for day in days:
+                usage[product_id][day] += quantity
+        accepted.append(validated)
+    return accepted, errors
+
+
+@transaction.atomic
+def _import_batch(batch):
+    """Validate and insert one batch. Returns (created count, errors)."""
+    # One serializer validates every row, like the child of a ListSerializer,
+    # so its fields are built once per batch
+    validator = OrderCreateSerializer(context={'products': _load_products(batch)})
+    errors = []
+    valid = []
+    
+    for line_number, data in batch:
+        if isinstance(data, ImportRowError):
+            errors.append({'row': line_number, 'errors': data.errors})
+            continue
+        try:
+            valid.append((line_number, validator.run_validation(data)))
+        except serializers.ValidationError as exc:
+            errors.append({'row': line_number, 'errors': as_serializer_error(exc)})
+    
+    valid, stock_errors = _check_stock(valid)
+    errors = sorted(errors + stock_errors, key=lambda error: error['row'])
+    
+    orders = [
+        Order(**{field: value for field, value in validated.items() if field != 'items'})
+        for validated in valid
+    ]
+    # bulk_create skips save(), which fills the search fields and customer
+    for order in orders:
+        order.update_search_fields()
+    Customer.objects.resolve(orders)
+    orders = Order.objects.bulk_create(orders)
+    
+    order_items = [
+        [build_order_item(order, item_data) for item_data in validated['items']]
+        for order, validated in zip(orders, valid)
+    ]
+    OrderItem.objects.bulk_create([item for items in order_items for item in items])
+    
+    apply_rollup_changes([
+        (None, order_snapshot(order, items))
+        for order, items in zip(orders, order_items)
+    ])
+    
+    return len(orders), errors
+
+
+def import_orders(rows, batch_size=1000):
+    """
+    Import orders from (line number, data) tuples.
+    
+    Each batch is committed on its own, so valid rows of earlier batches
+    are kept even if later rows fail validation.
+    
+    Args:
+        rows: Iterable from iter_csv_orders() or iter_jsonl_orders()
+        batch_size: Orders validated and inserted per transaction
+    
+    Returns:
+        dict with the number of created orders and the per-row errors
+    """
+    rows = iter(rows)
+    created = 0
+    errors = []
+    
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        batch_created, batch_errors = _import_batch(batch)
+        created += batch_created
+        errors.extend(batch_errors)
+    
+    return {
+        'created': created,
+        'errors_count': len(errors),
+        'errors': errors,
+    }
+
+
+def iter_orders(lines, file_format):
+    """Return the row iterator for 'csv' or 'jsonl' input."""
+    if file_format == 'csv':
+        return iter_csv_orders(lines)
+    if file_format == 'jsonl':
+        return iter_jsonl_orders(lines)
+    raise ValueError(f'Formato no soportado: {file_format}')
@@ -0,0 +1,102 @@
+"""
+Logistics day sheet: what goes out and what comes back on a given day.
+
+Loads every non-cancelled order delivering or returning that day with
+its items and products in three queries, and adds up the quantities per
+product and per category to plan the truck loading.
+"""
+from collections import defaultdict
+
+from django.db.models import Q
+
+from apps.products.models import Product
+from .models import Order
+
+
+CATEGORY_LABELS = dict(Product.CATEGORY_CHOICES)
+
+
+def _order_entry(order):
+    return {
+        'id': order.id,
+        'customer_name': order.customer_name,
+        'customer_phone': order.customer_phone,
+        'customer_address': order.customer_address,
+        'event_date': order.event_date.isoformat(),
+        'delivery_date': order.delivery_date.isoformat(),
+        'return_date': order.return_date.isoformat(),
+        'status': order.status,
+        'observations': order.observations,
+        'items': [
+            {
+                'product_id': item.product_id,
+                'product_name': item.product.name,
+                'category': item.product.category,
+                'quantity': item.quantity,
+            }
+            for item in order.items.all()
+        ],
+        'items_count': order.items_count,
+        'total': order.total,
+    }
+
+
+def _section(orders):
+    """Orders of one direction (deliveries or returns) with their totals."""
+    products = {}
+    categories = defaultdict(int)
+    
+    for order in orders:
+        for item in order.items.all():
+            product = item.product
+            entry = products.setdefault(product.id, {
+                'product_id': product.id,
+                'name': product.name,
+                'category': product.category,
+                'category_display': CATEGORY_LABELS.get(product.category, product.category),
+                'quantity': 0,
+            })
+            entry['quantity'] += item.quantity
+            categories[product.category] += item.quantity
+    
+    return {
+        'orders_count': len(orders),
+        'items_count': sum(categories.values()),
+        'products': sorted(
+            products.values(),
+            key=lambda entry: (entry['category_display'], entry['name'])
+        ),
+        'categories': [
+            {
+                'category': category,
+                'category_display': CATEGORY_LABELS.get(category, category),
+                'quantity': quantity,
+            }
+            for category, quantity in sorted(categories.items())
+        ],
+        'orders': [_order_entry(order) for order in orders],
+    }
+
+
+def get_logistics_sheet(day):
+    """
+    Build the logistics sheet of a day.
+    
+    Args:
+        day: date
+    
+    Returns:
+        dict with the deliveries and returns of the day, each with its
+        orders and the quantities to load per product and per category
+    """
+    orders = list(
+        Order.objects.with_totals().with_items().filter(
+            Q(delivery_date=day) | Q(return_date=day)
+        ).exclude(status='cancelado').order_by('id')
+    )
+    
+    return {
+        'date': day.isoformat(),
+        'deliveries': _section([order for order in orders if order.delivery_date == day]),
+        'returns': _section([order for order in orders if order.return_date == day]),
+    }
@@ -0,0 +1,53 @@
+"""
+Import orders from a CSV or JSON-lines file.
+
+Usage:
+    python manage.py import_orders pedidos.csv
+    python manage.py import_orders pedidos.jsonl --batch-size 2000
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.orders.importers import import_orders, iter_orders
+
+
+class Command(BaseCommand):
+    help = 'Importa pedidos desde un archivo CSV o JSON-lines.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo a importar')
+        parser.add_argument(
+            '--format',
+            dest='file_format',
+            choices=['csv', 'jsonl'],
+            help='Formato del archivo (por defecto según la extensión)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Pedidos por transacción'
+        )
+    
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['file_format']
+        if not file_format:
+            file_format = 'csv' if path.lower().endswith('.csv') else 'jsonl'
+        
+        try:
+            lines = open(path, encoding='utf-8-sig', newline='')
+        except OSError as exc:
+            raise CommandError(f'No se pudo abrir {path}: {exc}')
+        
+        with lines:
+            result = import_orders(
+                iter_orders(lines, file_format),
+                batch_size=options['batch_size']
+            )
+        
+        for error in result['errors']:
+            self.stderr.write(f"Fila {error['row']}: {error['errors']}")
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['created']} pedidos importados, {result['errors_count']} con errores."
+        ))
@@ -0,0 +1,43 @@
+"""
+Recompute the search text of orders and products and rebuild its index.
+
+Needed after changing the data outside the models' save() (raw SQL,
+queryset.update()) and, on SQLite, after a migration that rebuilds the
+orders or products table, since that drops the FTS sync triggers.
+
+Usage:
+    python manage.py rebuild_search_index
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.orders.models import Order
+from apps.products.models import Product
+from config.search import create_search_index, drop_search_index
+
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el texto de búsqueda de pedidos y productos y reconstruye su índice.'
+    
+    def handle(self, *args, **options):
+        for model in (Order, Product):
+            table = model._meta.db_table
+            # The schema editor runs everything in one transaction
+            with connection.schema_editor() as schema_editor:
+                rows = list(model.objects.all())
+                fields = ['search_text']
+                if model is Order:
+                    fields.append('customer_phone_digits')
+                for row in rows:
+                    row.update_search_fields()
+                model.objects.bulk_update(rows, fields, batch_size=BATCH_SIZE)
+                
+                drop_search_index(schema_editor, table)
+                create_search_index(schema_editor, table)
+            
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {len(rows)} registros indexados.')
+        
+        self.stdout.write(self.style.SUCCESS('Índice de búsqueda reconstruido.'))
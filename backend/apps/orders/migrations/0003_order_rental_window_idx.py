@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_alter_orderitem_unit_price'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['return_date', 'delivery_date'], name='order_rental_window_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:19
+
+from django.db import migrations, models
+
+from config.search import normalize_text, digits_only, create_search_index, drop_search_index
+
+
+def fill_search_fields(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    orders = list(Order.objects.only('id', 'customer_name', 'customer_phone'))
+    for order in orders:
+        order.customer_phone_digits = digits_only(order.customer_phone)
+        order.search_text = ' '.join(filter(None, [
+            normalize_text(order.customer_name),
+            order.customer_phone_digits,
+        ]))
+    Order.objects.bulk_update(orders, ['customer_phone_digits', 'search_text'], batch_size=500)
+
+
+def create_index(apps, schema_editor):
+    create_search_index(schema_editor, 'orders_order')
+
+
+def drop_index(apps, schema_editor):
+    drop_search_index(schema_editor, 'orders_order')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='customer_phone_digits',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=50, verbose_name='Teléfono (solo dígitos)'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(fill_search_fields, migrations.RunPython.noop),
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-17 12:40
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_categories(apps, schema_editor):
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    Product = apps.get_model('products', 'Product')
+    OrderItem.objects.update(category=Subquery(
+        Product.objects.filter(pk=OuterRef('product_id')).values('category')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ('products', '0001_initial'),
+        ('orders', '0007_order_return_date_idx'),
+    ]
+    
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='category',
+            field=models.CharField(blank=True, editable=False, max_length=50, verbose_name='Categoría'),
+        ),
+        migrations.RunPython(fill_categories, migrations.RunPython.noop),
+    ]
@@ -2,10 +2,80 @@
 Order models for managing rental orders.
 """
 from django.db import models
-from django.db.models import Sum, F
+from django.db.models import Sum, F, Value, DecimalField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from decimal import Decimal
 
+from apps.customers.models import Customer
 from apps.products.models import Product
+from config.search import normalize_text, digits_only, search_queryset
+
+
+# Order fields copied to its Customer
+CUSTOMER_FIELDS = ('customer_name', 'customer_phone', 'customer_address')
+
+
+class OrderQuerySet(models.QuerySet):
+    """
+    QuerySet with helpers to load orders together with their totals.
+    """
+    
+    def with_totals(self):
+        """
+        Annotate total and items count in the same SQL query.
+        
+        Order.total and Order.items_count read these annotations
+        instead of running one aggregate query per order. They are
+        correlated subqueries over the order's items rather than a join
+        with GROUP BY, so ORDER BY ... LIMIT can still walk an index of
+        orders (see OrderViewSet.ordering) and sum only the rows of the
+        page.
+        """
+        if 'annotated_total' in self.query.annotations:
+            return self
+        items = OrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order')
+        return self.annotate(
+            annotated_total=Coalesce(
+                Subquery(items.annotate(total=Sum(F('quantity') * F('unit_price'))).values('total')),
+                Value(Decimal('0.00')),
+                output_field=DecimalField(max_digits=12, decimal_places=2)
+            ),
+            annotated_items_count=Coalesce(
+                Subquery(items.annotate(count=Sum('quantity')).values('count')),
+                0
+            ),
+        )
+    
+    def with_items(self):
+        """Prefetch items and their products (detail views, PDF)."""
+        return self.prefetch_related('items__product')
+    
+    def filtered(self, status=None, start_date=None, end_date=None, search=None, phone=None,
+                 customer=None):
+        """
+        Apply the list filters of the orders API.
+        
+        Args:
+            status: Optional status
+            start_date, end_date: Optional event date range (inclusive)
+            search: Optional terms matched against customer name and phone
+            phone: Optional phone number, matched on its digits only
+            customer: Optional customer id
+        """
+        queryset = self
+        if status:
+            queryset = queryset.filter(status=status)
+        if start_date:
+            queryset = queryset.filter(event_date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(event_date__lte=end_date)
+        if customer and str(customer).isdigit():
+            queryset = queryset.filter(customer_id=customer)
+        if phone and digits_only(phone):
+            queryset = queryset.filter(customer_phone_digits=digits_only(phone))
+        if search:
+            queryset = search_queryset(queryset, search)
+        return queryset
 
 
 class Order(models.Model):
@@ -50,23 +120,134 @@ class Order(models.Model):
         blank=True,
         verbose_name='Observaciones'
     )
+    # Linked on save from the customer fields (see Customer.objects.resolve)
+    customer = models.ForeignKey(
+        Customer,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=False,
+        related_name='orders',
+        verbose_name='Cliente'
+    )
+    # Derived from the customer fields on save (see update_search_fields)
+    customer_phone_digits = models.CharField(
+        max_length=50,
+        blank=True,
+        db_index=True,
+        editable=False,
+        verbose_name='Teléfono (solo dígitos)'
+    )
+    search_text = models.TextField(
+        blank=True,
+        default='',
+        editable=False
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = OrderQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'Pedido'
         verbose_name_plural = 'Pedidos'
         ordering = ['-created_at']
+        indexes = [
+            # Returns of a day (logistics sheet) and rental windows ending
+            # after a date (stock availability)
+            models.Index(
+                fields=['return_date'],
+                name='order_return_date_idx'
+            ),
+            # Reports and list filters: status plus an event date range
+            models.Index(
+                fields=['status', 'event_date'],
+                name='order_status_event_idx'
+            ),
+            # Default list ordering (-created_at, -id) for keyset pages
+            models.Index(
+                fields=['created_at', 'id'],
+                name='order_created_idx'
+            ),
+            # Lists filtered by status (pending, delivered) in keyset order
+            models.Index(
+                fields=['status', 'created_at', 'id'],
+                name='order_status_created_idx'
+            ),
+            # Orders of a customer, latest event first (also its stats)
+            models.Index(
+                fields=['customer', 'event_date'],
+                name='order_customer_event_idx'
+            ),
+            # Deliveries of a day (logistics sheet, PDF batches) and rental
+            # windows starting before a date (stock availability)
+            models.Index(
+                fields=['delivery_date'],
+                name='order_delivery_date_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"Pedido #{self.id} - {self.customer_name}"
     
+    # Customer fields as loaded from the database (None for new orders)
+    _loaded_customer = None
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_customer = instance._customer_values()
+        return instance
+    
+    def _customer_values(self):
+        # __dict__ so deferred fields are not loaded
+        return tuple(self.__dict__.get(field) for field in CUSTOMER_FIELDS)
+    
+    def update_search_fields(self):
+        """Recompute the normalized phone and search text from the customer fields."""
+        self.customer_phone_digits = digits_only(self.customer_phone)
+        self.search_text = ' '.join(filter(None, [
+            normalize_text(self.customer_name),
+            self.customer_phone_digits,
+        ]))
+    
+    def save(self, *args, **kwargs):
+        self.update_search_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            # Skip the customer lookup if the loaded details did not change
+            if not self.customer_id or self._loaded_customer != self._customer_values():
+                Customer.objects.resolve([self])
+        elif set(CUSTOMER_FIELDS) & set(update_fields):
+            Customer.objects.resolve([self])
+            kwargs['update_fields'] = {
+                *update_fields, 'customer', 'customer_phone_digits', 'search_text'
+            }
+        super().save(*args, **kwargs)
+        self._loaded_customer = self._customer_values()
+    
+    def _prefetched_items(self):
+        """Return prefetched items, or None if they were not loaded."""
+        cache = getattr(self, '_prefetched_objects_cache', {})
+        if 'items' in cache:
+            return cache['items']
+        return None
+    
     @property
     def total(self):
         """
         Calculate total dynamically from order items.
         This ensures reports are always accurate.
+        
+        Uses the with_totals() annotation or prefetched items when
+        available, and only falls back to an aggregate query otherwise.
         """
+        if hasattr(self, 'annotated_total'):
+            return self.annotated_total
+        items = self._prefetched_items()
+        if items is not None:
+            return sum((item.subtotal for item in items), Decimal('0.00'))
         result = self.items.aggregate(
             total=Sum(F('quantity') * F('unit_price'))
         )['total']
@@ -75,7 +256,18 @@ class Order(models.Model):
     @property
     def items_count(self):
         """Total number of items in the order."""
+        if hasattr(self, 'annotated_items_count'):
+            return self.annotated_items_count
+        items = self._prefetched_items()
+        if items is not None:
+            return sum(item.quantity for item in items)
         return self.items.aggregate(total=Sum('quantity'))['total'] or 0
+    
+    def invalidate_totals(self):
+        """Drop annotated totals and prefetched items after items change."""
+        self.__dict__.pop('annotated_total', None)
+        self.__dict__.pop('annotated_items_count', None)
+        getattr(self, '_prefetched_objects_cache', {}).pop('items', None)
 
 
 class OrderItem(models.Model):
@@ -104,6 +296,14 @@ class OrderItem(models.Model):
         blank=True,
         verbose_name='Precio unitario'
     )
+    # Category of the product when the item was written: the revenue rollups
+    # bucket by it, so changing a product's category does not move old sales
+    category = models.CharField(
+        max_length=50,
+        blank=True,
+        editable=False,
+        verbose_name='Categoría'
+    )
     
     class Meta:
         verbose_name = 'Item del pedido'
@@ -120,7 +320,9 @@ class OrderItem(models.Model):
         return self.quantity * self.unit_price
     
     def save(self, *args, **kwargs):
-        """Set unit price from product if not provided."""
+        """Set unit price and category from product if not provided."""
         if self.unit_price is None and self.product_id:
             self.unit_price = self.product.price_per_unit
+        if not self.category and self.product_id:
+            self.category = self.product.category
         super().save(*args, **kwargs)
@@ -0,0 +1,259 @@
+"""
+Reusable ReportLab assets for the order PDFs.
+
+Fonts, paragraph styles, table styles and the scaled logo are built once
+per process, on first use, so rendering a PDF only pays for the layout.
+"""
+import os
+import threading
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import Flowable, TableStyle
+from reportlab.lib.fonts import addMapping
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+FONTS_DIR = os.path.join(BASE_DIR, 'assets', 'fonts')
+LOGO_PATH = os.path.join(BASE_DIR, 'assets', 'images', 'Logo_Servicio.png')
+
+# Logo box in the header and the resolution it is resampled to
+LOGO_SIZE = 3.5 * cm
+LOGO_DPI = 300
+
+FONT_FILES = {
+    'Montserrat': 'Montserrat-Regular.ttf',
+    'Montserrat-SemiBold': 'Montserrat-SemiBold.ttf',
+    'Montserrat-Bold': 'Montserrat-Bold.ttf',
+}
+
+
+class Logo(Flowable):
+    """Draws a preloaded ImageReader, so the image is decoded only once."""
+    
+    def __init__(self, reader, width, height):
+        super().__init__()
+        self.reader = reader
+        self.width = width
+        self.height = height
+    
+    def wrap(self, available_width, available_height):
+        return self.width, self.height
+    
+    def draw(self):
+        self.canv.drawImage(self.reader, 0, 0, self.width, self.height, mask='auto')
+
+
+class PDFAssets:
+    """Fonts, styles and images shared by every PDF render."""
+    
+    def __init__(self):
+        self.fonts = self._register_fonts()
+        self.styles = self._build_styles()
+        self.items_table_style = self._build_items_table_style()
+        self.list_table_style = self._build_list_table_style()
+        self.header_table_style = TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('ALIGN', (0, 0), (0, 0), 'LEFT'),
+            ('ALIGN', (1, 0), (1, 0), 'CENTER'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 0),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ])
+        self.rule_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
+        ])
+        self.logo_reader, self.logo_width, self.logo_height = self._load_logo()
+    
+    def _register_fonts(self):
+        """
+        Register the Montserrat TTFs; fall back to Helvetica if missing.
+        
+        Returns:
+            dict with the regular, semibold and bold font names
+        """
+        try:
+            for name, filename in FONT_FILES.items():
+                if name not in pdfmetrics.getRegisteredFontNames():
+                    pdfmetrics.registerFont(TTFont(name, os.path.join(FONTS_DIR, filename)))
+        except Exception:
+            return {
+                'regular': 'Helvetica',
+                'semibold': 'Helvetica-Bold',
+                'bold': 'Helvetica-Bold',
+            }
+        
+        # So <b> inside paragraphs uses the bold face
+        addMapping('Montserrat', 0, 0, 'Montserrat')
+        addMapping('Montserrat', 1, 0, 'Montserrat-Bold')
+        addMapping('Montserrat', 0, 1, 'Montserrat')
+        addMapping('Montserrat', 1, 1, 'Montserrat-Bold')
+        return {
+            'regular': 'Montserrat',
+            'semibold': 'Montserrat-SemiBold',
+            'bold': 'Montserrat-Bold',
+        }
+    
+    def _build_styles(self):
+        fonts = self.fonts
+        styles = getSampleStyleSheet()
+        styles['Normal'].fontName = fonts['regular']
+        styles['Heading1'].fontName = fonts['bold']
+        styles['Heading2'].fontName = fonts['bold']
+        
+        styles.add(ParagraphStyle(
+            name='BusinessName',
+            parent=styles['Heading1'],
+            fontSize=20,
+            alignment=TA_CENTER,
+            spaceAfter=10
+        ))
+        styles.add(ParagraphStyle(
+            name='BusinessInfo',
+            parent=styles['Normal'],
+            fontSize=10,
+            alignment=TA_CENTER,
+            textColor=colors.gray
+        ))
+        styles.add(ParagraphStyle(
+            name='SectionTitle',
+            parent=styles['Heading2'],
+            fontSize=12,
+            spaceAfter=10,
+            spaceBefore=20
+        ))
+        styles.add(ParagraphStyle(
+            name='CustomerInfo',
+            parent=styles['Normal'],
+            fontSize=11,
+            spaceAfter=5
+        ))
+        styles.add(ParagraphStyle(
+            name='HeaderBusinessName',
+            parent=styles['Heading1'],
+            fontSize=18,
+            alignment=TA_CENTER,
+            spaceAfter=5
+        ))
+        styles.add(ParagraphStyle(
+            name='HeaderBusinessInfo',
+            parent=styles['Normal'],
+            fontSize=9,
+            alignment=TA_CENTER,
+            textColor=colors.gray
+        ))
+        styles.add(ParagraphStyle(
+            name='Total',
+            parent=styles['Normal'],
+            fontSize=14,
+            alignment=TA_RIGHT,
+            fontName=fonts['bold'],
+            spaceBefore=20
+        ))
+        styles.add(ParagraphStyle(
+            name='TableCell',
+            parent=styles['Normal'],
+            fontSize=9,
+            leading=11
+        ))
+        return styles
+    
+    def _build_items_table_style(self):
+        fonts = self.fonts
+        return TableStyle([
+            # Header style
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), fonts['semibold']),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+            ('TOPPADDING', (0, 0), (-1, 0), 10),
+            
+            # Body style
+            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+            ('FONTNAME', (0, 1), (-1, -1), fonts['regular']),
+            ('FONTSIZE', (0, 1), (-1, -1), 9),
+            ('ALIGN', (2, 1), (-1, -1), 'CENTER'),
+            ('ALIGN', (3, 1), (-1, -1), 'RIGHT'),
+            ('ALIGN', (4, 1), (-1, -1), 'RIGHT'),
+            ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
+            ('TOPPADDING', (0, 1), (-1, -1), 8),
+            
+            # Borders
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.gray),
+            
+            # Alternating row colors
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
+        ])
+    
+    def _build_list_table_style(self):
+        """Header row and zebra body for tables of any number of columns."""
+        fonts = self.fonts
+        return TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), fonts['semibold']),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('FONTNAME', (0, 1), (-1, -1), fonts['regular']),
+            ('FONTSIZE', (0, 1), (-1, -1), 9),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.gray),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
+        ])
+    
+    def _load_logo(self):
+        """
+        Decode the logo and resample it to the size it is printed at.
+        
+        Returns:
+            (ImageReader, width, height), or (None, 0, 0) if unavailable
+        """
+        try:
+            from PIL import Image as PILImage
+            
+            image = PILImage.open(LOGO_PATH)
+            image.load()
+        except Exception:
+            return None, 0, 0
+        
+        # Fit in a LOGO_SIZE square, keeping the aspect ratio
+        scale = min(LOGO_SIZE / image.width, LOGO_SIZE / image.height)
+        width, height = image.width * scale, image.height * scale
+        
+        pixels = (
+            max(1, round(width / cm / 2.54 * LOGO_DPI)),
+            max(1, round(height / cm / 2.54 * LOGO_DPI)),
+        )
+        if pixels[0] < image.width:
+            image = image.resize(pixels, PILImage.LANCZOS)
+        
+        return ImageReader(image), width, height
+    
+    def logo(self):
+        """Return a logo flowable, or None if the logo is unavailable."""
+        if self.logo_reader is None:
+            return None
+        return Logo(self.logo_reader, self.logo_width, self.logo_height)
+
+
+_assets = None
+_assets_lock = threading.Lock()
+
+
+def get_pdf_assets():
+    """Return the shared PDFAssets, building them on first use."""
+    global _assets
+    if _assets is None:
+        with _assets_lock:
+            if _assets is None:
+                _assets = PDFAssets()
+    return _assets
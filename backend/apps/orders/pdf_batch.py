@@ -0,0 +1,190 @@
+"""
+Batch PDF generation: many orders in one document or in a ZIP.
+
+Orders are loaded with a constant number of queries (orders, items and
+products). The combined document is laid out in one pass; for the ZIP,
+each order PDF comes from the PDF cache or, on a miss, is rendered in a
+process pool when there are enough orders to make it worthwhile. The
+pool is started on the first such batch and reused by the next ones, so
+its workers (and their fonts and logo) are only set up once per process.
+"""
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Order
+from .services import generate_order_pdf
+from .pdf_cache import PDF_CACHE_LOOKUPS, get_pdf_store, order_pdf_key
+
+
+# Largest batch accepted by the endpoint
+MAX_BATCH_ORDERS = 500
+
+# Below this many renders, a process pool costs more than it saves
+PARALLEL_MIN_ORDERS = 8
+
+
+def batch_orders(order_ids=None, delivery_date=None):
+    """
+    Load the orders of a batch with their totals, items and products.
+    
+    Args:
+        order_ids: Optional list of order ids
+        delivery_date: Optional date; selects the non-cancelled orders
+            delivered that day
+    
+    Returns:
+        List of orders sorted by delivery date and id
+    """
+    queryset = Order.objects.with_totals().with_items()
+    if order_ids is not None:
+        queryset = queryset.filter(id__in=order_ids)
+    if delivery_date is not None:
+        queryset = queryset.filter(delivery_date=delivery_date).exclude(status='cancelado')
+    return list(queryset.order_by('delivery_date', 'id'))
+
+
+def _init_worker():
+    # Workers only render already loaded orders and never touch the
+    # database, but unpickling models needs the app registry
+    django.setup()
+
+
+def _render_order(order):
+    return generate_order_pdf(order).getvalue()
+
+
+def _worker_count():
+    return getattr(settings, 'PDF_BATCH_WORKERS', 0) or os.cpu_count() or 1
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """The process pool shared by every batch of this process (created on first use)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=_worker_count(), initializer=_init_worker)
+        return _pool
+
+
+def shutdown_pool(pool=None):
+    """
+    Stop the shared pool; the next parallel batch starts a new one.
+    
+    Args:
+        pool: Only stop the shared pool if it is still this one
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or pool not in (None, _pool):
+            return
+        pool, _pool = _pool, None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _forget_pool():
+    # A forked process (job worker) cannot use its parent's pool
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_pool)
+
+
+@receiver(setting_changed)
+def reset_pdf_pool(setting, **kwargs):
+    if setting == 'PDF_BATCH_WORKERS':
+        shutdown_pool()
+
+
+def _render_orders(orders):
+    """Yield the rendered PDF bytes of each order, in order."""
+    workers = _worker_count()
+    if len(orders) < PARALLEL_MIN_ORDERS or workers < 2:
+        for order in orders:
+            yield _render_order(order)
+        return
+    
+    pool = _get_pool()
+    chunksize = max(1, len(orders) // (workers * 4))
+    try:
+        yield from pool.map(_render_order, orders, chunksize=chunksize)
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory): replace the pool
+        shutdown_pool(pool)
+        raise
+
+
+def iter_order_pdfs(orders):
+    """
+    Yield (order, PDF bytes) for each order, using the PDF cache.
+    
+    Cache misses are rendered (in parallel when there are many) and
+    stored, so the single order endpoint reuses them.
+    """
+    store = get_pdf_store()
+    keys = [order_pdf_key(order) for order in orders]
+    cached = [store.get(key) for key in keys]
+    
+    missing = [order for order, data in zip(orders, cached) if data is None]
+    PDF_CACHE_LOOKUPS.labels('hit').inc(len(orders) - len(missing))
+    PDF_CACHE_LOOKUPS.labels('miss').inc(len(missing))
+    rendered = _render_orders(missing)
+    
+    for order, key, data in zip(orders, keys, cached):
+        if data is None:
+            data = next(rendered)
+            store.set(key, data)
+        yield order, data
+
+
+class _ZipStream:
+    """Write-only file that hands out what was written since the last pop."""
+    
+    def __init__(self):
+        self.chunks = []
+    
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_batch_zip(orders):
+    """
+    Yield a ZIP archive with one PDF per order, chunk by chunk.
+    
+    The archive is written to a non-seekable stream, so each file is sent
+    as soon as its PDF is ready.
+    """
+    stream = _ZipStream()
+    date_time = timezone.localtime().timetuple()[:6]
+    
+    # PDFs are already compressed: store them as they are
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_STORED) as archive:
+        for order, data in iter_order_pdfs(orders):
+            info = zipfile.ZipInfo(f'pedido_{order.id}.pdf', date_time=date_time)
+            archive.writestr(info, data)
+            yield stream.pop()
+    
+    yield stream.pop()
@@ -0,0 +1,258 @@
+"""
+Cache of rendered order PDFs.
+
+Entries are keyed by a hash of everything the PDF shows (order fields,
+items and business settings), so an edited order simply gets a new key
+and stale entries age out through the store's LRU eviction. The key is
+also used as the ETag of the PDF endpoint.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from config.metrics import Counter
+from .services import generate_order_pdf
+from .pdf_assets import LOGO_PATH
+
+
+PDF_CACHE_LOOKUPS = Counter(
+    'pdf_cache_lookups_total',
+    'Búsquedas en la cache de PDFs',
+    ['result'],
+)
+
+# Bump when the PDF layout changes so cached files are not reused
+PDF_LAYOUT_VERSION = 2
+
+
+def order_pdf_key(order):
+    """
+    Hash of the content shown in the order PDF.
+    
+    Uses the prefetched items, so it costs no queries on orders loaded
+    with with_items().
+    """
+    try:
+        logo_stat = os.stat(LOGO_PATH)
+        logo = [logo_stat.st_mtime_ns, logo_stat.st_size]
+    except OSError:
+        logo = None
+    
+    content = {
+        'layout': PDF_LAYOUT_VERSION,
+        'business': [
+            getattr(settings, 'BUSINESS_NAME', ''),
+            getattr(settings, 'BUSINESS_ADDRESS', ''),
+            getattr(settings, 'BUSINESS_PHONE', ''),
+            logo,
+        ],
+        'order': [
+            order.id,
+            order.created_at.isoformat(),
+            order.customer_name,
+            order.customer_phone,
+            order.customer_address,
+            order.event_date.isoformat(),
+            order.delivery_date.isoformat(),
+            order.return_date.isoformat(),
+            order.observations,
+        ],
+        'items': [
+            [item.product.name, item.product.category, item.quantity, str(item.unit_price)]
+            for item in order.items.all()
+        ],
+    }
+    encoded = json.dumps(content, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class PDFStore:
+    """Interface of a rendered PDF store."""
+    
+    def get(self, key):
+        """Return the cached bytes for key, or None."""
+        raise NotImplementedError
+    
+    def set(self, key, data):
+        """Store bytes under key, evicting old entries if needed."""
+        raise NotImplementedError
+
+
+class MemoryPDFStore(PDFStore):
+    """Per-process LRU store bounded by total size."""
+    
+    def __init__(self, max_size=50 * 1024 * 1024, **kwargs):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+    
+    def get(self, key):
+        with self.lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+            return data
+    
+    def set(self, key, data):
+        with self.lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key))
+            self.entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_size and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+class FileSystemPDFStore(PDFStore):
+    """
+    Store PDFs as files in a directory, shared by every worker.
+    
+    Reads refresh the file mtime. Each process keeps a running total of
+    the directory size from its own writes, recounted every RECOUNT_EVERY
+    writes to include the other workers' files. Once it exceeds max_size
+    the least recently used files are removed down to EVICT_TO of it, so
+    the directory is not scanned on every write.
+    """
+    # Writes between two recounts of the directory size
+    RECOUNT_EVERY = 100
+    # Eviction frees space down to this fraction of max_size
+    EVICT_TO = 0.9
+    
+    def __init__(self, location, max_size=200 * 1024 * 1024, **kwargs):
+        self.location = location
+        self.max_size = max_size
+        self.size = None
+        self.writes = 0
+        self.lock = threading.Lock()
+        os.makedirs(location, exist_ok=True)
+    
+    def path(self, key):
+        return os.path.join(self.location, f'{key}.pdf')
+    
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+    
+    def set(self, key, data):
+        path = self.path(key)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        
+        # Write to a temporary file and rename, so readers never see a
+        # partially written PDF
+        fd, tmp_path = tempfile.mkstemp(dir=self.location, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        
+        with self.lock:
+            self.writes += 1
+            if self.size is not None and self.writes % self.RECOUNT_EVERY:
+                self.size += len(data) - replaced
+                if self.size <= self.max_size:
+                    return
+            self.size = self.evict()
+    
+    def evict(self):
+        """
+        Recount the directory and, if over max_size, remove the least
+        recently used files down to EVICT_TO of it.
+        
+        Returns:
+            Total size of the remaining files
+        """
+        entries = []
+        total = 0
+        with os.scandir(self.location) as it:
+            for entry in it:
+                if not entry.name.endswith('.pdf'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        if total <= self.max_size:
+            return total
+        
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_size * self.EVICT_TO:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        return total
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_pdf_store():
+    """Return the store configured in settings.PDF_CACHE (created once)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                config = dict(settings.PDF_CACHE)
+                backend = import_string(config.pop('BACKEND'))
+                _store = backend(**{key.lower(): value for key, value in config.items()})
+    return _store
+
+
+@receiver(setting_changed)
+def reset_pdf_store(setting, **kwargs):
+    # override_settings(PDF_CACHE=...) takes effect on the next request
+    global _store
+    if setting == 'PDF_CACHE':
+        _store = None
+
+
+def get_order_pdf(order, key=None):
+    """
+    Return the PDF bytes of an order, rendering it only on a cache miss.
+    
+    Args:
+        order: Order instance with items (and products) prefetched
+        key: Optional precomputed order_pdf_key(order)
+    """
+    key = key or order_pdf_key(order)
+    store = get_pdf_store()
+    
+    data = store.get(key)
+    if data is None:
+        PDF_CACHE_LOOKUPS.labels('miss').inc()
+        data = generate_order_pdf(order).getvalue()
+        store.set(key, data)
+    else:
+        PDF_CACHE_LOOKUPS.labels('hit').inc()
+    return data
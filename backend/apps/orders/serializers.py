@@ -1,11 +1,110 @@
 """
 Serializers for Order and OrderItem models.
 """
+from collections import defaultdict
+
 from rest_framework import serializers
 from django.db import transaction
 from .models import Order, OrderItem
 from apps.products.models import Product
+from apps.products.cache import get_products
 from apps.products.serializers import ProductListSerializer
+from apps.products.services import get_reserved_quantities
+from apps.reports.rollups import order_snapshot, update_order_rollups
+
+
+def stock_error(product, available, requested):
+    """Error message for more units than the free stock."""
+    return (
+        f'Stock insuficiente para "{product.name}": '
+        f'disponibles {max(available, 0)}, solicitadas {requested}.'
+    )
+
+
+def validate_stock(items_data, delivery_date, return_date, exclude_order_id=None):
+    """
+    Ensure the requested quantities fit in the free stock of the period.
+    
+    Must run inside a transaction: the affected Product rows are locked
+    (select_for_update, ordered by id so concurrent orders cannot
+    deadlock) until the order is saved, so two orders cannot book the
+    same units. Costs two queries whatever the number of items.
+    """
+    requested = defaultdict(int)
+    for item_data in items_data:
+        requested[item_data['product'].id] += item_data['quantity']
+    
+    product_ids = sorted(requested)
+    products = list(
+        Product.objects.select_for_update().filter(id__in=product_ids).order_by('id')
+    )
+    reserved = get_reserved_quantities(
+        delivery_date,
+        return_date,
+        product_ids=product_ids,
+        exclude_order_id=exclude_order_id,
+    )
+    
+    errors = []
+    for product in products:
+        available = product.stock - reserved.get(product.id, 0)
+        if requested[product.id] > available:
+            errors.append(stock_error(product, available, requested[product.id]))
+    
+    if errors:
+        raise serializers.ValidationError({'items': errors})
+
+
+def build_order_item(order, item_data):
+    """
+    Build an unsaved OrderItem from validated data.
+    
+    The product comes already loaded from validation, so the default
+    price is resolved without querying it again.
+    """
+    product = item_data['product']
+    unit_price = item_data.get('unit_price') or product.price_per_unit
+    return OrderItem(
+        order=order,
+        product=product,
+        quantity=item_data['quantity'],
+        unit_price=unit_price,
+        category=product.category,
+    )
+
+
+def replace_order_items(order, items_data):
+    """
+    Make the order items match items_data, touching only changed lines.
+    
+    Existing lines are matched by product: matching lines are updated in
+    one bulk_update if quantity or price changed, missing ones are
+    bulk-created and leftovers deleted in one query.
+    """
+    existing = defaultdict(list)
+    for item in order.items.all():
+        existing[item.product_id].append(item)
+    
+    to_create = []
+    to_update = []
+    for item_data in items_data:
+        new_item = build_order_item(order, item_data)
+        if existing[new_item.product_id]:
+            item = existing[new_item.product_id].pop(0)
+            if (item.quantity, item.unit_price) != (new_item.quantity, new_item.unit_price):
+                item.quantity = new_item.quantity
+                item.unit_price = new_item.unit_price
+                to_update.append(item)
+        else:
+            to_create.append(new_item)
+    
+    to_delete = [item.id for items in existing.values() for item in items]
+    if to_delete:
+        OrderItem.objects.filter(id__in=to_delete).delete()
+    if to_update:
+        OrderItem.objects.bulk_update(to_update, ['quantity', 'unit_price'])
+    if to_create:
+        OrderItem.objects.bulk_create(to_create)
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -45,8 +144,55 @@ class OrderItemSerializer(serializers.ModelSerializer):
         return value
 
 
+def item_product_ids(items):
+    """Product ids referenced by raw (not yet validated) order items."""
+    product_ids = set()
+    for item in items or []:
+        try:
+            product_ids.add(int(item.get('product')))
+        except (TypeError, ValueError, AttributeError):
+            pass
+    return product_ids
+
+
+class ProductPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """
+    Product PK field that can resolve ids from preloaded products.
+    
+    When the serializer context has a 'products' dict (id -> Product),
+    lookups use it instead of running one query per line (see
+    PreloadProductsMixin).
+    """
+    
+    def to_internal_value(self, data):
+        products = self.context.get('products')
+        if products is None:
+            return super().to_internal_value(data)
+        try:
+            return products[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class PreloadProductsMixin:
+    """
+    Resolve the products of every item with one cached batch lookup.
+    
+    Fills context['products'] before validation unless the caller
+    already did (the importer loads them once per batch).
+    """
+    
+    def to_internal_value(self, data):
+        if 'products' not in self.context and hasattr(data, 'get'):
+            self.context['products'] = get_products(item_product_ids(data.get('items')))
+        return super().to_internal_value(data)
+
+
 class OrderItemCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating/updating order items."""
+    product = ProductPrimaryKeyField(queryset=Product.objects.all())
     
     class Meta:
         model = OrderItem
@@ -78,6 +224,7 @@ class OrderSerializer(serializers.ModelSerializer):
         model = Order
         fields = [
             'id',
+            'customer',
             'customer_name',
             'customer_phone',
             'customer_address',
@@ -96,7 +243,7 @@ class OrderSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
 
 
-class OrderCreateSerializer(serializers.ModelSerializer):
+class OrderCreateSerializer(PreloadProductsMixin, serializers.ModelSerializer):
     """Serializer for creating orders with items."""
     items = OrderItemCreateSerializer(many=True)
     
@@ -143,20 +290,22 @@ class OrderCreateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         """Create order with items in a transaction."""
         items_data = validated_data.pop('items')
+        validate_stock(
+            items_data,
+            validated_data['delivery_date'],
+            validated_data['return_date']
+        )
         order = Order.objects.create(**validated_data)
         
-        for item_data in items_data:
-            # Get product to set default price if not provided
-            product = item_data['product']
-            if 'unit_price' not in item_data or not item_data['unit_price']:
-                item_data['unit_price'] = product.price_per_unit
-            
-            OrderItem.objects.create(order=order, **item_data)
+        OrderItem.objects.bulk_create([
+            build_order_item(order, item_data) for item_data in items_data
+        ])
         
+        update_order_rollups(None, order_snapshot(order))
         return order
 
 
-class OrderUpdateSerializer(serializers.ModelSerializer):
+class OrderUpdateSerializer(PreloadProductsMixin, serializers.ModelSerializer):
     """Serializer for updating orders with items."""
     items = OrderItemCreateSerializer(many=True)
     
@@ -194,6 +343,27 @@ class OrderUpdateSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         """Update order and replace items."""
         items_data = validated_data.pop('items', None)
+        before = order_snapshot(instance)
+        
+        dates_changed = any(
+            field in validated_data and validated_data[field] != getattr(instance, field)
+            for field in ('delivery_date', 'return_date')
+        )
+        status = validated_data.get('status', instance.status)
+        if status != 'cancelado' and (items_data is not None or dates_changed):
+            if items_data is not None:
+                stock_items = items_data
+            else:
+                stock_items = [
+                    {'product': item.product, 'quantity': item.quantity}
+                    for item in instance.items.all()
+                ]
+            validate_stock(
+                stock_items,
+                validated_data.get('delivery_date', instance.delivery_date),
+                validated_data.get('return_date', instance.return_date),
+                exclude_order_id=instance.id
+            )
         
         # Update order fields
         for attr, value in validated_data.items():
@@ -202,13 +372,10 @@ class OrderUpdateSerializer(serializers.ModelSerializer):
         
         # Replace items if provided
         if items_data is not None:
-            instance.items.all().delete()
-            for item_data in items_data:
-                product = item_data['product']
-                if 'unit_price' not in item_data or not item_data['unit_price']:
-                    item_data['unit_price'] = product.price_per_unit
-                OrderItem.objects.create(order=instance, **item_data)
+            replace_order_items(instance, items_data)
+            instance.invalidate_totals()
         
+        update_order_rollups(before, order_snapshot(instance))
         return instance
 
 
@@ -229,6 +396,7 @@ class OrderListSerializer(serializers.ModelSerializer):
         model = Order
         fields = [
             'id',
+            'customer',
             'customer_name',
             'event_date',
             'delivery_date',
@@ -254,3 +422,11 @@ class OrderStatusSerializer(serializers.ModelSerializer):
                 'No se puede cambiar el estado de un pedido cancelado.'
             )
         return value
+    
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        """Update status and move the order between rollup rows."""
+        before = order_snapshot(instance)
+        instance = super().update(instance, validated_data)
+        update_order_rollups(before, order_snapshot(instance))
+        return instance
@@ -2,22 +2,41 @@
 PDF generation service for orders.
 """
 import io
-import os
+from xml.sax.saxutils import escape
 from decimal import Decimal
 from datetime import date
 
 from django.conf import settings
 from django.utils import timezone
 
-from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, PageBreak
 
+from config.metrics import Histogram
+from .pdf_assets import get_pdf_assets
 
 
+PDF_RENDER_SECONDS = Histogram(
+    'pdf_render_seconds',
+    'Tiempo de render de los PDFs',
+    ['document'],
+)
+
+
+def _new_document(buffer):
+    """Create the A4 document template used by the order PDFs."""
+    return SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        rightMargin=2*cm,
+        leftMargin=2*cm,
+        topMargin=2*cm,
+        bottomMargin=2*cm
+    )
+
+
+@PDF_RENDER_SECONDS.time('order')
 def generate_order_pdf(order):
     """
     Generate a PDF document for an order.
@@ -29,77 +48,54 @@ def generate_order_pdf(order):
         BytesIO buffer containing the PDF
     """
     buffer = io.BytesIO()
+    doc = _new_document(buffer)
+    doc.build(build_order_elements(order, doc.width))
+    buffer.seek(0)
     
-    # Create document
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        rightMargin=2*cm,
-        leftMargin=2*cm,
-        topMargin=2*cm,
-        bottomMargin=2*cm
-    )
+    return buffer
+
+
+@PDF_RENDER_SECONDS.time('orders')
+def generate_orders_pdf(orders):
+    """
+    Generate one PDF document with every order, one after the other.
     
-    # Styles
-    styles = getSampleStyleSheet()
+    Args:
+        orders: Order instances with items prefetched
+    
+    Returns:
+        BytesIO buffer containing the PDF
+    """
+    buffer = io.BytesIO()
+    doc = _new_document(buffer)
+    
+    elements = []
+    for order in orders:
+        if elements:
+            elements.append(PageBreak())
+        elements.extend(build_order_elements(order, doc.width))
+    doc.build(elements)
+    buffer.seek(0)
+    
+    return buffer
 
-    styles.add(ParagraphStyle(
-        name='BusinessName',
-        parent=styles['Heading1'],
-        fontSize=20,
-        alignment=TA_CENTER,
-        spaceAfter=10
-    ))
-    styles.add(ParagraphStyle(
-        name='BusinessInfo',
-        parent=styles['Normal'],
-        fontSize=10,
-        alignment=TA_CENTER,
-        textColor=colors.gray
-    ))
-    styles.add(ParagraphStyle(
-        name='SectionTitle',
-        parent=styles['Heading2'],
-        fontSize=12,
-        spaceAfter=10,
-        spaceBefore=20
-    ))
-    styles.add(ParagraphStyle(
-        name='CustomerInfo',
-        parent=styles['Normal'],
-        fontSize=11,
-        spaceAfter=5
-    ))
-    styles.add(ParagraphStyle(
-        name='HeaderBusinessName',
-        parent=styles['Heading1'],
-        fontSize=18,
-        alignment=TA_CENTER,
-        spaceAfter=5
-    ))
-    styles.add(ParagraphStyle(
-        name='HeaderBusinessInfo',
-        parent=styles['Normal'],
-        fontSize=9,
-        alignment=TA_CENTER,
-        textColor=colors.gray
-    ))
-    styles.add(ParagraphStyle(
-        name='Total',
-        parent=styles['Normal'],
-        fontSize=14,
-        alignment=TA_RIGHT,
-        fontName='Helvetica-Bold',
-        spaceBefore=20
-    ))
+
+def build_header_elements(width):
+    """
+    Build the page header shared by the PDFs: logo, business info and a rule.
+    
+    Args:
+        width: Usable page width of the document
+    
+    Returns:
+        List of flowables
+    """
+    assets = get_pdf_assets()
+    styles = assets.styles
     
     # Build content
     elements = []
     
-    # Path to logo
-    BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    LOGO_PATH = os.path.join(BASE_DIR, 'assets', 'images', 'Logo_Servicio.png')
-    
     # Business info
     business_name = getattr(settings, 'BUSINESS_NAME', 'Alquileres "El Grillo"')
     business_address = getattr(settings, 'BUSINESS_ADDRESS', '')
@@ -109,14 +105,7 @@ def generate_order_pdf(order):
     header_data = []
     
     # Logo cell
-    if os.path.exists(LOGO_PATH):
-        try:
-            logo = Image(LOGO_PATH, width=3.5*cm, height=3.5*cm, kind='proportional')
-            logo_cell = logo
-        except Exception:
-            logo_cell = Paragraph("", styles['Normal'])
-    else:
-        logo_cell = Paragraph("", styles['Normal'])
+    logo_cell = assets.logo() or Paragraph("", styles['Normal'])
     
     # Business info cell (multiple paragraphs in a list)
     business_info = []
@@ -130,18 +119,10 @@ def generate_order_pdf(order):
     
     header_table = Table(
     [[logo_cell, business_info]],
-    colWidths=[4*cm, doc.width - 4*cm]
+    colWidths=[4*cm, width - 4*cm]
     )
-
-    header_table.setStyle(TableStyle([
-    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-    ('ALIGN', (0, 0), (0, 0), 'LEFT'),
-    ('ALIGN', (1, 0), (1, 0), 'CENTER'),
-    ('LEFTPADDING', (0, 0), (-1, -1), 0),
-    ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-    ('TOPPADDING', (0, 0), (-1, -1), 8),
-    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-    ]))
+    
+    header_table.setStyle(assets.header_table_style)
 
 #    header_table = Table(header_data, colWidths=[5*cm, 10*cm])
 #    header_table.setStyle(TableStyle([
@@ -155,17 +136,37 @@ def generate_order_pdf(order):
     elements.append(header_table)
     elements.append(Spacer(1, 10))
 #    elements.append(Spacer(1, 0.5*cm))
-
+    
     # Linea horizontal
     elements.append(Table(
         [['']],
-        colWidths=[doc.width],
+        colWidths=[width],
         rowHeights=[1],
-        style=[('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey)]
+        style=assets.rule_table_style
     ))
     elements.append(Spacer(1, 14))
+    
+    return elements
 
 
+def build_order_elements(order, width):
+    """
+    Build the flowables of an order PDF.
+    
+    Args:
+        order: Order instance with items
+        width: Usable page width of the document
+    
+    Returns:
+        List of flowables
+    """
+    # Shared fonts, styles and logo (built once per process)
+    assets = get_pdf_assets()
+    styles = assets.styles
+    
+    # Header with logo and business info
+    elements = build_header_elements(width)
+    
     # Order number and date
     elements.append(Paragraph(
         f"<b>Pedido #</b> {order.id}",
@@ -222,32 +223,7 @@ def generate_order_pdf(order):
     
     # Create table
     table = Table(table_data, colWidths=[5*cm, 3*cm, 2*cm, 2.5*cm, 2.5*cm])
-    table.setStyle(TableStyle([
-        # Header style
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-        ('TOPPADDING', (0, 0), (-1, 0), 10),
-        
-        # Body style
-        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 9),
-        ('ALIGN', (2, 1), (-1, -1), 'CENTER'),
-        ('ALIGN', (3, 1), (-1, -1), 'RIGHT'),
-        ('ALIGN', (4, 1), (-1, -1), 'RIGHT'),
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-        ('TOPPADDING', (0, 1), (-1, -1), 8),
-        
-        # Borders
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.gray),
-        
-        # Alternating row colors
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
-    ]))
+    table.setStyle(assets.items_table_style)
     
     elements.append(table)
     
@@ -263,8 +239,103 @@ def generate_order_pdf(order):
         elements.append(Paragraph("Observaciones", styles['SectionTitle']))
         elements.append(Paragraph(order.observations, styles['Normal']))
     
+    return elements
+
+
+def _quantity_table(rows, header, col_widths):
+    """Table with a header row and the quantity in the last column."""
+    assets = get_pdf_assets()
+    table = Table([header] + rows, colWidths=col_widths, repeatRows=1)
+    table.setStyle(assets.list_table_style)
+    table.setStyle([('ALIGN', (-1, 0), (-1, -1), 'CENTER')])
+    return table
+
+
+def _logistics_section(title, section, width):
+    """Flowables of the deliveries or returns of a logistics sheet."""
+    styles = get_pdf_assets().styles
+    cell = styles['TableCell']
+    
+    elements = [Paragraph(
+        f"<u>{title}:</u> {section['orders_count']} pedidos, {section['items_count']} unidades",
+        styles['SectionTitle']
+    )]
+    if not section['orders']:
+        elements.append(Paragraph("Sin pedidos.", styles['Normal']))
+        return elements
+    
+    # Loading list
+    elements.append(_quantity_table(
+        [
+            [Paragraph(escape(product['name']), cell), product['category_display'], str(product['quantity'])]
+            for product in section['products']
+        ],
+        ['Producto', 'Categoría', 'Cantidad'],
+        [width - 6*cm, 4*cm, 2*cm]
+    ))
+    elements.append(Spacer(1, 0.3*cm))
+    elements.append(_quantity_table(
+        [
+            [category['category_display'], str(category['quantity'])]
+            for category in section['categories']
+        ],
+        ['Categoría', 'Cantidad'],
+        [width - 6*cm, 2*cm]
+    ))
+    elements.append(Spacer(1, 0.3*cm))
+    
+    # Orders with address and products
+    rows = []
+    for order in section['orders']:
+        customer = escape(order['customer_name'])
+        if order['customer_phone']:
+            customer += f"<br/>Tel: {escape(order['customer_phone'])}"
+        products = '<br/>'.join(
+            f"{item['quantity']} x {escape(item['product_name'])}" for item in order['items']
+        )
+        if order['observations']:
+            products += f"<br/><i>{escape(order['observations'])}</i>"
+        rows.append([
+            f"#{order['id']}",
+            Paragraph(customer, cell),
+            Paragraph(escape(order['customer_address']) or '-', cell),
+            Paragraph(products, cell),
+        ])
+    table = Table(
+        [['Pedido', 'Cliente', 'Dirección', 'Productos']] + rows,
+        colWidths=[2*cm, 4*cm, 4.5*cm, width - 10.5*cm],
+        repeatRows=1
+    )
+    table.setStyle(get_pdf_assets().list_table_style)
+    elements.append(table)
+    
+    return elements
+
+
+@PDF_RENDER_SECONDS.time('logistics')
+def generate_logistics_pdf(sheet):
+    """
+    Generate the printable logistics sheet of a day.
+    
+    Args:
+        sheet: dict from apps.orders.logistics.get_logistics_sheet()
+    
+    Returns:
+        BytesIO buffer containing the PDF
+    """
+    buffer = io.BytesIO()
+    doc = _new_document(buffer)
+    styles = get_pdf_assets().styles
+    
+    elements = build_header_elements(doc.width)
+    day = date.fromisoformat(sheet['date'])
+    elements.append(Paragraph(
+        f"<b>Hoja de logística</b> {day.strftime('%d/%m/%Y')}",
+        styles['Heading2']
+    ))
+    elements.extend(_logistics_section('Entregas', sheet['deliveries'], doc.width))
+    elements.extend(_logistics_section('Devoluciones', sheet['returns'], doc.width))
     
-    # Build PDF
     doc.build(elements)
     buffer.seek(0)
     
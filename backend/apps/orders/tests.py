@@ -0,0 +1,590 @@
+"""
+Tests for the orders app.
+"""
+import json
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.customers.models import Customer
+from apps.customers.stats import compute_customer_stats
+from apps.products.models import Product
+from apps.products.services import get_reserved_quantities
+from apps.reports.models import DailyRevenue
+from apps.reports.rollups import check_rollups
+from apps.reports.services import delivered_orders
+from config.pagination import KeysetPagination
+from . import pdf_assets, pdf_batch, pdf_cache
+from .importers import import_orders, iter_orders
+from .logistics import get_logistics_sheet
+from .pdf_cache import FileSystemPDFStore, order_pdf_key
+from .models import Order, OrderItem
+from .serializers import OrderCreateSerializer
+from .services import generate_order_pdf
+from .views import OrderViewSet
+
+
+def create_order(name='Ana', event_date=date(2024, 5, 1), status='pendiente'):
+    return Order.objects.create(
+        customer_name=name,
+        customer_phone='11-4000-1234',
+        event_date=event_date,
+        delivery_date=event_date,
+        return_date=event_date,
+        status=status,
+    )
+
+
+class WithTotalsTests(TestCase):
+    
+    def setUp(self):
+        self.chair = Product.objects.create(name='Silla', category='sillas', price_per_unit='10.00', stock=50)
+        self.table = Product.objects.create(name='Mesa', category='mesas', price_per_unit='25.50', stock=10)
+    
+    def test_totals_of_each_order(self):
+        order = create_order()
+        OrderItem.objects.create(order=order, product=self.chair, quantity=4, unit_price=Decimal('10.00'))
+        OrderItem.objects.create(order=order, product=self.table, quantity=2, unit_price=Decimal('25.50'))
+        empty = create_order(name='Bruno')
+        
+        totals = {
+            annotated.pk: (annotated.total, annotated.items_count)
+            for annotated in Order.objects.with_totals().order_by('-created_at', '-id')
+        }
+        self.assertEqual(totals, {order.pk: (Decimal('91.00'), 6), empty.pk: (Decimal('0.00'), 0)})
+    
+    def test_matches_the_items(self):
+        order = create_order()
+        OrderItem.objects.create(order=order, product=self.chair, quantity=3, unit_price=Decimal('9.99'))
+        
+        annotated = Order.objects.with_totals().get(pk=order.pk)
+        self.assertEqual(annotated.total, Order.objects.get(pk=order.pk).total)
+        self.assertEqual(annotated.items_count, 3)
+
+
+class LogisticsSheetTests(TestCase):
+    """What leaves and comes back on a day, added up per product and per category."""
+    
+    DAY = date(2024, 5, 10)
+    
+    def setUp(self):
+        self.chair = Product.objects.create(name='Silla', category='sillas', price_per_unit='10.00', stock=500)
+        self.bench = Product.objects.create(name='Banqueta', category='sillas', price_per_unit='8.00', stock=500)
+        self.table = Product.objects.create(name='Mesa', category='mesas', price_per_unit='25.50', stock=500)
+        self.glass = Product.objects.create(name='Copa', category='cristaleria', price_per_unit='0.35', stock=500)
+        
+        day = self.DAY
+        self.outgoing = self.book('Ana', day, day + timedelta(days=2), [(self.chair, 10), (self.table, 2)])
+        self.incoming = self.book('Bruno', day - timedelta(days=3), day, [(self.chair, 5), (self.glass, 40)])
+        self.same_day = self.book('Carla', day, day, [(self.bench, 4), (self.glass, 10)])
+        self.book('Darío', day, day, [(self.chair, 100)], status='cancelado')
+        self.book('Eva', day - timedelta(days=1), day + timedelta(days=1), [(self.table, 7)])
+        self.book('Fede', day + timedelta(days=1), day + timedelta(days=1), [(self.table, 3)], status='entregado')
+    
+    def book(self, name, delivery, returned, items, status='pendiente'):
+        order = Order.objects.create(
+            customer_name=name,
+            customer_phone='11-4000-1234',
+            event_date=delivery,
+            delivery_date=delivery,
+            return_date=returned,
+            status=status,
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, quantity=quantity, unit_price=product.price_per_unit)
+            for product, quantity in items
+        ])
+        return order
+    
+    def totals(self, section):
+        return (
+            [(entry['name'], entry['quantity']) for entry in section['products']],
+            [(entry['category'], entry['quantity']) for entry in section['categories']],
+        )
+    
+    def test_deliveries(self):
+        with self.assertNumQueries(3):
+            sheet = get_logistics_sheet(self.DAY)
+        deliveries = sheet['deliveries']
+        
+        self.assertEqual([order['id'] for order in deliveries['orders']], [self.outgoing.id, self.same_day.id])
+        self.assertEqual((deliveries['orders_count'], deliveries['items_count']), (2, 26))
+        self.assertEqual(self.totals(deliveries), (
+            [('Copa', 10), ('Mesa', 2), ('Banqueta', 4), ('Silla', 10)],
+            [('cristaleria', 10), ('mesas', 2), ('sillas', 14)],
+        ))
+    
+    def test_returns(self):
+        returns = get_logistics_sheet(self.DAY)['returns']
+        
+        self.assertEqual([order['id'] for order in returns['orders']], [self.incoming.id, self.same_day.id])
+        self.assertEqual((returns['orders_count'], returns['items_count']), (2, 59))
+        self.assertEqual(self.totals(returns), (
+            [('Copa', 50), ('Banqueta', 4), ('Silla', 5)],
+            [('cristaleria', 50), ('sillas', 9)],
+        ))
+        self.assertEqual(returns['categories'][0]['category_display'], 'Cristalería')
+    
+    def test_endpoint(self):
+        self.client.force_login(User.objects.create_user('ana'))
+        response = self.client.get(f'/api/orders/logistics/?date={self.DAY}')
+        
+        self.assertEqual(response.status_code, 200)
+        sheet = response.json()
+        self.assertEqual(sheet['date'], '2024-05-10')
+        self.assertEqual(
+            [order['customer_name'] for order in sheet['deliveries']['orders']], ['Ana', 'Carla']
+        )
+        self.assertEqual(self.totals(sheet['returns'])[1], [('cristaleria', 50), ('sillas', 9)])
+        self.assertEqual(self.client.get('/api/orders/logistics/?date=10-05-2024').status_code, 400)
+
+
+class PDFAssetsTests(TestCase):
+    
+    def setUp(self):
+        chair = Product.objects.create(name='Silla', category='sillas', price_per_unit='10.00', stock=50)
+        order = create_order()
+        OrderItem.objects.create(order=order, product=chair, quantity=4, unit_price=Decimal('10.00'))
+        self.order = Order.objects.with_items().get(pk=order.pk)
+        # Start each test without shared assets, as a new process does
+        patcher = mock.patch.object(pdf_assets, '_assets', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_built_once_per_process(self):
+        with mock.patch.object(pdf_assets, 'PDFAssets', wraps=pdf_assets.PDFAssets) as build:
+            generate_order_pdf(self.order)
+            generate_order_pdf(self.order)
+        
+        build.assert_called_once()
+        self.assertIs(pdf_assets.get_pdf_assets(), pdf_assets.get_pdf_assets())
+    
+    def test_missing_fonts_fall_back_to_helvetica(self):
+        with mock.patch.object(pdf_assets, 'FONTS_DIR', '/nonexistent'), \
+                mock.patch.object(pdf_assets.pdfmetrics, 'getRegisteredFontNames', return_value=[]):
+            data = generate_order_pdf(self.order).getvalue()
+        
+        self.assertEqual(pdf_assets.get_pdf_assets().fonts['regular'], 'Helvetica')
+        self.assertTrue(data.startswith(b'%PDF'))
+        self.assertIn(b'/BaseFont /Helvetica', data)
+        self.assertNotIn(b'Montserrat', data)
+
+
+class PDFCacheTests(TestCase):
+    
+    def setUp(self):
+        self.chair = Product.objects.create(name='Silla', category='sillas', price_per_unit='10.00', stock=50)
+        self.order = create_order()
+        self.item = OrderItem.objects.create(order=self.order, product=self.chair, quantity=4, unit_price=Decimal('10.00'))
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = directory.name
+    
+    def key(self):
+        return order_pdf_key(Order.objects.with_items().get(pk=self.order.pk))
+    
+    def test_key_follows_the_content(self):
+        key = self.key()
+        self.assertEqual(self.key(), key)
+        
+        self.order.customer_name = 'Bruno'
+        self.order.save()
+        order_key = self.key()
+        self.assertNotEqual(order_key, key)
+        
+        self.item.quantity = 5
+        self.item.save()
+        items_key = self.key()
+        self.assertNotEqual(items_key, order_key)
+        
+        with override_settings(BUSINESS_NAME='Otro nombre'):
+            self.assertNotEqual(self.key(), items_key)
+    
+    def fill(self, store, *keys):
+        """Store 1000 bytes under each key, each one used after the previous."""
+        for age, key in enumerate(keys):
+            store.set(key, b'x' * 1000)
+            os.utime(store.path(key), (1000 + age, 1000 + age))
+    
+    def test_evicts_least_recently_used(self):
+        store = FileSystemPDFStore(self.location, max_size=3000)
+        self.fill(store, 'a', 'b', 'c')
+        # Reading a refreshes it
+        self.assertIsNotNone(store.get('a'))
+        
+        store.set('d', b'x' * 1000)
+        
+        # Over max_size: removed down to 90%, oldest first
+        self.assertIsNone(store.get('b'))
+        self.assertIsNone(store.get('c'))
+        self.assertIsNotNone(store.get('a'))
+        self.assertIsNotNone(store.get('d'))
+        self.assertEqual(store.size, 2000)
+    
+    def test_directory_is_scanned_only_to_evict_or_recount(self):
+        store = FileSystemPDFStore(self.location, max_size=10000)
+        with mock.patch.object(os, 'scandir', wraps=os.scandir) as scandir:
+            self.fill(store, *'abcde')
+            # The first write counts the files already there
+            self.assertEqual(scandir.call_count, 1)
+            self.assertEqual(store.size, 5000)
+            
+            self.fill(store, *'fghijk')
+            self.assertEqual(scandir.call_count, 2)
+            
+            with mock.patch.object(FileSystemPDFStore, 'RECOUNT_EVERY', 2):
+                store.set('k', b'x' * 500)
+            self.assertEqual(scandir.call_count, 3)
+        self.assertEqual(store.size, sum(os.path.getsize(store.path(key)) for key in 'abcdefghijk'
+                                         if os.path.exists(store.path(key))))
+    
+    def test_failed_write_leaves_no_temporary_file(self):
+        store = FileSystemPDFStore(self.location)
+        with mock.patch.object(os, 'replace', side_effect=OSError('disco lleno')):
+            with self.assertRaises(OSError):
+                store.set('a', b'%PDF')
+        self.assertEqual(os.listdir(self.location), [])
+    
+    @override_settings(PDF_CACHE={'BACKEND': 'apps.orders.pdf_cache.MemoryPDFStore'})
+    def test_matching_etag_gets_not_modified(self):
+        self.client.force_login(User.objects.create_user('ana'))
+        url = f'/api/orders/{self.order.pk}/pdf/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], f'"{self.key()}"')
+        
+        with mock.patch.object(pdf_cache, 'generate_order_pdf') as generate:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        generate.assert_not_called()
+        
+        self.order.customer_name = 'Bruno'
+        self.order.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+
+# Creation dates and file ids change from one render to the next
+PDF_VOLATILE = re.compile(rb'/(?:CreationDate|ModDate) \(D:[^)]*\)|/ID\s*\[[^\]]*\]')
+
+
+class PDFBatchTests(TestCase):
+    
+    def test_pool_renders_the_same_pdfs_as_serial(self):
+        chair = Product.objects.create(name='Silla', category='sillas', price_per_unit='10.00', stock=500)
+        for index in range(pdf_batch.PARALLEL_MIN_ORDERS):
+            order = create_order(name=f'Cliente {index}')
+            OrderItem.objects.create(order=order, product=chair, quantity=index + 1, unit_price=Decimal('10.00'))
+        orders = pdf_batch.batch_orders()
+        
+        serial = [pdf_batch._render_order(order) for order in orders]
+        with override_settings(PDF_BATCH_WORKERS=2), \
+                mock.patch.object(pdf_batch, 'ProcessPoolExecutor', wraps=ProcessPoolExecutor) as pool:
+            pooled = list(pdf_batch._render_orders(orders))
+            # The next batch reuses the workers
+            again = list(pdf_batch._render_orders(orders[::-1]))
+        
+        pool.assert_called_once()
+        self.assertIsNone(pdf_batch._pool)
+        self.assertEqual(
+            [PDF_VOLATILE.sub(b'', data) for data in pooled],
+            [PDF_VOLATILE.sub(b'', data) for data in serial],
+        )
+        self.assertEqual(
+            [PDF_VOLATILE.sub(b'', data) for data in again],
+            [PDF_VOLATILE.sub(b'', data) for data in serial[::-1]],
+        )
+    
+    def test_broken_pool_is_replaced(self):
+        broken = mock.Mock()
+        broken.map.side_effect = BrokenProcessPool('sin workers')
+        orders = [mock.Mock()] * pdf_batch.PARALLEL_MIN_ORDERS
+        
+        with override_settings(PDF_BATCH_WORKERS=2), \
+                mock.patch.object(pdf_batch, 'ProcessPoolExecutor', side_effect=[broken, mock.Mock()]) as pool:
+            with self.assertRaises(BrokenProcessPool):
+                list(pdf_batch._render_orders(orders))
+            broken.shutdown.assert_called_once()
+            self.assertIsNot(pdf_batch._get_pool(), broken)
+        
+        self.assertEqual(pool.call_count, 2)
+
+
+class ImportTests(TestCase):
+    """Imported files go through the create validations, stock included, in any batch size."""
+    
+    CSV = (
+        'order_ref,customer_name,customer_phone,customer_address,event_date,delivery_date,return_date,'
+        'observations,product,quantity,unit_price\n'
+        'A,Ana,11-4000-1234,,2024-05-02,2024-05-01,2024-05-03,,{chair},4,\n'
+        'A,,,,,,,,{table},2,20.00\n'
+        ',Bruno,11-5000-0000,,2024-05-02,2024-05-02,2024-05-02,,{chair},3,\n'
+        ',Carla,11-6000-0000,,2024-05-02,2024-05-02,2024-05-02,,999,1,\n'
+        ',Darío,11-7000-0000,,2024-05-03,2024-05-03,2024-05-03,,{table},2,\n'
+    )
+    
+    def setUp(self):
+        # Run the catalog cache bump, so the importer does not see other tests' products
+        with self.captureOnCommitCallbacks(execute=True):
+            self.chair = Product.objects.create(name='Silla', category='sillas', price_per_unit='10.00', stock=10)
+            self.table = Product.objects.create(name='Mesa', category='mesas', price_per_unit='25.50', stock=3)
+        # A stored order already holds two chairs on May 2nd
+        serializer = OrderCreateSerializer(data={
+            'customer_name': 'Eva', 'customer_phone': '11-8000-0000', 'event_date': '2024-05-02',
+            'delivery_date': '2024-05-02', 'return_date': '2024-05-02',
+            'items': [{'product': self.chair.id, 'quantity': 2}],
+        })
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        self.client.force_login(User.objects.create_user('ana'))
+    
+    def csv_lines(self):
+        return self.CSV.format(chair=self.chair.id, table=self.table.id).splitlines(keepends=True)
+    
+    def jsonl_lines(self):
+        def order(name, day, quantity, **extra):
+            return json.dumps(dict({
+                'customer_name': name, 'customer_phone': '11-4000-1234', 'event_date': day,
+                'delivery_date': day, 'return_date': day,
+                'items': [{'product': self.chair.id, 'quantity': quantity}],
+            }, **extra))
+        
+        return [
+            order('Ana', '2024-05-10', 6),
+            '{"customer_name": "Bruno",\n',
+            order('Bruno', '2024-05-10', 4, customer_phone='11-5000-0000'),
+            order('', '2024-05-10', 1),
+            order('Carla', '2024-05-10', 1),
+            '\n',
+            order('Ana', '2024-05-11', 10, observations='Otro día'),
+        ]
+    
+    def assertConsistent(self):
+        """Rollups and customer stats match a fresh computation."""
+        self.assertEqual(check_rollups(), [])
+        expected = compute_customer_stats()
+        for customer in Customer.objects.all():
+            self.assertEqual(
+                {
+                    'orders_count': customer.orders_count,
+                    'total_revenue': customer.total_revenue,
+                    'last_event_date': customer.last_event_date,
+                },
+                expected[customer.pk],
+                customer.name,
+            )
+    
+    def test_csv_upload(self):
+        upload = SimpleUploadedFile('pedidos.csv', ''.join(self.csv_lines()).encode())
+        response = self.client.post('/api/orders/import/', {'file': upload})
+        
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual((result['created'], result['errors_count']), (2, 2))
+        self.assertEqual([error['row'] for error in result['errors']], [5, 6])
+        self.assertIn('product', str(result['errors'][0]['errors']))
+        # The table is short because of order A, earlier in the same file
+        self.assertEqual(
+            result['errors'][1]['errors'],
+            {'items': ['Stock insuficiente para "Mesa": disponibles 1, solicitadas 2.']},
+        )
+        
+        order = Order.objects.get(customer_name='Ana')
+        self.assertEqual(
+            sorted(order.items.values_list('product__name', 'quantity', 'unit_price')),
+            [('Mesa', 2, Decimal('20.00')), ('Silla', 4, Decimal('10.00'))],
+        )
+        self.assertEqual(order.customer.phone_digits, '1140001234')
+        self.assertConsistent()
+    
+    def test_jsonl_across_batches(self):
+        result = import_orders(iter_orders(self.jsonl_lines(), 'jsonl'), batch_size=2)
+        
+        self.assertEqual(result['created'], 3)
+        self.assertEqual([error['row'] for error in result['errors']], [2, 4, 5])
+        self.assertIn('JSON inválido', result['errors'][0]['errors']['non_field_errors'][0])
+        self.assertIn('customer_name', result['errors'][1]['errors'])
+        # Ana and Bruno booked every chair in the two batches before Carla's
+        self.assertEqual(
+            result['errors'][2]['errors'],
+            {'items': ['Stock insuficiente para "Silla": disponibles 0, solicitadas 1.']},
+        )
+        self.assertEqual(Customer.objects.get(name='Ana').orders_count, 2)
+        self.assertConsistent()
+    
+    def test_batch_size_does_not_change_the_result(self):
+        for file_format, lines in [('csv', self.csv_lines()), ('jsonl', self.jsonl_lines())]:
+            results = []
+            for batch_size in (1, 2, 1000):
+                with self.subTest(file_format=file_format, batch_size=batch_size), transaction.atomic():
+                    results.append(import_orders(iter_orders(lines, file_format), batch_size=batch_size))
+                    self.assertConsistent()
+                    transaction.set_rollback(True)
+            self.assertEqual(results[1], results[0])
+            self.assertEqual(results[2], results[0])
+
+
+@contextmanager
+def prefer_indexes(sorted_by_index=False):
+    """
+    Disable sequential scans on PostgreSQL, which prefers them on the small
+    test tables, and sorts too to check an index returns the rows in order.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                if sorted_by_index:
+                    cursor.execute('SET LOCAL enable_sort = off')
+        yield
+
+
+class QueryPlanTests(TestCase):
+    """
+    The hot queries use their indexes.
+    
+    The list queries are built like the API builds them: the view's
+    queryset and filters, then KeysetPagination.
+    """
+    
+    def list_querysets(self, url, action='list', order_status=None):
+        """(count queryset, page queryset) of an OrderViewSet list request."""
+        request = Request(APIRequestFactory().get(url))
+        view = OrderViewSet(action=action, request=request, format_kwarg=None, args=(), kwargs={})
+        queryset = view.get_queryset()
+        if order_status:
+            queryset = queryset.filter(status=order_status)
+        return KeysetPagination().page_querysets(view.filter_queryset(queryset), request, view)
+    
+    def assertUsesIndex(self, queryset, *indexes, sorted_by_index=False):
+        """Check the plan uses one of indexes (and, if sorted_by_index, sorts nothing)."""
+        with prefer_indexes(sorted_by_index):
+            plan = queryset.explain()
+        self.assertTrue(any(index in plan for index in indexes), plan)
+        if sorted_by_index:
+            sort = 'USE TEMP B-TREE' if connection.vendor == 'sqlite' else 'Sort'
+            self.assertNotIn(sort, plan)
+    
+    def test_order_list(self):
+        count, page = self.list_querysets('/api/orders/')
+        self.assertUsesIndex(page, 'order_created_idx', sorted_by_index=True)
+        self.assertNotIn('orders_orderitem', str(count.query))
+    
+    def test_order_list_next_page(self):
+        order = create_order()
+        pagination = KeysetPagination()
+        pagination.request = Request(APIRequestFactory().get('/api/orders/'))
+        next_url = pagination.encode_cursor([order.created_at, order.pk], False)
+        
+        _, page = self.list_querysets(next_url)
+        self.assertIn('created_at', str(page.query.where))
+        self.assertUsesIndex(page, 'order_created_idx', sorted_by_index=True)
+    
+    def test_status_lists(self):
+        for action, order_status in [('pending', 'pendiente'), ('delivered', 'entregado')]:
+            with self.subTest(action=action):
+                count, page = self.list_querysets(f'/api/orders/{action}/', action, order_status)
+                self.assertUsesIndex(page, 'order_status_created_idx', sorted_by_index=True)
+                # Any index on status serves the count
+                self.assertUsesIndex(count, 'order_status_created_idx', 'order_status_event_idx')
+        
+        _, page = self.list_querysets('/api/orders/?status=pendiente')
+        self.assertUsesIndex(page, 'order_status_created_idx', sorted_by_index=True)
+    
+    def test_delivered_orders_of_a_period(self):
+        today = date.today()
+        # Ordered like the exports (unordered, an empty table gives PostgreSQL
+        # no reason to prefer it over order_status_created_idx)
+        orders = delivered_orders(today - timedelta(days=30), today).order_by('event_date', 'id')
+        self.assertUsesIndex(orders, 'order_status_event_idx')
+    
+    def test_logistics_of_a_day(self):
+        today = date.today()
+        orders = Order.objects.with_totals().filter(Q(delivery_date=today) | Q(return_date=today))
+        self.assertUsesIndex(orders, 'order_delivery_date_idx')
+        self.assertUsesIndex(orders, 'order_return_date_idx')
+    
+    def test_reserved_quantities(self):
+        today = date.today()
+        with CaptureQueriesContext(connection) as queries:
+            get_reserved_quantities(today, today + timedelta(days=7))
+        explain_sql = 'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite' else 'EXPLAIN'
+        with prefer_indexes(), connection.cursor() as cursor:
+            cursor.execute(f'{explain_sql} {queries[0]["sql"]}')
+            plan = str(cursor.fetchall())
+        # Either date bounds the rental windows; the planner picks the narrower
+        self.assertTrue(any(index in plan for index in ('order_delivery_date_idx', 'order_return_date_idx')), plan)
+    
+    def test_product_catalog(self):
+        self.assertUsesIndex(
+            Product.objects.filter(category='sillas').order_by('category', 'name', 'id'),
+            'product_catalog_idx', sorted_by_index=True,
+        )
+        self.assertUsesIndex(
+            Product.objects.filter(is_active=True).order_by('category', 'name', 'id'),
+            'product_active_catalog_idx', sorted_by_index=True,
+        )
+    
+    def test_daily_revenue_of_a_period(self):
+        today = date.today()
+        self.assertUsesIndex(
+            DailyRevenue.objects.filter(status='entregado', date__gte=today - timedelta(days=30), date__lte=today),
+            'daily_revenue_status_date_idx',
+        )
+
+
+@skipUnless(connection.features.has_select_for_update, 'Requiere bloqueos de filas (PostgreSQL).')
+class ConcurrentBookingTests(TransactionTestCase):
+    """Two orders booking the last units at once: validate_stock lets only one through."""
+    
+    def test_only_one_order_gets_the_last_units(self):
+        product = Product.objects.create(name='Silla', category='sillas', price_per_unit='10.00', stock=5)
+        today = date.today()
+        barrier = threading.Barrier(2, timeout=5)
+        results = []
+        
+        def book(name):
+            try:
+                serializer = OrderCreateSerializer(data={
+                    'customer_name': name,
+                    'customer_phone': '11-4000-1234',
+                    'event_date': today,
+                    'delivery_date': today,
+                    'return_date': today,
+                    'items': [{'product': product.id, 'quantity': 5}],
+                })
+                serializer.is_valid(raise_exception=True)
+                # Both orders saw the units free; save them at the same time
+                barrier.wait()
+                serializer.save()
+                results.append('creado')
+            except serializers.ValidationError:
+                results.append('sin stock')
+            finally:
+                connection.close()
+        
+        threads = [threading.Thread(target=book, args=(name,)) for name in ('Ana', 'Bruno')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(sorted(results), ['creado', 'sin stock'])
+        self.assertEqual(OrderItem.objects.filter(product=product).count(), 1)
@@ -1,11 +1,17 @@
 """
 API views for Order management.
 """
-from rest_framework import viewsets, status, filters
+import io
+from datetime import date
+
+from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import parse_etags
 from django.db import transaction
 
 from .models import Order, OrderItem
@@ -16,21 +22,49 @@ from .serializers import (
     OrderListSerializer,
     OrderStatusSerializer,
 )
-from .services import generate_order_pdf
+from .services import generate_orders_pdf, generate_logistics_pdf
+from .logistics import get_logistics_sheet
+from .pdf_cache import get_order_pdf, order_pdf_key
+from .pdf_batch import batch_orders, stream_batch_zip, MAX_BATCH_ORDERS
+from .importers import import_orders, iter_orders
+from .exports import order_rows, order_item_rows, export_response, export_format_error
+from apps.reports.rollups import order_snapshot, update_order_rollups
+from config.async_views import AsyncDispatchMixin, AsyncReadMixin, streaming_content
+from config.search import SearchTextFilter, RankedOrderingFilter
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(AsyncDispatchMixin, AsyncReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing orders.
     
     Provides CRUD operations plus status changes and PDF generation.
+    List and retrieve are async (see config.async_views); writes and the
+    other actions run as regular sync handlers.
     """
-    queryset = Order.objects.prefetch_related('items__product')
+    queryset = Order.objects.with_totals()
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['customer_name', 'customer_phone']
+    # Indexed search over customer name and phone (see config.search)
+    filter_backends = [SearchTextFilter, RankedOrderingFilter]
     ordering_fields = ['created_at', 'event_date', 'delivery_date', 'status']
     ordering = ['-created_at']
+    # Max queries per action, session and user included (see config.profiling)
+    query_budgets = {
+        'list': 5,
+        'retrieve': 5,
+        'create': 20,
+        'update': 26,
+        'partial_update': 26,
+        'destroy': 14,
+        'change_status': 14,
+        'pdf': 5,
+        'pdf_batch': 5,
+        'logistics': 5,
+        'pending': 4,
+        'delivered': 4,
+        # The rows are read while streaming, after the request is counted
+        'export': 2,
+        'export_items': 2,
+    }
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action."""
@@ -45,23 +79,20 @@ class OrderViewSet(viewsets.ModelViewSet):
         return OrderSerializer
     
     def get_queryset(self):
-        """Filter orders by status if provided."""
-        queryset = Order.objects.prefetch_related('items__product')
-        
-        # Filter by status
-        status_filter = self.request.query_params.get('status')
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
-        
-        # Filter by date range
-        start_date = self.request.query_params.get('start_date')
-        end_date = self.request.query_params.get('end_date')
-        if start_date:
-            queryset = queryset.filter(event_date__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(event_date__lte=end_date)
+        """Filter orders by status, event date range, phone or customer if provided."""
+        queryset = Order.objects.with_totals()
+        if self.detail:
+            queryset = queryset.with_items()
         
-        return queryset
+        # Filter by status and date range
+        params = self.request.query_params
+        return queryset.filtered(
+            status=params.get('status'),
+            start_date=params.get('start_date'),
+            end_date=params.get('end_date'),
+            phone=params.get('phone'),
+            customer=params.get('customer'),
+        )
     
     def create(self, request, *args, **kwargs):
         """Create a new order with items."""
@@ -70,7 +101,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         order = serializer.save()
         
         # Return full order with items
-        output_serializer = OrderSerializer(order)
+        output_serializer = OrderSerializer(self.get_detail_order(order.pk))
         return Response(output_serializer.data, status=status.HTTP_201_CREATED)
     
     def update(self, request, *args, **kwargs):
@@ -81,9 +112,13 @@ class OrderViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         order = serializer.save()
         
-        output_serializer = OrderSerializer(order)
+        output_serializer = OrderSerializer(self.get_detail_order(order.pk))
         return Response(output_serializer.data)
     
+    def get_detail_order(self, pk):
+        """Reload an order with totals and items for the response."""
+        return Order.objects.with_totals().with_items().get(pk=pk)
+    
     @action(detail=True, methods=['patch'])
     def change_status(self, request, pk=None):
         """Change order status."""
@@ -97,32 +132,208 @@ class OrderViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def pdf(self, request, pk=None):
-        """Generate and return order PDF."""
+        """
+        Return the order PDF.
+        
+        Rendered PDFs are cached by content hash, which is also sent as
+        ETag: a matching If-None-Match gets a 304 without rendering.
+        """
         order = self.get_object()
+        key = order_pdf_key(order)
+        etag = f'"{key}"'
+        
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(get_order_pdf(order, key), content_type='application/pdf')
+            response['Content-Disposition'] = f'attachment; filename="pedido_{order.id}.pdf"'
+        
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+    
+    @action(detail=False, methods=['get'], url_path='pdf-batch')
+    def pdf_batch(self, request):
+        """
+        Return the PDFs of many orders at once.
+        
+        Query params:
+            ids: Order ids, comma separated
+            date: Delivery date (YYYY-MM-DD), instead of ids; selects the
+                orders delivered that day that are not cancelled
+            file_format: 'pdf' (default, one document with a page per
+                order) or 'zip' (one PDF per order)
+        """
+        ids_param = request.query_params.get('ids')
+        date_param = request.query_params.get('date')
+        file_format = request.query_params.get('file_format', 'pdf')
+        
+        if file_format not in ('pdf', 'zip'):
+            return Response(
+                {'error': 'Formato no soportado. Use pdf o zip.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if bool(ids_param) == bool(date_param):
+            return Response(
+                {'error': 'Indique ids o date.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Generate PDF
-        pdf_buffer = generate_order_pdf(order)
+        order_ids = None
+        delivery_date = None
+        try:
+            if ids_param:
+                order_ids = [int(pk) for pk in ids_param.split(',') if pk]
+            else:
+                delivery_date = date.fromisoformat(date_param)
+        except ValueError:
+            return Response(
+                {'error': 'IDs o fecha inválidos. Use ids=1,2,3 o date=YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Create response
-        response = HttpResponse(pdf_buffer, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="pedido_{order.id}.pdf"'
+        if order_ids is not None and len(order_ids) > MAX_BATCH_ORDERS:
+            return Response(
+                {'error': f'Se pueden imprimir hasta {MAX_BATCH_ORDERS} pedidos por vez.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
+        orders = batch_orders(order_ids=order_ids, delivery_date=delivery_date)
+        if not orders:
+            return Response(
+                {'error': 'No hay pedidos para imprimir.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if len(orders) > MAX_BATCH_ORDERS:
+            return Response(
+                {'error': f'Se pueden imprimir hasta {MAX_BATCH_ORDERS} pedidos por vez.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        filename = f'pedidos_{delivery_date.isoformat()}' if delivery_date else 'pedidos'
+        if file_format == 'zip':
+            response = StreamingHttpResponse(
+                streaming_content(request, stream_batch_zip(orders)),
+                content_type='application/zip'
+            )
+            response['Content-Disposition'] = f'attachment; filename="{filename}.zip"'
+            return response
+        
+        response = HttpResponse(generate_orders_pdf(orders).getvalue(), content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.pdf"'
+        return response
+    
+    @action(detail=False, methods=['get'])
+    def logistics(self, request):
+        """
+        Deliveries and returns of a day with the quantities to load.
+        
+        Query params:
+            date: Optional date in YYYY-MM-DD format (defaults to today)
+            file_format: 'json' (default) or 'pdf' for the printable sheet
+        """
+        date_param = request.query_params.get('date')
+        try:
+            day = date.fromisoformat(date_param) if date_param else timezone.localdate()
+        except ValueError:
+            return Response(
+                {'error': 'Formato de fecha inválido. Use YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        file_format = request.query_params.get('file_format', 'json')
+        if file_format not in ('json', 'pdf'):
+            return Response(
+                {'error': 'Formato no soportado. Use json o pdf.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        sheet = get_logistics_sheet(day)
+        if file_format == 'json':
+            return Response(sheet)
+        
+        response = HttpResponse(generate_logistics_pdf(sheet).getvalue(), content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="logistica_{day.isoformat()}.pdf"'
         return response
     
     @action(detail=False, methods=['get'])
     def pending(self, request):
-        """Get all pending orders."""
-        orders = Order.objects.filter(status='pendiente').prefetch_related('items__product')
-        serializer = OrderListSerializer(orders, many=True)
-        return Response(serializer.data)
+        """Get pending orders (paginated, with the list filters)."""
+        return self.status_list('pendiente')
     
     @action(detail=False, methods=['get'])
     def delivered(self, request):
-        """Get all delivered orders."""
-        orders = Order.objects.filter(status='entregado').prefetch_related('items__product')
+        """Get delivered orders (paginated, with the list filters)."""
+        return self.status_list('entregado')
+    
+    def status_list(self, order_status):
+        orders = self.filter_queryset(self.get_queryset().filter(status=order_status))
+        page = self.paginate_queryset(orders)
+        if page is not None:
+            return self.get_paginated_response(OrderListSerializer(page, many=True).data)
         serializer = OrderListSerializer(orders, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Download the filtered orders as CSV or XLSX.
+        
+        Query params:
+            file_format: 'csv' (default) or 'xlsx'
+            status, start_date, end_date, search, ordering: Same as the list
+        """
+        return self.export_download(request, 'pedidos', order_rows)
+    
+    @action(detail=False, methods=['get'], url_path='export-items')
+    def export_items(self, request):
+        """Download the items of the filtered orders as CSV or XLSX."""
+        return self.export_download(request, 'pedidos_items', order_item_rows)
+    
+    def export_download(self, request, filename, build_rows):
+        file_format = request.query_params.get('file_format', 'csv')
+        error = export_format_error(file_format)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        header, rows = build_rows(queryset)
+        return export_response(request, filename, header, rows, file_format)
+    
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='import',
+        parser_classes=[MultiPartParser, FormParser]
+    )
+    def import_orders(self, request):
+        """
+        Import orders from an uploaded CSV or JSON-lines file.
+        
+        Form fields:
+            file: The file to import
+            file_format: Optional 'csv' or 'jsonl' (defaults to the extension)
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {'error': 'Se requiere un archivo (campo file).'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        file_format = request.data.get('file_format')
+        if not file_format:
+            file_format = 'csv' if upload.name.lower().endswith('.csv') else 'jsonl'
+        if file_format not in ('csv', 'jsonl'):
+            return Response(
+                {'error': 'Formato no soportado. Use csv o jsonl.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        lines = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        result = import_orders(iter_orders(lines, file_format))
+        return Response(result)
+    
     def destroy(self, request, *args, **kwargs):
         """
         Cancel order instead of deleting.
@@ -137,8 +348,11 @@ class OrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        order.status = 'cancelado'
-        order.save()
+        with transaction.atomic():
+            before = order_snapshot(order)
+            order.status = 'cancelado'
+            order.save()
+            update_order_rollups(before, order_snapshot(order))
         
         serializer = OrderSerializer(order)
         return Response(serializer.data)
@@ -5,3 +5,7 @@ class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.products'
     verbose_name = 'Productos'
+    
+    def ready(self):
+        # Connect the catalog cache invalidation signals
+        from . import cache  # noqa: F401
@@ -0,0 +1,207 @@
+"""
+Read-through cache of the product catalog.
+
+Two tiers: a small in-process dict in front of the Django cache
+(settings.PRODUCT_CACHE['ALIAS'], locmem unless configured). Every entry
+is keyed by the catalog version, a counter stored in the Django cache
+and bumped when a product is saved or deleted (after the transaction
+commits), so invalidation never deletes keys: old entries just stop
+being read and expire.
+
+With several server processes the Django cache must be shared (Redis,
+Memcached, database) for the version bump to reach all of them; with
+locmem each process only sees its own changes until TIMEOUT.
+"""
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Product
+
+
+VERSION_KEY = 'products:version'
+
+
+def _config():
+    return settings.PRODUCT_CACHE
+
+
+def _cache():
+    return caches[_config()['ALIAS']]
+
+
+class LocalCache:
+    """Thread-safe LRU of pickled values, for the current process."""
+    
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                return None
+            self._entries.move_to_end(key)
+        # Unpickled per read: callers may modify what they get
+        return pickle.loads(data)
+    
+    def set(self, key, value):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_local = LocalCache(settings.PRODUCT_CACHE['LOCAL_MAX_ENTRIES'])
+
+
+def catalog_version():
+    """Current catalog version, initialized on first use."""
+    cache = _cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Milliseconds, so a flushed cache never reuses an old version
+        cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def acatalog_version():
+    """catalog_version() for async views."""
+    cache = _cache()
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog entry."""
+    cache = _cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, int(time.time() * 1000), timeout=None)
+
+
+def _key(version, name):
+    return f'products:{version}:{name}'
+
+
+def get_or_build(name, build, version=None):
+    """
+    Return the cached value of name for the catalog version, building it on a miss.
+    
+    Args:
+        name: Entry name (unique for what build returns)
+        build: Callable returning a picklable value
+        version: Catalog version already read by the caller
+    """
+    key = _key(version or catalog_version(), name)
+    value = _local.get(key)
+    if value is not None:
+        return value
+    
+    cache = _cache()
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, _config()['TIMEOUT'])
+    _local.set(key, value)
+    return value
+
+
+async def aget_or_build(name, build, version=None):
+    """
+    get_or_build() for async views.
+    
+    Args:
+        name: Entry name (unique for what build returns)
+        build: Coroutine function returning a picklable value
+        version: Catalog version already read by the caller
+    """
+    key = _key(version or await acatalog_version(), name)
+    value = _local.get(key)
+    if value is not None:
+        return value
+    
+    cache = _cache()
+    value = await cache.aget(key)
+    if value is None:
+        value = await build()
+        await cache.aset(key, value, _config()['TIMEOUT'])
+    _local.set(key, value)
+    return value
+
+
+def request_key(request):
+    """Entry name for a GET request (absolute URL, so links are right)."""
+    url = request.build_absolute_uri()
+    return 'request:' + hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+def get_products(product_ids):
+    """
+    Load products by id through the cache.
+    
+    Like Product.objects.in_bulk(product_ids): one cache round trip for
+    all ids, plus one query for the ones that are not cached.
+    
+    Returns:
+        dict mapping id to Product (missing ids are left out)
+    """
+    product_ids = set(product_ids)
+    if not product_ids:
+        return {}
+    
+    version = catalog_version()
+    keys = {product_id: _key(version, f'product:{product_id}') for product_id in product_ids}
+    
+    products = {}
+    for product_id, key in keys.items():
+        product = _local.get(key)
+        if product is not None:
+            products[product_id] = product
+    
+    pending = {keys[product_id]: product_id for product_id in product_ids - set(products)}
+    if pending:
+        cache = _cache()
+        for key, product in cache.get_many(list(pending)).items():
+            products[pending.pop(key)] = product
+            _local.set(key, product)
+    
+    if pending:
+        loaded = Product.objects.in_bulk(pending.values())
+        _cache().set_many(
+            {keys[product_id]: product for product_id, product in loaded.items()},
+            _config()['TIMEOUT']
+        )
+        for product_id, product in loaded.items():
+            _local.set(keys[product_id], product)
+        products.update(loaded)
+    
+    return products
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_catalog(sender, **kwargs):
+    # After commit: readers must not cache the old rows under the new version
+    transaction.on_commit(bump_catalog_version)
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:19
+
+from django.db import migrations, models
+
+from config.search import normalize_text, create_search_index, drop_search_index
+
+
+def fill_search_text(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    products = list(Product.objects.only('id', 'name', 'description'))
+    for product in products:
+        product.search_text = ' '.join(filter(None, [
+            normalize_text(product.name),
+            normalize_text(product.description),
+        ]))
+    Product.objects.bulk_update(products, ['search_text'], batch_size=500)
+
+
+def create_index(apps, schema_editor):
+    create_search_index(schema_editor, 'products_product')
+
+
+def drop_index(apps, schema_editor):
+    drop_search_index(schema_editor, 'products_product')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_index, drop_index),
+    ]
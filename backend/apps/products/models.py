@@ -3,6 +3,8 @@ Product models for managing rental inventory.
 """
 from django.db import models
 
+from config.search import normalize_text
+
 
 class Product(models.Model):
     """
@@ -46,6 +48,12 @@ class Product(models.Model):
         default=True,
         verbose_name='Activo'
     )
+    # Normalized name and description, see update_search_fields
+    search_text = models.TextField(
+        blank=True,
+        default='',
+        editable=False
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -53,6 +61,33 @@ class Product(models.Model):
         verbose_name = 'Producto'
         verbose_name_plural = 'Productos'
         ordering = ['category', 'name']
+        indexes = [
+            # Catalog listing: category filter and (category, name) ordering
+            models.Index(
+                fields=['category', 'name', 'id'],
+                name='product_catalog_idx'
+            ),
+            # Same for the active products offered in new orders
+            models.Index(
+                fields=['category', 'name', 'id'],
+                condition=models.Q(is_active=True),
+                name='product_active_catalog_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.get_category_display()})"
+    
+    def update_search_fields(self):
+        """Recompute the search text from the name and description."""
+        self.search_text = ' '.join(filter(None, [
+            normalize_text(self.name),
+            normalize_text(self.description),
+        ]))
+    
+    def save(self, *args, **kwargs):
+        self.update_search_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'name', 'description'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'search_text'}
+        super().save(*args, **kwargs)
@@ -0,0 +1,136 @@
+"""
+Stock availability services.
+
+An order item reserves `quantity` units of a product from the order's
+delivery_date to its return_date (both inclusive). Cancelled orders do
+not reserve stock.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db.models import Sum
+
+from apps.orders.models import OrderItem
+
+
+def _reserving_items(start_date, end_date, product_ids=None, exclude_order_id=None):
+    """Non-cancelled order items whose rental window overlaps [start_date, end_date]."""
+    items = OrderItem.objects.filter(
+        order__return_date__gte=start_date,
+        order__delivery_date__lte=end_date,
+    ).exclude(
+        order__status='cancelado'
+    )
+    if product_ids is not None:
+        items = items.filter(product_id__in=product_ids)
+    if exclude_order_id is not None:
+        items = items.exclude(order_id=exclude_order_id)
+    return items
+
+
+def get_reserved_quantities(start_date, end_date, product_ids=None, exclude_order_id=None):
+    """
+    Calculate the peak number of units in use per product in a date range.
+    
+    Loads every non-cancelled order item whose rental window overlaps
+    [start_date, end_date] in a single query, then sweeps the windows in
+    date order to find the maximum concurrent usage.
+    
+    Args:
+        start_date: Start date (inclusive)
+        end_date: End date (inclusive)
+        product_ids: Optional ids (list or values('id') subquery) to restrict to
+        exclude_order_id: Optional order to leave out (e.g. while editing it)
+    
+    Returns:
+        dict mapping product id to peak reserved units
+    """
+    # (date, delta) events per product; a window frees its units the day
+    # after return_date.
+    events = defaultdict(list)
+    items = _reserving_items(start_date, end_date, product_ids, exclude_order_id)
+    for product_id, quantity, delivery_date, return_date in items.values_list(
+        'product_id',
+        'quantity',
+        'order__delivery_date',
+        'order__return_date',
+    ):
+        events[product_id].append((max(delivery_date, start_date), quantity))
+        events[product_id].append((min(return_date, end_date) + timedelta(days=1), -quantity))
+    
+    reserved = {}
+    for product_id, product_events in events.items():
+        # Releases sort before reservations on the same day
+        product_events.sort()
+        in_use = peak = 0
+        for _, delta in product_events:
+            in_use += delta
+            peak = max(peak, in_use)
+        reserved[product_id] = peak
+    
+    return reserved
+
+
+def get_daily_reservations(start_date, end_date, product_ids):
+    """
+    Units in use per product and day in a date range.
+    
+    The same reservations as get_reserved_quantities(), kept per day so
+    the caller can add windows of its own (e.g. the orders of an import
+    batch) and check any part of the range. One query, grouped by
+    product and window.
+    
+    Returns:
+        dict mapping product id to a Counter of date -> units in use
+    """
+    windows = _reserving_items(start_date, end_date, product_ids).order_by().values(
+        'product_id',
+        'order__delivery_date',
+        'order__return_date',
+    ).annotate(units=Sum('quantity')).values_list(
+        'product_id',
+        'units',
+        'order__delivery_date',
+        'order__return_date',
+    )
+    usage = defaultdict(Counter)
+    for product_id, quantity, delivery_date, return_date in windows:
+        day = max(delivery_date, start_date)
+        while day <= min(return_date, end_date):
+            usage[product_id][day] += quantity
+            day += timedelta(days=1)
+    return usage
+
+
+def get_availability(products, start_date, end_date, exclude_order_id=None):
+    """
+    Get free units for each product in a date range.
+    
+    Args:
+        products: Product queryset; it is used as a subquery, so the
+            reservations are restricted to it without listing ids
+        start_date: Start date (inclusive)
+        end_date: End date (inclusive)
+        exclude_order_id: Optional order to leave out of the reservations
+    
+    Returns:
+        list of dicts with stock, reserved and available units per product
+    """
+    reserved = get_reserved_quantities(
+        start_date,
+        end_date,
+        product_ids=products.values('id'),
+        exclude_order_id=exclude_order_id,
+    )
+    
+    return [
+        {
+            'product': product['id'],
+            'name': product['name'],
+            'category': product['category'],
+            'stock': product['stock'],
+            'reserved': reserved.get(product['id'], 0),
+            'available': product['stock'] - reserved.get(product['id'], 0),
+        }
+        for product in products.values('id', 'name', 'category', 'stock')
+    ]
@@ -0,0 +1,170 @@
+"""
+Tests for the stock availability services and the product cache.
+"""
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from apps.orders.models import Order, OrderItem
+from . import cache
+from .models import Product
+from .services import get_daily_reservations, get_reserved_quantities
+
+
+def day(number):
+    return date(2024, 5, number)
+
+
+class ReservedQuantitiesTests(TestCase):
+    """get_reserved_quantities() returns the peak of units in use, both window ends included."""
+    
+    def setUp(self):
+        self.chair = Product.objects.create(name='Silla', category='sillas', price_per_unit='10.00', stock=50)
+        self.table = Product.objects.create(name='Mesa', category='mesas', price_per_unit='25.50', stock=10)
+    
+    def book(self, delivery, returned, quantity, product=None, status='pendiente'):
+        order = Order.objects.create(
+            customer_name='Ana',
+            customer_phone='11-4000-1234',
+            event_date=delivery,
+            delivery_date=delivery,
+            return_date=returned,
+            status=status,
+        )
+        product = product or self.chair
+        OrderItem.objects.create(order=order, product=product, quantity=quantity, unit_price=product.price_per_unit)
+        return order
+    
+    def reserved(self, start, end, **kwargs):
+        return get_reserved_quantities(start, end, **kwargs).get(self.chair.id, 0)
+    
+    def test_overlapping_windows_add_up(self):
+        self.book(day(1), day(5), 3)
+        self.book(day(3), day(7), 4)
+        
+        self.assertEqual(self.reserved(day(1), day(10)), 7)
+        self.assertEqual(self.reserved(day(1), day(2)), 3)
+        self.assertEqual(self.reserved(day(6), day(10)), 4)
+        self.assertEqual(self.reserved(day(8), day(10)), 0)
+    
+    def test_windows_that_touch(self):
+        # The return day is still in use: a delivery that day overlaps
+        self.book(day(1), day(5), 3)
+        self.book(day(5), day(7), 4)
+        self.assertEqual(self.reserved(day(1), day(10)), 7)
+        self.assertEqual(self.reserved(day(5), day(5)), 7)
+        
+        # Delivering the day after the return does not
+        self.book(day(8), day(9), 4)
+        self.assertEqual(self.reserved(day(7), day(9)), 4)
+        self.assertEqual(self.reserved(day(8), day(9)), 4)
+    
+    def test_peak_is_not_the_sum(self):
+        self.book(day(1), day(2), 5)
+        self.book(day(4), day(5), 5)
+        self.book(day(1), day(5), 1)
+        
+        self.assertEqual(self.reserved(day(1), day(5)), 6)
+        self.assertEqual(self.reserved(day(3), day(3)), 1)
+    
+    def test_cancelled_orders_are_excluded(self):
+        self.book(day(1), day(5), 3)
+        self.book(day(1), day(5), 20, status='cancelado')
+        self.book(day(1), day(5), 2, status='entregado')
+        
+        self.assertEqual(self.reserved(day(1), day(5)), 5)
+    
+    def test_exclude_order_id(self):
+        kept = self.book(day(1), day(5), 3)
+        edited = self.book(day(2), day(3), 4)
+        
+        self.assertEqual(self.reserved(day(1), day(5), exclude_order_id=edited.id), 3)
+        self.assertEqual(self.reserved(day(1), day(5), exclude_order_id=kept.id), 4)
+    
+    def test_products_are_separate_and_filtered(self):
+        self.book(day(1), day(5), 3)
+        self.book(day(1), day(5), 2, product=self.table)
+        
+        self.assertEqual(get_reserved_quantities(day(1), day(5)), {self.chair.id: 3, self.table.id: 2})
+        self.assertEqual(get_reserved_quantities(day(1), day(5), product_ids=[self.table.id]), {self.table.id: 2})
+    
+    def test_one_query_matching_the_daily_usage(self):
+        windows = [(1, 4, 2), (2, 2, 5), (3, 9, 1), (4, 6, 3), (9, 12, 6), (11, 11, 1)]
+        for delivery, returned, quantity in windows:
+            self.book(day(delivery), day(returned), quantity)
+        
+        for start, end in [(1, 15), (2, 3), (5, 8), (10, 10), (13, 15)]:
+            with self.subTest(start=start, end=end):
+                with self.assertNumQueries(1):
+                    reserved = self.reserved(day(start), day(end))
+                usage = get_daily_reservations(day(start), day(end), [self.chair.id])[self.chair.id]
+                days = [day(start) + timedelta(days=offset) for offset in range(end - start + 1)]
+                self.assertEqual(reserved, max(usage[each] for each in days))
+
+
+class ProductCacheTests(TestCase):
+    
+    def setUp(self):
+        cache._cache().clear()
+        cache._local.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products = [
+                Product.objects.create(name=name, category='sillas', price_per_unit='10.00', stock=10)
+                for name in ('Silla', 'Banqueta', 'Sillón')
+            ]
+        self.client.force_login(User.objects.create_user('ana'))
+    
+    def test_save_and_delete_bump_the_version_after_commit(self):
+        for change in (self.products[0].save, self.products[1].delete):
+            with self.subTest(change=change.__name__):
+                version = cache.catalog_version()
+                with self.captureOnCommitCallbacks() as callbacks:
+                    change()
+                    self.assertEqual(cache.catalog_version(), version)
+                for callback in callbacks:
+                    callback()
+                self.assertGreater(cache.catalog_version(), version)
+    
+    def test_catalog_etag(self):
+        for url in ('/api/products/', f'/api/products/{self.products[0].id}/'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                etag = response['ETag']
+                
+                with mock.patch('apps.products.views.aget_or_build') as get_or_build:
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                get_or_build.assert_not_called()
+                
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.products[0].save()
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+    
+    def test_get_products_is_one_batched_lookup(self):
+        product_ids = [product.id for product in self.products] + [0]
+        shared = cache._cache()
+        
+        with mock.patch.object(shared, 'get_many', wraps=shared.get_many) as get_many, \
+                self.assertNumQueries(1):
+            products = cache.get_products(product_ids)
+        get_many.assert_called_once()
+        self.assertEqual(products, {product.id: product for product in self.products})
+        
+        # Another process: only the shared cache has them. The unknown id
+        # is never cached, so it costs one query each time
+        cache._local.clear()
+        with mock.patch.object(shared, 'get_many', wraps=shared.get_many) as get_many, \
+                self.assertNumQueries(1):
+            self.assertEqual(set(cache.get_products(product_ids)), set(product_ids[:-1]))
+        get_many.assert_called_once()
+        
+        # The same process: only the unknown id goes past the local tier
+        with mock.patch.object(shared, 'get_many', wraps=shared.get_many) as get_many, \
+                self.assertNumQueries(1):
+            self.assertEqual(set(cache.get_products(product_ids)), set(product_ids[:-1]))
+        get_many.assert_called_once_with([cache._key(cache.catalog_version(), 'product:0')])
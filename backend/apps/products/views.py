@@ -1,26 +1,47 @@
 """
 API views for Product management.
 """
-from rest_framework import viewsets, filters
+from datetime import date
+
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags
 from django_filters.rest_framework import DjangoFilterBackend
 
 from .models import Product
 from .serializers import ProductSerializer, ProductListSerializer
+from .services import get_availability
+from .cache import acatalog_version, aget_or_build, request_key
+from config.async_views import AsyncDispatchMixin, AsyncReadMixin
+from config.search import SearchTextFilter, RankedOrderingFilter
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(AsyncDispatchMixin, AsyncReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing products.
     
-    Provides CRUD operations for rental products.
+    Provides CRUD operations for rental products. The cached reads are
+    async (see config.async_views).
     """
     queryset = Product.objects.all()
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['name', 'description']
+    # Indexed search over name and description (see config.search)
+    filter_backends = [SearchTextFilter, RankedOrderingFilter]
     ordering_fields = ['name', 'price_per_unit', 'stock', 'category']
     ordering = ['category', 'name']
+    # Max queries per action, session and user included (see config.profiling)
+    query_budgets = {
+        'list': 4,
+        'retrieve': 3,
+        'create': 3,
+        'update': 4,
+        'partial_update': 4,
+        'destroy': 6,
+        'availability': 4,
+    }
     
     def get_serializer_class(self):
         """Use lightweight serializer for list action."""
@@ -28,6 +49,39 @@ class ProductViewSet(viewsets.ModelViewSet):
             return ProductListSerializer
         return ProductSerializer
     
+    async def list(self, request, *args, **kwargs):
+        """List products, cached until the catalog changes."""
+        async def build():
+            response = await super(ProductViewSet, self).list(request, *args, **kwargs)
+            return response.data
+        return await self._cached_response(request, build)
+    
+    async def retrieve(self, request, *args, **kwargs):
+        """Return a product, cached until the catalog changes."""
+        async def build():
+            response = await super(ProductViewSet, self).retrieve(request, *args, **kwargs)
+            return response.data
+        return await self._cached_response(request, build)
+    
+    async def _cached_response(self, request, build):
+        """
+        Serve a catalog read from the product cache.
+        
+        The catalog version is sent as ETag: a matching If-None-Match gets
+        a 304 without touching the cache or the database.
+        """
+        version = await acatalog_version()
+        etag = f'"catalog-{version}"'
+        
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = Response(await aget_or_build(request_key(request), build, version))
+        
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+    
     def get_queryset(self):
         """Filter by category and active status if provided."""
         queryset = Product.objects.all()
@@ -43,3 +97,57 @@ class ProductViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(is_active=is_active.lower() == 'true')
         
         return queryset
+    
+    @action(detail=False, methods=['get'])
+    def availability(self, request):
+        """
+        Get free units per product for a date range.
+        
+        Query params:
+            start_date: Required start date in YYYY-MM-DD format
+            end_date: Required end date in YYYY-MM-DD format
+            product: Optional product ids, comma separated
+            category, is_active, search: Same filters as the list
+        """
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date')
+        
+        if not start_date or not end_date:
+            return Response(
+                {'error': 'Se requieren start_date y end_date'},
+                status=400
+            )
+        
+        try:
+            start = date.fromisoformat(start_date)
+            end = date.fromisoformat(end_date)
+        except ValueError:
+            return Response(
+                {'error': 'Formato de fecha inválido. Use YYYY-MM-DD'},
+                status=400
+            )
+        
+        if start > end:
+            return Response(
+                {'error': 'start_date debe ser anterior a end_date'},
+                status=400
+            )
+        
+        products = self.filter_queryset(self.get_queryset())
+        
+        product_ids = request.query_params.get('product')
+        if product_ids:
+            try:
+                ids = [int(pk) for pk in product_ids.split(',') if pk]
+            except ValueError:
+                return Response(
+                    {'error': 'IDs de producto inválidos'},
+                    status=400
+                )
+            products = products.filter(id__in=ids)
+        
+        return Response({
+            'start_date': start.isoformat(),
+            'end_date': end.isoformat(),
+            'products': get_availability(products, start, end),
+        })
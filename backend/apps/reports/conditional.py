@@ -0,0 +1,87 @@
+"""
+Conditional GET and payload caching for the revenue reports.
+
+A report only depends on the delivered orders of its date range, so the
+count and latest updated_at of those orders (one indexed aggregate
+query) identify its content: they give the ETag, and a matching
+If-None-Match gets a 304 without building the report. Editing,
+delivering, cancelling or deleting an order in the range changes one of
+the two.
+
+No Last-Modified is sent: deleting an order, or moving one out of the
+range, does not make the latest updated_at newer, so If-Modified-Since
+alone would answer 304 for a changed report.
+
+Reports of closed periods (ending before today) are also cached, keyed
+by the same validators, so a change in the range simply makes a new key.
+Both steps use the async ORM and cache API (the report views are async).
+"""
+import hashlib
+import json
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from rest_framework.response import Response
+
+from .services import delivered_orders
+
+
+# Bump when the report payload changes so cached reports are not reused
+REPORT_LAYOUT_VERSION = 1
+
+
+async def areport_validators(start_date, end_date):
+    """
+    Return (orders count, last updated_at) of the delivered orders in a range.
+    
+    Uses the (status, event_date) index; costs one query.
+    """
+    result = await delivered_orders(start_date, end_date).order_by().aaggregate(
+        count=Count('id'),
+        last_modified=Max('updated_at'),
+    )
+    return result['count'], result['last_modified']
+
+
+async def areport_response(request, start_date, end_date, build):
+    """
+    Build a report response with conditional GET support (async views).
+    
+    Args:
+        request: The GET request (its path and params are part of the key)
+        start_date, end_date: Date range the report covers
+        build: Callable returning an awaitable of the report dict, only
+            called when needed
+    
+    Returns:
+        Response with the report, or a 304 response
+    """
+    count, last_modified = await areport_validators(start_date, end_date)
+    content = [
+        REPORT_LAYOUT_VERSION,
+        request.get_full_path(),
+        count,
+        last_modified.isoformat() if last_modified else None,
+    ]
+    key = hashlib.sha256(json.dumps(content).encode('utf-8')).hexdigest()
+    etag = f'"{key}"'
+    
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        if end_date < date.today():
+            config = settings.REPORT_CACHE
+            cache = caches[config['ALIAS']]
+            report = await cache.aget(f'reports:{key}')
+            if report is None:
+                report = await build()
+                await cache.aset(f'reports:{key}', report, config['TIMEOUT'])
+        else:
+            report = await build()
+        response = Response(report)
+    
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,51 @@
+"""
+Rebuild or verify the DailyRevenue rollup table.
+
+Usage:
+    python manage.py rebuild_rollups
+    python manage.py rebuild_rollups --start 2025-01-01 --end 2025-12-31
+    python manage.py rebuild_rollups --check
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.reports.rollups import rebuild_rollups, check_rollups
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f'Fecha inválida: {value}. Use YYYY-MM-DD')
+
+
+class Command(BaseCommand):
+    help = 'Recalcula la tabla de facturación diaria a partir de los pedidos.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=parse_date, help='Fecha inicial (YYYY-MM-DD)')
+        parser.add_argument('--end', type=parse_date, help='Fecha final (YYYY-MM-DD)')
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Solo verificar la consistencia, sin modificar datos.'
+        )
+    
+    def handle(self, *args, **options):
+        start, end = options['start'], options['end']
+        
+        if options['check']:
+            mismatches = check_rollups(start, end)
+            for mismatch in mismatches:
+                self.stdout.write(
+                    f"{mismatch['date']} {mismatch['status']}: "
+                    f"esperado={mismatch['expected']} guardado={mismatch['stored']}"
+                )
+            if mismatches:
+                raise CommandError(f'{len(mismatches)} filas inconsistentes.')
+            self.stdout.write(self.style.SUCCESS('Rollups consistentes.'))
+            return
+        
+        count = rebuild_rollups(start, end)
+        self.stdout.write(self.style.SUCCESS(f'{count} filas recalculadas.'))
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:54
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Fecha del evento')),
+                ('status', models.CharField(choices=[('pendiente', 'Pendiente'), ('entregado', 'Entregado'), ('cancelado', 'Cancelado')], max_length=20, verbose_name='Estado')),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Facturación')),
+                ('orders_count', models.IntegerField(default=0, verbose_name='Cantidad de pedidos')),
+                ('items_count', models.IntegerField(default=0, verbose_name='Cantidad de items')),
+                ('categories', models.JSONField(blank=True, default=dict, verbose_name='Detalle por categoría')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Facturación diaria',
+                'verbose_name_plural': 'Facturación diaria',
+                'ordering': ['date', 'status'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrevenue',
+            constraint=models.UniqueConstraint(fields=('date', 'status'), name='unique_daily_revenue_date_status'),
+        ),
+    ]
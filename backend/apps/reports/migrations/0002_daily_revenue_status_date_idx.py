@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailyrevenue',
+            index=models.Index(fields=['status', 'date'], name='daily_revenue_status_date_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+"""
+Rollup models for revenue reports.
+"""
+from decimal import Decimal
+from django.db import models
+
+from apps.orders.models import Order
+
+
+class DailyRevenue(models.Model):
+    """
+    Pre-aggregated totals of the orders with a given event date and status.
+    
+    Kept up to date incrementally by apps.reports.rollups whenever an
+    order is created, updated, or changes status.
+    """
+    date = models.DateField(
+        verbose_name='Fecha del evento'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=Order.STATUS_CHOICES,
+        verbose_name='Estado'
+    )
+    revenue = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Facturación'
+    )
+    orders_count = models.IntegerField(
+        default=0,
+        verbose_name='Cantidad de pedidos'
+    )
+    items_count = models.IntegerField(
+        default=0,
+        verbose_name='Cantidad de items'
+    )
+    categories = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Detalle por categoría'
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Facturación diaria'
+        verbose_name_plural = 'Facturación diaria'
+        ordering = ['date', 'status']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'status'],
+                name='unique_daily_revenue_date_status'
+            ),
+        ]
+        indexes = [
+            # Reports filter one status over a date range
+            models.Index(
+                fields=['status', 'date'],
+                name='daily_revenue_status_date_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} - {self.status}: ${self.revenue}"
@@ -0,0 +1,292 @@
+"""
+Incremental maintenance of the DailyRevenue rollup table.
+
+Order writes take a snapshot of the order before and after the change
+and apply the difference to the affected (date, status) rows, and to
+the stats of the affected customers, inside the same transaction.
+rebuild_rollups() and check_rollups() recompute the table from
+Order/OrderItem for repairs and consistency checks.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum, F, Count
+
+from apps.customers.stats import apply_customer_changes
+from apps.orders.models import Order, OrderItem
+from .models import DailyRevenue
+
+
+CENT = Decimal('0.01')
+
+
+def _empty_totals():
+    return {
+        'revenue': Decimal('0.00'),
+        'orders_count': 0,
+        'items_count': 0,
+        'categories': defaultdict(lambda: {'revenue': Decimal('0.00'), 'items': 0}),
+    }
+
+
+def _serialize_categories(categories):
+    """Convert category totals to a JSON friendly dict, dropping empty ones."""
+    return {
+        category: {
+            'revenue': str(values['revenue'].quantize(CENT)),
+            'items': values['items'],
+        }
+        for category, values in sorted(categories.items())
+        if values['items'] or values['revenue']
+    }
+
+
+def _load_categories(data):
+    categories = defaultdict(lambda: {'revenue': Decimal('0.00'), 'items': 0})
+    for category, values in (data or {}).items():
+        categories[category] = {
+            'revenue': Decimal(values['revenue']),
+            'items': values['items'],
+        }
+    return categories
+
+
+def order_snapshot(order, items=None):
+    """
+    Return the contribution of an order to the rollups.
+    
+    Uses the given items or prefetched items when available, otherwise
+    loads the items in one query. Items are bucketed by the category saved
+    on them, not the product's current one.
+    """
+    if order is None or order.pk is None:
+        return None
+    
+    if items is None:
+        items = order._prefetched_items()
+    if items is None:
+        items = order.items.all()
+    
+    totals = _empty_totals()
+    totals['orders_count'] = 1
+    for item in items:
+        category = totals['categories'][item.category]
+        category['revenue'] += item.subtotal
+        category['items'] += item.quantity
+        totals['revenue'] += item.subtotal
+        totals['items_count'] += item.quantity
+    
+    return {
+        'date': order.event_date,
+        'status': order.status,
+        'customer_id': order.customer_id,
+        'totals': totals,
+    }
+
+
+def _add_snapshot(deltas, snapshot, sign):
+    if snapshot is None:
+        return
+    delta = deltas[(snapshot['date'], snapshot['status'])]
+    totals = snapshot['totals']
+    delta['revenue'] += sign * totals['revenue']
+    delta['orders_count'] += sign * totals['orders_count']
+    delta['items_count'] += sign * totals['items_count']
+    for name, values in totals['categories'].items():
+        delta['categories'][name]['revenue'] += sign * values['revenue']
+        delta['categories'][name]['items'] += sign * values['items']
+
+
+def _apply_delta(row, delta):
+    """Add a delta to a locked rollup row (in memory)."""
+    categories = _load_categories(row.categories)
+    for name, values in delta['categories'].items():
+        categories[name]['revenue'] += values['revenue']
+        categories[name]['items'] += values['items']
+    
+    row.revenue += delta['revenue']
+    row.orders_count += delta['orders_count']
+    row.items_count += delta['items_count']
+    row.categories = _serialize_categories(categories)
+
+
+def _has_changes(delta):
+    return (
+        delta['revenue']
+        or delta['orders_count']
+        or delta['items_count']
+        or any(v['revenue'] or v['items'] for v in delta['categories'].values())
+    )
+
+
+def update_order_rollups(before, after):
+    """
+    Move an order's contribution from the `before` to the `after` snapshot.
+    
+    Either snapshot may be None (order created or removed).
+    """
+    apply_rollup_changes([(before, after)])
+
+
+@transaction.atomic
+def apply_rollup_changes(changes):
+    """
+    Apply many (before, after) snapshot pairs at once.
+    
+    Changes to the same (date, status) are merged, so each affected row is
+    locked once (all in one query) and written once. Rows are locked in
+    (date, status) order so concurrent writers cannot deadlock.
+    """
+    changes = list(changes)
+    deltas = defaultdict(_empty_totals)
+    for before, after in changes:
+        _add_snapshot(deltas, before, -1)
+        _add_snapshot(deltas, after, 1)
+    
+    # Customer stats move with the same snapshots
+    apply_customer_changes(changes)
+    
+    deltas = {key: delta for key, delta in deltas.items() if _has_changes(delta)}
+    if not deltas:
+        return
+    
+    # Make sure every row exists, then lock them all in one query
+    DailyRevenue.objects.bulk_create(
+        [DailyRevenue(date=row_date, status=row_status) for row_date, row_status in deltas],
+        ignore_conflicts=True
+    )
+    rows = DailyRevenue.objects.select_for_update().filter(
+        date__in={row_date for row_date, _ in deltas},
+        status__in={row_status for _, row_status in deltas},
+    ).order_by('date', 'status')
+    
+    to_delete = []
+    for row in rows:
+        delta = deltas.get((row.date, row.status))
+        if delta is None:
+            continue
+        _apply_delta(row, delta)
+        if row.orders_count == 0:
+            to_delete.append(row.id)
+        else:
+            # Plain UPDATEs are cheaper than bulk_update's CASE expressions
+            row.save(update_fields=[
+                'revenue', 'orders_count', 'items_count', 'categories', 'updated_at'
+            ])
+    
+    if to_delete:
+        DailyRevenue.objects.filter(id__in=to_delete).delete()
+
+
+def compute_rollups(start_date=None, end_date=None):
+    """
+    Compute rollup rows from scratch with two grouped queries.
+    
+    Returns:
+        dict mapping (date, status) to totals
+    """
+    orders = Order.objects.all()
+    if start_date:
+        orders = orders.filter(event_date__gte=start_date)
+    if end_date:
+        orders = orders.filter(event_date__lte=end_date)
+    
+    rows = defaultdict(_empty_totals)
+    
+    for row in orders.order_by().values('event_date', 'status').annotate(
+        count=Count('id')
+    ):
+        rows[(row['event_date'], row['status'])]['orders_count'] = row['count']
+    
+    item_rows = OrderItem.objects.filter(order__in=orders).order_by().values(
+        'order__event_date',
+        'order__status',
+        'category',
+    ).annotate(
+        revenue=Sum(F('quantity') * F('unit_price')),
+        items=Sum('quantity'),
+    )
+    for row in item_rows:
+        totals = rows[(row['order__event_date'], row['order__status'])]
+        revenue = row['revenue'] or Decimal('0.00')
+        totals['revenue'] += revenue
+        totals['items_count'] += row['items']
+        category = totals['categories'][row['category']]
+        category['revenue'] += revenue
+        category['items'] += row['items']
+    
+    return rows
+
+
+def _range_rows(start_date=None, end_date=None):
+    rows = DailyRevenue.objects.all()
+    if start_date:
+        rows = rows.filter(date__gte=start_date)
+    if end_date:
+        rows = rows.filter(date__lte=end_date)
+    return rows
+
+
+@transaction.atomic
+def rebuild_rollups(start_date=None, end_date=None):
+    """
+    Replace the rollup rows in a date range with freshly computed ones.
+    
+    Returns:
+        Number of rows written
+    """
+    computed = compute_rollups(start_date, end_date)
+    _range_rows(start_date, end_date).delete()
+    DailyRevenue.objects.bulk_create([
+        DailyRevenue(
+            date=row_date,
+            status=row_status,
+            revenue=totals['revenue'],
+            orders_count=totals['orders_count'],
+            items_count=totals['items_count'],
+            categories=_serialize_categories(totals['categories']),
+        )
+        for (row_date, row_status), totals in sorted(computed.items())
+    ])
+    return len(computed)
+
+
+def check_rollups(start_date=None, end_date=None):
+    """
+    Compare stored rollups against freshly computed values.
+    
+    Returns:
+        List of dicts describing each (date, status) that differs
+    """
+    computed = {
+        key: {
+            'revenue': totals['revenue'].quantize(CENT),
+            'orders_count': totals['orders_count'],
+            'items_count': totals['items_count'],
+            'categories': _serialize_categories(totals['categories']),
+        }
+        for key, totals in compute_rollups(start_date, end_date).items()
+    }
+    stored = {
+        (row.date, row.status): {
+            'revenue': row.revenue.quantize(CENT),
+            'orders_count': row.orders_count,
+            'items_count': row.items_count,
+            'categories': row.categories,
+        }
+        for row in _range_rows(start_date, end_date)
+    }
+    
+    mismatches = []
+    for key in sorted(set(computed) | set(stored)):
+        expected = computed.get(key)
+        actual = stored.get(key)
+        if expected != actual:
+            mismatches.append({
+                'date': key[0],
+                'status': key[1],
+                'expected': expected,
+                'stored': actual,
+            })
+    return mismatches
@@ -19,6 +19,7 @@ class RevenueReportSerializer(serializers.Serializer):
     end_date = serializers.DateField()
     total_revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
     orders_count = serializers.IntegerField()
+    categories = serializers.DictField()
     orders = OrderSummarySerializer(many=True)
 
 
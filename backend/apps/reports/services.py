@@ -1,20 +1,103 @@
 """
 Revenue reporting services.
 
-IMPORTANT: All calculations are done dynamically from the database.
-No caching is used to ensure reports are always accurate.
+Period totals are read from the DailyRevenue rollup table, which is
+updated in the same transaction as every order write (see rollups.py),
+so reports stay accurate while reading one row per day and status.
+
+The a-prefixed functions are the same reports for async views.
 """
 from datetime import date, timedelta
 from decimal import Decimal
-from django.db.models import Sum, F, Count
+from django.db.models import Sum, Q
 from apps.orders.models import Order
+from config.async_views import run_concurrently
+from config.metrics import Histogram
+from .models import DailyRevenue
+
+
+REPORT_SECONDS = Histogram(
+    'report_build_seconds',
+    'Tiempo de cálculo de los reportes',
+    ['report'],
+)
+
+
+def delivered_orders(start_date, end_date):
+    """Delivered orders with event_date in [start_date, end_date]."""
+    return Order.objects.filter(
+        status='entregado',
+        event_date__gte=start_date,
+        event_date__lte=end_date
+    )
+
+
+def _revenue_querysets(start_date, end_date):
+    """(delivered rollups, delivered order rows) of a date range."""
+    rollups = DailyRevenue.objects.filter(
+        status='entregado',
+        date__gte=start_date,
+        date__lte=end_date
+    )
+    rows = delivered_orders(start_date, end_date).with_totals().order_by(
+        '-event_date', '-id'
+    ).values(
+        'id',
+        'customer_name',
+        'event_date',
+        'annotated_total',
+        'annotated_items_count',
+    )
+    return rollups, rows
 
 
+def _revenue_report(start_date, end_date, rollups, rows):
+    total_revenue = Decimal('0.00')
+    orders_count = 0
+    categories = {}
+    
+    for rollup in rollups:
+        total_revenue += rollup.revenue
+        orders_count += rollup.orders_count
+        for name, values in rollup.categories.items():
+            category = categories.setdefault(
+                name,
+                {'revenue': Decimal('0.00'), 'items': 0}
+            )
+            category['revenue'] += Decimal(values['revenue'])
+            category['items'] += values['items']
+    
+    orders_data = [
+        {
+            'id': row['id'],
+            'customer_name': row['customer_name'],
+            'event_date': row['event_date'].isoformat(),
+            'items_count': row['annotated_items_count'],
+            'total': row['annotated_total'],
+        }
+        for row in rows
+    ]
+    
+    return {
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'total_revenue': total_revenue,
+        'orders_count': orders_count,
+        'categories': categories,
+        'orders': orders_data,
+    }
+
+
+@REPORT_SECONDS.time('revenue')
 def get_revenue_report(start_date, end_date):
     """
     Calculate revenue for a date range.
     Only includes orders with status='entregado'.
     
+    Totals and the per-category breakdown come from the DailyRevenue
+    rollups (one row per day); the order list is a single grouped query.
+    Amounts are kept as Decimal.
+    
     Args:
         start_date: Start date (inclusive)
         end_date: End date (inclusive)
@@ -22,140 +105,175 @@ def get_revenue_report(start_date, end_date):
     Returns:
         dict with total revenue, order count, and order list
     """
-    # Query orders in date range with 'entregado' status
-    orders = Order.objects.filter(
-        status='entregado',
-        event_date__gte=start_date,
-        event_date__lte=end_date
-    ).prefetch_related('items__product').order_by('-event_date')
-    
-    # Calculate totals dynamically
-    total_revenue = Decimal('0.00')
-    orders_data = []
-    
-    for order in orders:
-        order_total = order.total  # Calculated property
-        total_revenue += order_total
-        orders_data.append({
-            'id': order.id,
-            'customer_name': order.customer_name,
-            'event_date': order.event_date.isoformat(),
-            'items_count': order.items_count,
-            'total': float(order_total),
-        })
-    
-    return {
-        'start_date': start_date.isoformat(),
-        'end_date': end_date.isoformat(),
-        'total_revenue': float(total_revenue),
-        'orders_count': len(orders_data),
-        'orders': orders_data,
-    }
+    return _revenue_report(start_date, end_date, *_revenue_querysets(start_date, end_date))
+
+
+@REPORT_SECONDS.time('revenue')
+async def aget_revenue_report(start_date, end_date):
+    """get_revenue_report, reading the rollups and the order list concurrently."""
+    rollups, rows = _revenue_querysets(start_date, end_date)
+    rollups, rows = await run_concurrently(lambda: list(rollups), lambda: list(rows))
+    return _revenue_report(start_date, end_date, rollups, rows)
+
+
+def week_range(target_date):
+    """Monday and Sunday of the week containing target_date."""
+    start_of_week = target_date - timedelta(days=target_date.weekday())
+    return start_of_week, start_of_week + timedelta(days=6)
+
+
+def month_range(year, month):
+    """First and last day of a month."""
+    start_of_month = date(year, month, 1)
+    if month == 12:
+        end_of_month = date(year + 1, 1, 1) - timedelta(days=1)
+    else:
+        end_of_month = date(year, month + 1, 1) - timedelta(days=1)
+    return start_of_month, end_of_month
+
+
+def _target_date(target_date):
+    if target_date is None:
+        return date.today()
+    if isinstance(target_date, str):
+        return date.fromisoformat(target_date)
+    return target_date
+
+
+def _month(year, month):
+    today = date.today()
+    return (today.year if year is None else year), (today.month if month is None else month)
 
 
+@REPORT_SECONDS.time('daily')
 def get_daily_report(target_date=None):
     """Get revenue report for a specific day."""
-    if target_date is None:
-        target_date = date.today()
-    elif isinstance(target_date, str):
-        target_date = date.fromisoformat(target_date)
-    
+    target_date = _target_date(target_date)
     return get_revenue_report(target_date, target_date)
 
 
+@REPORT_SECONDS.time('daily')
+async def aget_daily_report(target_date=None):
+    target_date = _target_date(target_date)
+    return await aget_revenue_report(target_date, target_date)
+
+
+@REPORT_SECONDS.time('weekly')
 def get_weekly_report(target_date=None):
     """Get revenue report for the week containing target_date."""
-    if target_date is None:
-        target_date = date.today()
-    elif isinstance(target_date, str):
-        target_date = date.fromisoformat(target_date)
-    
-    # Get start of week (Monday)
-    start_of_week = target_date - timedelta(days=target_date.weekday())
-    end_of_week = start_of_week + timedelta(days=6)
-    
-    report = get_revenue_report(start_of_week, end_of_week)
+    target_date = _target_date(target_date)
+    report = get_revenue_report(*week_range(target_date))
     report['week_number'] = target_date.isocalendar()[1]
     return report
 
 
+@REPORT_SECONDS.time('weekly')
+async def aget_weekly_report(target_date=None):
+    target_date = _target_date(target_date)
+    report = await aget_revenue_report(*week_range(target_date))
+    report['week_number'] = target_date.isocalendar()[1]
+    return report
+
+
+@REPORT_SECONDS.time('monthly')
 def get_monthly_report(year=None, month=None):
     """Get revenue report for a specific month."""
-    if year is None:
-        year = date.today().year
-    if month is None:
-        month = date.today().month
-    
-    # Get start and end of month
-    start_of_month = date(year, month, 1)
-    if month == 12:
-        end_of_month = date(year + 1, 1, 1) - timedelta(days=1)
-    else:
-        end_of_month = date(year, month + 1, 1) - timedelta(days=1)
-    
-    report = get_revenue_report(start_of_month, end_of_month)
+    year, month = _month(year, month)
+    report = get_revenue_report(*month_range(year, month))
     report['year'] = year
     report['month'] = month
     return report
 
 
-def get_summary_report():
-    """
-    Get a summary with today, this week, and this month totals.
-    Useful for dashboard display.
-    """
-    today = date.today()
+@REPORT_SECONDS.time('monthly')
+async def aget_monthly_report(year=None, month=None):
+    year, month = _month(year, month)
+    report = await aget_revenue_report(*month_range(year, month))
+    report['year'] = year
+    report['month'] = month
+    return report
+
+
+def _summary_query(today):
+    """(rollups queryset, aggregates) of the summary, see get_summary_report."""
+    start_of_week, end_of_week = week_range(today)
+    start_of_month, end_of_month = month_range(today.year, today.month)
     
-    # Today's revenue
-    today_orders = Order.objects.filter(
-        status='entregado',
-        event_date=today
-    )
-    today_total = sum(order.total for order in today_orders)
+    periods = {
+        'today': Q(date=today),
+        'week': Q(date__gte=start_of_week, date__lte=end_of_week),
+        'month': Q(date__gte=start_of_month, date__lte=end_of_month),
+    }
+    delivered = Q(status='entregado')
     
-    # This week's revenue
-    start_of_week = today - timedelta(days=today.weekday())
-    end_of_week = start_of_week + timedelta(days=6)
-    week_orders = Order.objects.filter(
-        status='entregado',
-        event_date__gte=start_of_week,
-        event_date__lte=end_of_week
-    )
-    week_total = sum(order.total for order in week_orders)
+    aggregates = {}
+    for name, period in periods.items():
+        aggregates[f'{name}_total'] = Sum('revenue', filter=delivered & period)
+        aggregates[f'{name}_count'] = Sum('orders_count', filter=delivered & period)
+    aggregates['pending_count'] = Sum('orders_count', filter=Q(status='pendiente'))
     
-    # This month's revenue
-    start_of_month = date(today.year, today.month, 1)
-    if today.month == 12:
-        end_of_month = date(today.year + 1, 1, 1) - timedelta(days=1)
-    else:
-        end_of_month = date(today.year, today.month + 1, 1) - timedelta(days=1)
-    month_orders = Order.objects.filter(
-        status='entregado',
-        event_date__gte=start_of_month,
-        event_date__lte=end_of_month
+    # Only scan pending rows and delivered rows in the widest period
+    rollups = DailyRevenue.objects.filter(
+        Q(status='pendiente') |
+        Q(
+            status='entregado',
+            date__gte=min(start_of_week, start_of_month),
+            date__lte=max(end_of_week, end_of_month)
+        )
     )
-    month_total = sum(order.total for order in month_orders)
+    return rollups, aggregates
+
+
+def _summary(today, result):
+    start_of_week, end_of_week = week_range(today)
     
-    # Pending orders count
-    pending_count = Order.objects.filter(status='pendiente').count()
+    def period_total(name):
+        return result[f'{name}_total'] or Decimal('0.00')
     
     return {
         'today': {
             'date': today.isoformat(),
-            'total': float(today_total),
-            'orders_count': today_orders.count(),
+            'total': period_total('today'),
+            'orders_count': result['today_count'] or 0,
         },
         'week': {
             'start_date': start_of_week.isoformat(),
             'end_date': end_of_week.isoformat(),
-            'total': float(week_total),
-            'orders_count': week_orders.count(),
+            'total': period_total('week'),
+            'orders_count': result['week_count'] or 0,
         },
         'month': {
             'year': today.year,
             'month': today.month,
-            'total': float(month_total),
-            'orders_count': month_orders.count(),
+            'total': period_total('month'),
+            'orders_count': result['month_count'] or 0,
         },
-        'pending_orders': pending_count,
+        'pending_orders': result['pending_count'] or 0,
     }
+
+
+@REPORT_SECONDS.time('summary')
+def get_summary_report():
+    """
+    Get a summary with today, this week, and this month totals.
+    Useful for dashboard display.
+    
+    Every figure comes from a single conditional-aggregation query
+    (Sum with filter=Q(...)) over the DailyRevenue rollups.
+    """
+    today = date.today()
+    rollups, aggregates = _summary_query(today)
+    return _summary(today, rollups.aggregate(**aggregates))
+
+
+@REPORT_SECONDS.time('summary')
+async def aget_summary_report():
+    """
+    get_summary_report for async views.
+    
+    The today, week and month figures stay in one query: one scan of the
+    rollups beats three concurrent ones.
+    """
+    today = date.today()
+    rollups, aggregates = _summary_query(today)
+    return _summary(today, await rollups.aaggregate(**aggregates))
@@ -0,0 +1,240 @@
+"""
+Tests for the revenue reports and their rollups.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.orders.models import Order, OrderItem
+from apps.products.models import Product
+from .models import DailyRevenue
+from .rollups import check_rollups, rebuild_rollups
+from .services import get_daily_report, get_monthly_report, get_revenue_report, get_weekly_report
+
+
+REPORT_URL = '/api/reports/custom/?start_date=2024-01-01&end_date=2024-01-31'
+
+
+def create_order(event_date, name='Ana'):
+    return Order.objects.create(
+        customer_name=name,
+        customer_phone='11-4000-1234',
+        event_date=event_date,
+        delivery_date=event_date,
+        return_date=event_date,
+        status='entregado',
+    )
+
+
+class ConditionalReportTests(TestCase):
+    
+    def setUp(self):
+        self.first = create_order(date(2024, 1, 10))
+        self.second = create_order(date(2024, 1, 20), name='Bruno')
+        self.client.force_login(User.objects.create_user('ana'))
+    
+    def test_sends_etag_without_last_modified(self):
+        response = self.client.get(REPORT_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+    
+    def test_matching_etag_gets_not_modified(self):
+        etag = self.client.get(REPORT_URL)['ETag']
+        response = self.client.get(REPORT_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+    
+    def test_if_modified_since_alone_is_ignored(self):
+        response = self.client.get(
+            REPORT_URL, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+        )
+        self.assertEqual(response.status_code, 200)
+    
+    def test_deleting_an_order_changes_the_etag(self):
+        etag = self.client.get(REPORT_URL)['ETag']
+        self.first.delete()
+        
+        response = self.client.get(REPORT_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    def test_moving_an_order_out_of_the_range_changes_the_etag(self):
+        etag = self.client.get(REPORT_URL)['ETag']
+        self.second.event_date = date(2024, 2, 5)
+        self.second.save()
+        
+        response = self.client.get(REPORT_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class RollupTests(TestCase):
+    """Every order write keeps DailyRevenue equal to a fresh computation."""
+    
+    def setUp(self):
+        # Run the catalog cache bump, so the API does not see other tests' products
+        with self.captureOnCommitCallbacks(execute=True):
+            self.chair = Product.objects.create(name='Silla', category='sillas', price_per_unit='10.00', stock=50)
+            self.table = Product.objects.create(name='Mesa', category='mesas', price_per_unit='25.50', stock=10)
+        self.client.force_login(User.objects.create_user('ana'))
+    
+    def order_data(self, items, event_date=date(2024, 5, 1)):
+        return {
+            'customer_name': 'Ana Pérez',
+            'customer_phone': '11-4000-1234',
+            'event_date': event_date.isoformat(),
+            'delivery_date': event_date.isoformat(),
+            'return_date': event_date.isoformat(),
+            'items': [{'product': product.id, 'quantity': quantity} for product, quantity in items],
+        }
+    
+    def create_order(self):
+        response = self.client.post(
+            '/api/orders/', self.order_data([(self.chair, 4), (self.table, 2)]), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(check_rollups(), [])
+        return response.json()['id']
+    
+    def test_create(self):
+        self.create_order()
+        row = DailyRevenue.objects.get()
+        self.assertEqual((row.date, row.status), (date(2024, 5, 1), 'pendiente'))
+        self.assertEqual(row.revenue, 91)
+        self.assertEqual(row.categories, {
+            'mesas': {'revenue': '51.00', 'items': 2},
+            'sillas': {'revenue': '40.00', 'items': 4},
+        })
+    
+    def test_update(self):
+        order_id = self.create_order()
+        data = self.order_data([(self.chair, 7)], event_date=date(2024, 6, 1))
+        response = self.client.put(f'/api/orders/{order_id}/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(check_rollups(), [])
+        self.assertEqual(list(DailyRevenue.objects.values_list('date', flat=True)), [date(2024, 6, 1)])
+    
+    def test_change_status(self):
+        order_id = self.create_order()
+        response = self.client.patch(
+            f'/api/orders/{order_id}/change_status/', {'status': 'entregado'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(check_rollups(), [])
+        self.assertEqual(list(DailyRevenue.objects.values_list('status', flat=True)), ['entregado'])
+    
+    def test_destroy(self):
+        order_id = self.create_order()
+        response = self.client.delete(f'/api/orders/{order_id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(check_rollups(), [])
+        self.assertEqual(list(DailyRevenue.objects.values_list('status', flat=True)), ['cancelado'])
+    
+    def test_rebuild(self):
+        self.create_order()
+        DailyRevenue.objects.update(revenue=0, categories={})
+        self.assertEqual(len(check_rollups()), 1)
+        
+        self.assertEqual(rebuild_rollups(), 1)
+        self.assertEqual(check_rollups(), [])
+    
+    def test_product_category_change(self):
+        order_id = self.create_order()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.chair.category = 'mesas'
+            self.chair.save()
+        self.assertEqual(check_rollups(), [])
+        
+        # Editing the order afterwards still moves the sale out of its old bucket
+        data = self.order_data([(self.chair, 5), (self.table, 2)])
+        response = self.client.put(f'/api/orders/{order_id}/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(check_rollups(), [])
+
+
+class ReportQueryCountTests(TestCase):
+    """The reports run the same queries for one order or many, and add up in Decimal."""
+    
+    TARGET = date(2024, 5, 15)
+    
+    def setUp(self):
+        self.products = [
+            Product.objects.create(name=name, category=category, price_per_unit=price, stock=500)
+            for name, category, price in [
+                ('Silla', 'sillas', '10.00'), ('Mesa', 'mesas', '25.50'), ('Copa', 'cristaleria', '0.35'),
+            ]
+        ]
+        self.client.force_login(User.objects.create_user('ana'))
+        self.urls = [
+            f'/api/reports/daily/?date={self.TARGET}',
+            f'/api/reports/weekly/?date={self.TARGET}',
+            f'/api/reports/monthly/?year={self.TARGET.year}&month={self.TARGET.month}',
+            '/api/reports/custom/?start_date=2024-05-01&end_date=2024-05-31',
+        ]
+    
+    def create_orders(self, days, per_day):
+        """Delivered orders with every product on each day, rollups rebuilt."""
+        for day in days:
+            for index in range(per_day):
+                order = Order.objects.create(
+                    customer_name=f'Cliente {day.day}-{index}',
+                    customer_phone=f'11-4000-{day.day:02d}{index:02d}',
+                    event_date=day,
+                    delivery_date=day,
+                    return_date=day,
+                    status='entregado',
+                )
+                OrderItem.objects.bulk_create([
+                    OrderItem(order=order, product=product, category=product.category,
+                              quantity=index + position + 1, unit_price=product.price_per_unit)
+                    for position, product in enumerate(self.products)
+                ])
+        rebuild_rollups()
+    
+    def query_counts(self):
+        counts = {}
+        for url in self.urls:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            counts[url] = len(queries)
+        return counts
+    
+    def test_query_count_does_not_depend_on_the_orders(self):
+        self.create_orders([self.TARGET], per_day=1)
+        counts = self.query_counts()
+        
+        self.create_orders([date(2024, 5, 1) + timedelta(days=offset) for offset in range(31)], per_day=3)
+        self.assertEqual(self.query_counts(), counts)
+    
+    def test_totals_are_decimal_sums_of_the_orders(self):
+        self.create_orders([date(2024, 5, 1) + timedelta(days=offset) for offset in range(0, 31, 2)], per_day=2)
+        
+        reports = {
+            'daily': get_daily_report(self.TARGET),
+            'weekly': get_weekly_report(self.TARGET),
+            'monthly': get_monthly_report(2024, 5),
+            'custom': get_revenue_report(date(2024, 5, 10), date(2024, 5, 20)),
+        }
+        for name, report in reports.items():
+            with self.subTest(report=name):
+                orders = Order.objects.filter(
+                    status='entregado',
+                    event_date__gte=date.fromisoformat(report['start_date']),
+                    event_date__lte=date.fromisoformat(report['end_date']),
+                )
+                totals = {order.pk: order.total for order in orders}
+                
+                self.assertIsInstance(report['total_revenue'], Decimal)
+                self.assertEqual(report['total_revenue'], sum(totals.values()))
+                self.assertEqual(report['orders_count'], len(totals))
+                self.assertEqual({row['id']: row['total'] for row in report['orders']}, totals)
+                for row in report['orders']:
+                    self.assertIsInstance(row['total'], Decimal)
+                self.assertEqual(
+                    sum(category['revenue'] for category in report['categories'].values()),
+                    report['total_revenue'],
+                )
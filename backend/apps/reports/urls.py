@@ -8,6 +8,7 @@ from .views import (
     MonthlyReportView,
     CustomReportView,
     SummaryReportView,
+    ExportReportView,
 )
 
 urlpatterns = [
@@ -16,4 +17,5 @@ urlpatterns = [
     path('monthly/', MonthlyReportView.as_view(), name='report-monthly'),
     path('custom/', CustomReportView.as_view(), name='report-custom'),
     path('summary/', SummaryReportView.as_view(), name='report-summary'),
+    path('export/', ExportReportView.as_view(), name='report-export'),
 ]
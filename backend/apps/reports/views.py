@@ -6,79 +6,121 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
+from apps.orders.exports import order_rows, export_response, export_format_error
+from config.async_views import AsyncAPIView
+from .conditional import areport_response
 from .services import (
-    get_daily_report,
-    get_weekly_report,
-    get_monthly_report,
-    get_revenue_report,
-    get_summary_report,
+    delivered_orders,
+    aget_daily_report,
+    aget_weekly_report,
+    aget_monthly_report,
+    aget_revenue_report,
+    aget_summary_report,
+    week_range,
+    month_range,
 )
 
 
-class DailReportView(APIView):
+def _parse_target_date(request):
+    """Optional `date` query param (defaults to today); None if invalid."""
+    target_date = request.query_params.get('date')
+    if not target_date:
+        return date.today()
+    try:
+        return date.fromisoformat(target_date)
+    except ValueError:
+        return None
+
+
+INVALID_DATE = {'error': 'Formato de fecha inválido. Use YYYY-MM-DD'}
+
+
+class DailReportView(AsyncAPIView):
     """
     Get revenue report for a specific day.
     
     Query params:
         date: Optional date in YYYY-MM-DD format (defaults to today)
+    
+    Async; supports conditional GET (see conditional.areport_response).
     """
     permission_classes = [IsAuthenticated]
+    query_budgets = {'get': 5}
     
-    def get(self, request):
-        target_date = request.query_params.get('date')
-        report = get_daily_report(target_date)
-        return Response(report)
+    async def get(self, request):
+        target_date = _parse_target_date(request)
+        if target_date is None:
+            return Response(INVALID_DATE, status=400)
+        return await areport_response(
+            request, target_date, target_date,
+            lambda: aget_daily_report(target_date)
+        )
 
 
-class WeeklyReportView(APIView):
+class WeeklyReportView(AsyncAPIView):
     """
     Get revenue report for a week.
     
     Query params:
         date: Optional date in YYYY-MM-DD format (defaults to current week)
+    
+    Async; supports conditional GET (see conditional.areport_response).
     """
     permission_classes = [IsAuthenticated]
+    query_budgets = {'get': 5}
     
-    def get(self, request):
-        target_date = request.query_params.get('date')
-        report = get_weekly_report(target_date)
-        return Response(report)
+    async def get(self, request):
+        target_date = _parse_target_date(request)
+        if target_date is None:
+            return Response(INVALID_DATE, status=400)
+        return await areport_response(
+            request, *week_range(target_date),
+            lambda: aget_weekly_report(target_date)
+        )
 
 
-class MonthlyReportView(APIView):
+class MonthlyReportView(AsyncAPIView):
     """
     Get revenue report for a month.
     
     Query params:
         year: Optional year (defaults to current year)
         month: Optional month 1-12 (defaults to current month)
+    
+    Async; supports conditional GET (see conditional.areport_response).
     """
     permission_classes = [IsAuthenticated]
+    query_budgets = {'get': 5}
     
-    def get(self, request):
-        year = request.query_params.get('year')
-        month = request.query_params.get('month')
-        
-        if year:
-            year = int(year)
-        if month:
-            month = int(month)
+    async def get(self, request):
+        today = date.today()
+        try:
+            year = int(request.query_params.get('year') or today.year)
+            month = int(request.query_params.get('month') or today.month)
+            start, end = month_range(year, month)
+        except ValueError:
+            return Response({'error': 'Año o mes inválido'}, status=400)
         
-        report = get_monthly_report(year, month)
-        return Response(report)
+        return await areport_response(
+            request, start, end,
+            lambda: aget_monthly_report(year, month)
+        )
 
 
-class CustomReportView(APIView):
+class CustomReportView(AsyncAPIView):
     """
     Get revenue report for a custom date range.
     
     Query params:
         start_date: Required start date in YYYY-MM-DD format
         end_date: Required end date in YYYY-MM-DD format
+    
+    Async; supports conditional GET (see conditional.areport_response).
     """
     permission_classes = [IsAuthenticated]
+    query_budgets = {'get': 5}
     
-    def get(self, request):
+    async def get(self, request):
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
         
@@ -103,16 +145,63 @@ class CustomReportView(APIView):
                 status=400
             )
         
-        report = get_revenue_report(start, end)
-        return Response(report)
+        return await areport_response(request, start, end, lambda: aget_revenue_report(start, end))
 
 
-class SummaryReportView(APIView):
+class ExportReportView(APIView):
     """
-    Get dashboard summary with today, week, and month totals.
+    Download the delivered orders of a date range as CSV or XLSX.
+    
+    Query params:
+        start_date: Required start date in YYYY-MM-DD format
+        end_date: Required end date in YYYY-MM-DD format
+        file_format: 'csv' (default) or 'xlsx'
     """
     permission_classes = [IsAuthenticated]
+    query_budgets = {'get': 2}
     
     def get(self, request):
-        summary = get_summary_report()
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date')
+        
+        if not start_date or not end_date:
+            return Response(
+                {'error': 'Se requieren start_date y end_date'},
+                status=400
+            )
+        
+        try:
+            start = date.fromisoformat(start_date)
+            end = date.fromisoformat(end_date)
+        except ValueError:
+            return Response(
+                {'error': 'Formato de fecha inválido. Use YYYY-MM-DD'},
+                status=400
+            )
+        
+        file_format = request.query_params.get('file_format', 'csv')
+        error = export_format_error(file_format)
+        if error:
+            return Response({'error': error}, status=400)
+        
+        orders = delivered_orders(start, end).order_by('event_date', 'id')
+        header, rows = order_rows(orders)
+        return export_response(
+            request,
+            f'reporte_{start.isoformat()}_{end.isoformat()}',
+            header,
+            rows,
+            file_format
+        )
+
+
+class SummaryReportView(AsyncAPIView):
+    """
+    Get dashboard summary with today, week, and month totals (async).
+    """
+    permission_classes = [IsAuthenticated]
+    query_budgets = {'get': 3}
+    
+    async def get(self, request):
+        summary = await aget_summary_report()
         return Response(summary)
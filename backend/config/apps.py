@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class ProjectConfig(AppConfig):
+    name = 'config'
+    verbose_name = 'Configuración'
+    
+    def ready(self):
+        # Register the database checks and the SQLite connection setup
+        from . import database  # noqa: F401
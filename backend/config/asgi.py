@@ -0,0 +1,18 @@
+"""
+ASGI config for Alquiler de Vajillas project.
+
+Serves the async views (config.async_views) without a thread per request,
+e.g. `uvicorn config.asgi:application`.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+from config.database import startup_check
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+application = get_asgi_application()
+
+startup_check('asgi')
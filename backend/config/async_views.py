@@ -0,0 +1,205 @@
+"""
+Async DRF views for the read-heavy endpoints (served best by config.asgi).
+
+DRF views are synchronous. AsyncDispatchMixin gives an APIView or a
+ViewSet an async dispatch: handlers written as coroutines run on the
+event loop and use the async ORM, while the regular sync handlers (every
+write) run unchanged on the request's sync thread, exactly as Django
+runs a sync view. Authentication, permissions and throttling run there
+too, since they read the session.
+
+Under WSGI (runserver, gunicorn sync workers) Django runs these views
+through async_to_sync, so the same URLs work with both entry points.
+
+Django's async ORM runs the queries of a request one after the other on
+that sync thread. Independent queries that should overlap go through
+run_concurrently(): under ASGI each one runs on a thread of a small
+long-lived pool, with that thread's connection (so connections are
+reused, not opened per call). Under WSGI every request would get a new
+event loop, so the calls simply run in turn on the request's own thread
+and connection.
+
+Streaming responses built from sync iterators (database cursors, ZIP
+writers) go through streaming_content(), so ASGI streams them too.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from itertools import islice
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections, connections
+from django.http import Http404
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .profiling import profile_queries
+
+
+# Threads (and so database connections) used by run_concurrently
+CONCURRENT_QUERY_THREADS = 8
+
+_executor = ThreadPoolExecutor(
+    max_workers=CONCURRENT_QUERY_THREADS,
+    thread_name_prefix='concurrent-queries',
+)
+
+# Whether the request being served came through ASGI (set by dispatch)
+_concurrent = ContextVar('concurrent_queries', default=False)
+
+
+def _in_pool_thread(func):
+    def run():
+        try:
+            with profile_queries():
+                return func()
+        finally:
+            # Pool threads keep their connection between calls: apply
+            # CONN_MAX_AGE and drop broken ones, as a request end does
+            close_old_connections()
+    return run
+
+
+def close_pool_connections():
+    """Close the database connections kept by the pool threads (tests, shutdown)."""
+    # Every task waits for the others, so each thread of the pool runs one
+    barrier = threading.Barrier(CONCURRENT_QUERY_THREADS, timeout=5)
+    
+    def close():
+        barrier.wait()
+        connections.close_all()
+    
+    for future in [_executor.submit(close) for _ in range(CONCURRENT_QUERY_THREADS)]:
+        future.result()
+
+
+async def run_concurrently(*funcs):
+    """
+    Run independent sync ORM calls at the same time (under ASGI).
+    
+    Must not be used for reads that need to see the current transaction
+    (under ASGI other connections do not see its uncommitted rows).
+    
+    Args:
+        funcs: Callables without arguments, e.g. `lambda: list(queryset)`
+    
+    Returns:
+        List with the result of each callable, in order
+    """
+    if not _concurrent.get():
+        return [await sync_to_async(func)() for func in funcs]
+    return await asyncio.gather(*(
+        sync_to_async(_in_pool_thread(func), thread_sensitive=False, executor=_executor)()
+        for func in funcs
+    ))
+
+
+def streaming_content(request, iterator, chunk=200):
+    """
+    Content for a StreamingHttpResponse that streams under WSGI and ASGI.
+    
+    Under ASGI Django would read a sync iterator to the end before sending
+    anything. Instead, its parts are pulled `chunk` at a time on the
+    request's sync thread, where the view opened its database cursor.
+    
+    Args:
+        request: The request being answered (Django or DRF)
+        iterator: Sync iterable of the response parts
+        chunk: Parts read per trip to the sync thread
+    """
+    if not isinstance(getattr(request, '_request', request), ASGIRequest):
+        return iterator
+    
+    iterator = iter(iterator)
+    read = sync_to_async(lambda: list(islice(iterator, chunk)))
+    
+    async def parts():
+        while batch := await read():
+            for part in batch:
+                yield part
+    return parts()
+
+
+class AsyncDispatchMixin:
+    """Async dispatch for APIViews and ViewSets (see the module docstring)."""
+    
+    @classmethod
+    def as_view(cls, *args, **initkwargs):
+        view = super().as_view(*args, **initkwargs)
+        # DRF's csrf_exempt wrapper hides that dispatch is a coroutine
+        return markcoroutinefunction(view)
+    
+    async def dispatch(self, request, *args, **kwargs):
+        """APIView.dispatch, awaiting async handlers."""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        token = _concurrent.set(isinstance(request._request, ASGIRequest))
+        
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        finally:
+            _concurrent.reset(token)
+        
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncAPIView(AsyncDispatchMixin, APIView):
+    """APIView whose handlers are coroutines."""
+
+
+class AsyncReadMixin:
+    """
+    Async list and retrieve for GenericViewSets with AsyncDispatchMixin.
+    
+    The list count and page queries run concurrently (see
+    KeysetPagination.apaginate_queryset).
+    """
+    
+    async def afilter_queryset(self, queryset):
+        # Filter backends may query (e.g. the search index check)
+        return await sync_to_async(self.filter_queryset)(queryset)
+    
+    async def aget_object(self):
+        """GenericAPIView.get_object with the async ORM."""
+        queryset = await self.afilter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            obj = await queryset.aget(**filter_kwargs)
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+        self.check_object_permissions(self.request, obj)
+        return obj
+    
+    async def list(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        if self.paginator is None:
+            serializer = self.get_serializer([row async for row in queryset], many=True)
+            return Response(serializer.data)
+        page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+    
+    async def retrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
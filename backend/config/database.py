@@ -0,0 +1,131 @@
+"""
+Database connection setup and startup checks.
+
+Connections are reused for DB_CONN_MAX_AGE seconds by the requests of
+the same thread (WSGI). Under ASGI every request runs in a new thread,
+so reused connections would pile up: set it to 0 there and pool with
+PgBouncer (with server-side cursors disabled when it runs in
+transaction mode).
+
+With DB_ENGINE=sqlite, file databases use the WAL journal so the API and
+the job workers can read while another process writes.
+
+check_database() connects and reports problems as system check
+messages. It runs with `manage.py check --database default` and when
+the WSGI/ASGI application loads (settings.DB_STARTUP_CHECK).
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DatabaseError, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+logger = logging.getLogger(__name__)
+
+# Connecting slower than this (milliseconds) is reported at startup
+SLOW_CONNECT_MS = 100
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite' or connection.is_in_memory_db():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+
+
+def check_database(alias='default', server=None):
+    """
+    Connect to a database and check its connection settings.
+    
+    Args:
+        alias: Database alias
+        server: 'wsgi' or 'asgi' when called by the application at startup
+    
+    Returns:
+        List of system check messages
+    """
+    connection = connections[alias]
+    config = connection.settings_dict
+    messages = []
+    
+    if server == 'asgi' and config['CONN_MAX_AGE'] != 0:
+        messages.append(checks.Warning(
+            'Las conexiones persistentes no se reutilizan bajo ASGI.',
+            hint='Use DB_CONN_MAX_AGE=0 y un pool como PgBouncer.',
+            id='database.W001',
+        ))
+    if config['CONN_MAX_AGE'] and not config['CONN_HEALTH_CHECKS']:
+        messages.append(checks.Warning(
+            'Las conexiones persistentes no se verifican antes de reutilizarlas.',
+            hint='Use DB_CONN_HEALTH_CHECKS=True.',
+            id='database.W002',
+        ))
+    if connection.vendor == 'sqlite' and not settings.DEBUG:
+        messages.append(checks.Warning(
+            'SQLite es solo para desarrollo y pruebas.',
+            hint='Use DB_ENGINE=postgresql en producción.',
+            id='database.W003',
+        ))
+    
+    start = time.perf_counter()
+    try:
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    except DatabaseError as exc:
+        messages.append(checks.Error(
+            f'No se pudo conectar a la base de datos "{alias}": {exc}',
+            hint='Revise las variables DB_* del archivo .env.',
+            id='database.E001',
+        ))
+        return messages
+    
+    connect_ms = (time.perf_counter() - start) * 1000
+    if connect_ms > SLOW_CONNECT_MS:
+        messages.append(checks.Warning(
+            f'Conectar a la base de datos "{alias}" tardó {connect_ms:.0f} ms.',
+            hint='Con conexiones lentas conviene reutilizarlas (DB_CONN_MAX_AGE) o usar un pool.',
+            id='database.W004',
+        ))
+    return messages
+
+
+@checks.register(checks.Tags.database)
+def database_check(app_configs, databases=None, **kwargs):
+    messages = []
+    for alias in databases or []:
+        messages.extend(check_database(alias))
+    return messages
+
+
+def startup_check(server):
+    """
+    Check the default database when the application loads.
+    
+    Warnings are logged; errors stop the server. The connection is
+    closed afterwards so forked workers never share it.
+    
+    Args:
+        server: 'wsgi' or 'asgi'
+    """
+    if not settings.DB_STARTUP_CHECK:
+        return
+    try:
+        messages = check_database(server=server)
+    finally:
+        connections['default'].close()
+    
+    errors = [message for message in messages if message.is_serious()]
+    for message in messages:
+        if message not in errors:
+            logger.warning('%s', message)
+    if errors:
+        raise ImproperlyConfigured('\n'.join(str(message) for message in errors))
@@ -0,0 +1,386 @@
+"""
+Prometheus metrics: counters and histograms served at /metrics.
+
+Metrics are declared once at module level and updated on the hot path:
+    
+    PDF_RENDER_SECONDS = Histogram('pdf_render_seconds', 'Tiempo de render de PDFs', ['kind'])
+    PDF_RENDER_SECONDS.labels('order').observe(0.08)
+
+An observation is a dict lookup and one to three float updates under a
+lock: about 2 microseconds, 3-4 with the shared directory.
+
+Values live in the current process unless METRICS['MULTIPROCESS_DIR']
+is set: then each process (gunicorn worker) writes its values to its own
+memory-mapped file in that directory, and /metrics adds up the files of
+every process, so any worker can answer the scrape. Only counters and
+histograms exist, so adding is always correct, also for workers that
+already exited. Empty the directory when the server starts.
+"""
+import bisect
+import functools
+import glob
+import hmac
+import inspect
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import Http404, HttpResponse
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_registry = []
+_lock = threading.Lock()
+_values = None
+
+
+class LocalValues:
+    """Sample values of the current process only."""
+    
+    def __init__(self):
+        self._values = defaultdict(float)
+    
+    def inc(self, key, amount):
+        self._values[key] += amount
+    
+    def samples(self):
+        with _lock:
+            return dict(self._values)
+
+
+class NullValues:
+    """Discards every value (metrics disabled)."""
+    
+    def inc(self, key, amount):
+        pass
+    
+    def samples(self):
+        return {}
+
+
+class MmapValues:
+    """
+    Sample values of this process in DIRECTORY/metrics_<pid>.db.
+    
+    File layout: an 8 byte header with the used size, then entries of a
+    4 byte key length, the JSON key (padded to 8 bytes) and an 8 byte
+    float. Entries are only appended and the header is written last, so
+    readers never see a partial entry.
+    """
+    INITIAL_SIZE = 64 * 1024
+    
+    _HEADER = struct.Struct('i4x')
+    _LENGTH = struct.Struct('i')
+    _VALUE = struct.Struct('d')
+    
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, f'metrics_{os.getpid()}.db')
+        self._file = open(self.path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size < self.INITIAL_SIZE:
+            self._file.truncate(self.INITIAL_SIZE)
+        self._map()
+        self._used = self._HEADER.unpack_from(self._mmap, 0)[0] or self._HEADER.size
+        self._offsets = {key: offset for key, offset, _ in self._entries(self._mmap, self._used)}
+    
+    def _map(self):
+        size = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+    
+    @classmethod
+    def _entries(cls, data, used):
+        """Yield (key, value offset, value) of the entries in a file's bytes."""
+        position = cls._HEADER.size
+        while position < used:
+            length = cls._LENGTH.unpack_from(data, position)[0]
+            start = position + cls._LENGTH.size
+            encoded = bytes(data[start:start + length])
+            offset = start + length + (-(cls._LENGTH.size + length) % 8)
+            name, labels = json.loads(encoded)
+            key = (name, tuple(tuple(label) for label in labels))
+            yield key, offset, cls._VALUE.unpack_from(data, offset)[0]
+            position = offset + cls._VALUE.size
+    
+    def _add(self, key):
+        encoded = json.dumps(key).encode('utf-8')
+        padding = -(self._LENGTH.size + len(encoded)) % 8
+        size = self._LENGTH.size + len(encoded) + padding + self._VALUE.size
+        if self._used + size > len(self._mmap):
+            new_size = len(self._mmap)
+            while self._used + size > new_size:
+                new_size *= 2
+            self._mmap.close()
+            self._file.truncate(new_size)
+            self._map()
+        
+        position = self._used
+        self._LENGTH.pack_into(self._mmap, position, len(encoded))
+        self._mmap[position + self._LENGTH.size:position + self._LENGTH.size + len(encoded)] = encoded
+        offset = position + self._LENGTH.size + len(encoded) + padding
+        self._VALUE.pack_into(self._mmap, offset, 0.0)
+        self._used = offset + self._VALUE.size
+        self._HEADER.pack_into(self._mmap, 0, self._used)
+        self._offsets[key] = offset
+        return offset
+    
+    def inc(self, key, amount):
+        offset = self._offsets.get(key)
+        if offset is None:
+            offset = self._add(key)
+        value = self._VALUE.unpack_from(self._mmap, offset)[0]
+        self._VALUE.pack_into(self._mmap, offset, value + amount)
+    
+    def samples(self):
+        """Values added up over the files of every process."""
+        totals = defaultdict(float)
+        for path in glob.glob(os.path.join(self.directory, 'metrics_*.db')):
+            try:
+                with open(path, 'rb') as metrics_file:
+                    data = metrics_file.read()
+            except OSError:
+                continue
+            if len(data) < self._HEADER.size:
+                continue
+            used = self._HEADER.unpack_from(data, 0)[0]
+            for key, _, value in self._entries(data, used):
+                totals[key] += value
+        return dict(totals)
+
+
+def _get_values():
+    """The value store configured in settings.METRICS (created once per process)."""
+    global _values
+    if _values is None:
+        with _lock:
+            if _values is None:
+                config = settings.METRICS
+                if not config['ENABLED']:
+                    _values = NullValues()
+                elif config['MULTIPROCESS_DIR']:
+                    os.makedirs(config['MULTIPROCESS_DIR'], exist_ok=True)
+                    _values = MmapValues(config['MULTIPROCESS_DIR'])
+                else:
+                    _values = LocalValues()
+    return _values
+
+
+def reset_values():
+    """Forget the value store (after fork or a settings change)."""
+    global _values
+    _values = None
+
+
+# A forked worker must write its own file, not its parent's
+os.register_at_fork(after_in_child=reset_values)
+
+
+@receiver(setting_changed)
+def reset_metrics_values(setting, **kwargs):
+    if setting == 'METRICS':
+        reset_values()
+
+
+def _inc(key, amount):
+    values = _get_values()
+    with _lock:
+        values.inc(key, amount)
+
+
+class Metric:
+    """Base of the metric types: name, help text and label names."""
+    type = None
+    
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        _registry.append(self)
+    
+    def labels(self, *labelvalues):
+        """The series of the given label values (created on first use)."""
+        child = self._children.get(labelvalues)
+        if child is None:
+            if len(labelvalues) != len(self.labelnames):
+                raise ValueError(f'{self.name} espera las etiquetas {self.labelnames}')
+            labels = tuple(zip(self.labelnames, map(str, labelvalues)))
+            child = self._children[labelvalues] = self._child(labels)
+        return child
+    
+    def sample_names(self):
+        return (self.name,)
+
+
+class _CounterChild:
+    __slots__ = ('key',)
+    
+    def __init__(self, key):
+        self.key = key
+    
+    def inc(self, amount=1):
+        _inc(self.key, amount)
+
+
+class Counter(Metric):
+    """Monotonic total, e.g. requests served (name it with a _total suffix)."""
+    type = 'counter'
+    
+    def _child(self, labels):
+        return _CounterChild((self.name, labels))
+    
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+
+class _HistogramChild:
+    __slots__ = ('upper_bounds', 'bucket_keys', 'sum_key', 'count_key')
+    
+    def __init__(self, name, labels, upper_bounds):
+        self.upper_bounds = upper_bounds
+        self.bucket_keys = [
+            (f'{name}_bucket', labels + (('le', _format(bound)),))
+            for bound in upper_bounds
+        ]
+        self.sum_key = (f'{name}_sum', labels)
+        self.count_key = (f'{name}_count', labels)
+    
+    def observe(self, value):
+        # Each bucket holds its own count; /metrics makes them cumulative
+        bucket_key = self.bucket_keys[bisect.bisect_left(self.upper_bounds, value)]
+        values = _get_values()
+        with _lock:
+            values.inc(bucket_key, 1)
+            values.inc(self.sum_key, value)
+            values.inc(self.count_key, 1)
+
+
+class Histogram(Metric):
+    """Distribution of observed values (durations in seconds, sizes)."""
+    type = 'histogram'
+    
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.upper_bounds = tuple(sorted(float(bound) for bound in buckets)) + (math.inf,)
+    
+    def _child(self, labels):
+        return _HistogramChild(self.name, labels, self.upper_bounds)
+    
+    def observe(self, value):
+        self.labels().observe(value)
+    
+    def time(self, *labelvalues):
+        """Decorator observing the duration in seconds of each call (sync or async)."""
+        def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    start = time.perf_counter()
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        self.labels(*labelvalues).observe(time.perf_counter() - start)
+                return async_wrapper
+            
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.labels(*labelvalues).observe(time.perf_counter() - start)
+            return wrapper
+        return decorator
+    
+    def sample_names(self):
+        return (f'{self.name}_bucket', f'{self.name}_sum', f'{self.name}_count')
+
+
+def _format(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return f'{value:.1f}'
+    return repr(float(value))
+
+
+def _escape(value):
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _line(name, labels, value):
+    if labels:
+        label_text = ','.join(f'{label}="{_escape(text)}"' for label, text in labels)
+        return f'{name}{{{label_text}}} {_format(value)}'
+    return f'{name} {_format(value)}'
+
+
+def _histogram_lines(metric, samples):
+    series = defaultdict(dict)
+    for (name, labels), value in samples.items():
+        if name == f'{metric.name}_bucket':
+            series[labels[:-1]][labels[-1][1]] = value
+        else:
+            series[labels].setdefault(name, value)
+    
+    lines = []
+    for labels in sorted(series):
+        values = series[labels]
+        cumulative = 0.0
+        for bound in metric.upper_bounds:
+            cumulative += values.get(_format(bound), 0.0)
+            lines.append(_line(f'{metric.name}_bucket', labels + (('le', _format(bound)),), cumulative))
+        lines.append(_line(f'{metric.name}_sum', labels, values.get(f'{metric.name}_sum', 0.0)))
+        lines.append(_line(f'{metric.name}_count', labels, values.get(f'{metric.name}_count', 0.0)))
+    return lines
+
+
+def render():
+    """Every metric in the Prometheus text exposition format."""
+    samples = _get_values().samples()
+    by_metric = defaultdict(dict)
+    owners = {name: metric for metric in _registry for name in metric.sample_names()}
+    for key, value in samples.items():
+        metric = owners.get(key[0])
+        if metric is not None:
+            by_metric[metric.name][key] = value
+    
+    lines = []
+    for metric in sorted(_registry, key=lambda metric: metric.name):
+        lines.append(f'# HELP {metric.name} {_escape(metric.documentation)}')
+        lines.append(f'# TYPE {metric.name} {metric.type}')
+        metric_samples = by_metric.get(metric.name, {})
+        if metric.type == 'histogram':
+            lines.extend(_histogram_lines(metric, metric_samples))
+        else:
+            for (name, labels), value in sorted(metric_samples.items()):
+                lines.append(_line(name, labels, value))
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """
+    Serve the metrics to Prometheus.
+    
+    With METRICS['TOKEN'] set, requests must send it as a bearer token
+    (`authorization: bearer_token` in the scrape config).
+    """
+    config = settings.METRICS
+    if not config['ENABLED']:
+        raise Http404
+    token = config['TOKEN']
+    if token and not hmac.compare_digest(
+        request.headers.get('Authorization', ''), f'Bearer {token}'
+    ):
+        return HttpResponse('No autorizado', status=401, content_type='text/plain')
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,226 @@
+"""
+Keyset (cursor) pagination for the API.
+
+Pages are selected with a WHERE on the ordering values of the last row
+seen instead of OFFSET, so deep pages cost the same as the first one.
+The ordering comes from the view's OrderingFilter (or the view/model
+default) plus the primary key as tiebreaker, so rows with equal values
+are never skipped or repeated.
+
+Ordering fields must not be nullable.
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Model, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .async_views import run_concurrently
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over any ordering, with an id tiebreaker.
+    
+    Query params:
+        cursor: Opaque position taken from the next/previous links
+        page_size: Optional page size (up to max_page_size)
+        count: 'false' to skip the COUNT(*) of the whole result set
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Cursor inválido.'
+    
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+    
+    def get_ordering(self, request, queryset, view):
+        """Ordering fields of the view plus the primary key tiebreaker."""
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering:
+            ordering = getattr(view, 'ordering', None)
+        if not ordering:
+            ordering = queryset.query.order_by or queryset.model._meta.ordering
+        if isinstance(ordering, str):
+            ordering = [ordering]
+        
+        pk_name = queryset.model._meta.pk.name
+        ordering = [
+            field.replace('pk', pk_name) if field.lstrip('-') == 'pk' else field
+            for field in ordering
+            if isinstance(field, str)
+        ]
+        if not any(field.lstrip('-') == pk_name for field in ordering):
+            descending = bool(ordering) and ordering[-1].startswith('-')
+            ordering.append(f'-{pk_name}' if descending else pk_name)
+        return ordering
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        count_queryset, page_queryset = self.page_querysets(queryset, request, view)
+        self.count = None if count_queryset is None else count_queryset.count()
+        return self.set_page(list(page_queryset))
+    
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset for async views: the count and the page run concurrently."""
+        count_queryset, page_queryset = self.page_querysets(queryset, request, view)
+        if count_queryset is None:
+            self.count = None
+            rows = [row async for row in page_queryset]
+        else:
+            self.count, rows = await run_concurrently(
+                count_queryset.count,
+                lambda: list(page_queryset),
+            )
+        return self.set_page(rows)
+    
+    def page_querysets(self, queryset, request, view=None):
+        """
+        Read the page params of a request.
+        
+        Returns:
+            (queryset to count or None, queryset of the page plus one row)
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        
+        if request.query_params.get(self.count_query_param, '').lower() == 'false':
+            count_queryset = None
+        else:
+            # Only the filters matter: unordered ids, without the selected
+            # annotations (e.g. order totals) that count() could keep
+            count_queryset = queryset.order_by().values('pk')
+        
+        values, reverse = self.decode_cursor(request)
+        self.cursor = values, reverse
+        ordering = self.ordering
+        if reverse:
+            ordering = [self._flip(field) for field in ordering]
+        
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._after(ordering, values))
+        return count_queryset, queryset[:self.page_size + 1]
+    
+    def set_page(self, rows):
+        """Keep the rows of the page and whether there are more around it."""
+        values, reverse = self.cursor
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        
+        if reverse:
+            rows.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = values is not None
+        
+        self.page = rows
+        return rows
+    
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+    
+    @staticmethod
+    def _after(ordering, values):
+        """Rows strictly after values in the given ordering (row comparison)."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+    
+    def _position(self, row):
+        values = []
+        for field in self.ordering:
+            value = row
+            for attr in field.lstrip('-').split('__'):
+                value = getattr(value, attr)
+            if isinstance(value, Model):
+                value = value.pk
+            values.append(value)
+        return values
+    
+    @staticmethod
+    def _encode_value(value):
+        # Full precision: the filters compare these values exactly
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return str(value)
+    
+    def encode_cursor(self, values, reverse):
+        data = json.dumps({'v': values, 'r': reverse}, default=self._encode_value)
+        cursor = base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+    
+    def decode_cursor(self, request):
+        """Return (ordering values or None, reverse) from the cursor param."""
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            values = data['v']
+            reverse = bool(data['r'])
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+    
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._position(self.page[-1]), False)
+    
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            url = self.request.build_absolute_uri()
+            return remove_query_param(url, self.cursor_query_param)
+        return self.encode_cursor(self._position(self.page[0]), True)
+    
+    def get_paginated_response(self, data):
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response['results'] = data
+        return Response(response)
+    
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
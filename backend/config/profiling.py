@@ -0,0 +1,305 @@
+"""
+Per-request SQL profiling.
+
+QueryProfilingMiddleware wraps every database connection with an
+execute_wrapper while a request runs, and records the number of
+queries, the time spent in the database and how many times each query
+shape (fingerprint: the SQL with literals and IN lists collapsed) ran.
+A fingerprint repeated DUPLICATE_THRESHOLD times or more is the usual
+sign of an N+1 pattern. It works under WSGI and ASGI, also for queries
+an async view runs in other threads (see profile_queries).
+
+Per request it can:
+
+- add a Server-Timing header (db time, query count and total time);
+- log a JSON line on the `config.profiling` logger when the request is
+  slower than SLOW_REQUEST_MS or goes over its query budget;
+- in STRICT mode, raise QueryBudgetExceeded when an endpoint runs more
+  queries than declared in its view's `query_budgets` dict (action or
+  method name -> max queries, counting the session and user lookups);
+- record the request count, latency, database time and queries of the
+  endpoint as Prometheus metrics (config.metrics).
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN \((?:[^()]|\([^()]*\))*\)', re.IGNORECASE)
+_SPACES = re.compile(r'\s+')
+
+REQUESTS = metrics.Counter(
+    'http_requests_total',
+    'Requests por endpoint, método y estado',
+    ['endpoint', 'method', 'status'],
+)
+REQUEST_SECONDS = metrics.Histogram(
+    'http_request_duration_seconds',
+    'Duración de los requests por endpoint',
+    ['endpoint'],
+)
+DB_SECONDS = metrics.Histogram(
+    'http_request_db_seconds',
+    'Tiempo en la base de datos por request',
+    ['endpoint'],
+)
+DB_QUERIES = metrics.Histogram(
+    'http_request_db_queries',
+    'Consultas SQL por request',
+    ['endpoint'],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200),
+)
+
+# Transaction bookkeeping and connection setup (PRAGMA on SQLite, SET on
+# PostgreSQL), not application queries
+_IGNORED_PREFIXES = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT', 'PRAGMA', 'SET ')
+
+
+class QueryBudgetExceeded(Exception):
+    """An endpoint ran more queries than its declared budget (strict mode)."""
+
+
+def fingerprint(sql):
+    """SQL with literals and IN lists replaced, to group queries by shape."""
+    sql = _STRING.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+class QueryProfile:
+    """Queries run by the current request, filled by the execute wrapper."""
+    
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        # Profile active when this one started (e.g. a benchmark around a request)
+        self.parent = None
+        # Async views may run queries of one request in several threads
+        self._lock = threading.Lock()
+    
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add(sql, time.perf_counter() - start)
+    
+    def add(self, sql, duration):
+        """Count one executed query, here and in the enclosing profiles."""
+        with self._lock:
+            self.duration += duration
+            if not sql.startswith(_IGNORED_PREFIXES):
+                self.count += 1
+                self.fingerprints[fingerprint(sql)] += 1
+        if self.parent is not None:
+            self.parent.add(sql, duration)
+    
+    def duplicates(self, threshold):
+        """(fingerprint, count) of query shapes run at least threshold times."""
+        return [
+            (sql, count)
+            for sql, count in self.fingerprints.most_common()
+            if count >= threshold
+        ]
+
+
+# Profile of the request being served (copied into sync_to_async threads)
+_current_profile = ContextVar('query_profile', default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+    # Concurrent async requests may share a sync thread and its connection:
+    # each query goes to the profile of the request that ran it
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    return profile(execute, sql, params, many, context)
+
+
+@contextmanager
+def _recording(connection):
+    """Install _record_query on a connection once, however many requests use it."""
+    users = getattr(connection, 'profiling_users', 0)
+    if not users:
+        connection.execute_wrappers.append(_record_query)
+    connection.profiling_users = users + 1
+    try:
+        yield
+    finally:
+        connection.profiling_users -= 1
+        if not connection.profiling_users:
+            connection.execute_wrappers.remove(_record_query)
+
+
+def profile_queries():
+    """
+    Record the queries of this thread's connections in the current request profile.
+    
+    The middleware uses it for the request thread; code that moves queries
+    to other threads (config.async_views.run_concurrently) uses it there.
+    
+    Returns:
+        ExitStack to close when done (a no-op outside a profiled request)
+    """
+    stack = ExitStack()
+    if _current_profile.get() is not None:
+        for alias in connections:
+            stack.enter_context(_recording(connections[alias]))
+    return stack
+
+
+@contextmanager
+def record_queries(profile):
+    """Record in profile the queries run in this context, including run_concurrently threads."""
+    profile.parent = _current_profile.get()
+    token = _current_profile.set(profile)
+    try:
+        with profile_queries():
+            yield profile
+    finally:
+        _current_profile.reset(token)
+
+
+def endpoint_name(request):
+    """
+    Return (label, view class, action) of the view that handled a request.
+    
+    The action is the ViewSet action (list, retrieve, pdf, ...) or the
+    lowercase HTTP method for plain APIViews.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return request.path, None, None
+    
+    view_class = getattr(match.func, 'cls', None)
+    actions = getattr(match.func, 'actions', None) or {}
+    method = request.method.lower()
+    action = actions.get(method, method)
+    if view_class is None:
+        return match.view_name or request.path, None, action
+    return f'{view_class.__name__}.{action}', view_class, action
+
+
+def query_budget(view_class, action):
+    budgets = getattr(view_class, 'query_budgets', None) or {}
+    return budgets.get(action)
+
+
+class QueryProfilingMiddleware:
+    """Record the SQL queries of each request (see the module docstring)."""
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+    
+    @property
+    def config(self):
+        # Read per request so override_settings applies
+        return settings.QUERY_PROFILING
+    
+    @property
+    def enabled(self):
+        return self.config['ENABLED'] or settings.METRICS['ENABLED']
+    
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        
+        profile = QueryProfile()
+        start = time.perf_counter()
+        with record_queries(profile):
+            response = self.get_response(request)
+        return self.finish(request, response, profile, time.perf_counter() - start)
+    
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        
+        profile = QueryProfile()
+        profile.parent = _current_profile.get()
+        token = _current_profile.set(profile)
+        start = time.perf_counter()
+        # Sync views and the async ORM run their queries on the request's
+        # sync thread: install the wrappers on that thread's connections
+        stack = await sync_to_async(profile_queries)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current_profile.reset(token)
+        return self.finish(request, response, profile, time.perf_counter() - start)
+    
+    def finish(self, request, response, profile, duration):
+        """Record, time, log and check the budget of a finished request."""
+        label, view_class, action = endpoint_name(request)
+        if settings.METRICS['ENABLED']:
+            self.record_metrics(request, response, label, profile, duration)
+        if not self.config['ENABLED']:
+            return response
+        
+        budget = query_budget(view_class, action)
+        over_budget = budget is not None and profile.count > budget
+        
+        if self.config['SERVER_TIMING']:
+            response['Server-Timing'] = (
+                f'db;desc="{profile.count} queries";dur={profile.duration * 1000:.1f}, '
+                f'total;dur={duration * 1000:.1f}'
+            )
+        
+        if over_budget or duration * 1000 >= self.config['SLOW_REQUEST_MS']:
+            self.log(request, response, label, profile, duration, budget)
+        
+        if over_budget and self.config['STRICT']:
+            raise QueryBudgetExceeded(
+                f'{label} ejecutó {profile.count} consultas (presupuesto: {budget}).'
+            )
+        return response
+    
+    def record_metrics(self, request, response, label, profile, duration):
+        # Unresolved paths would make one series per URL
+        endpoint = label if getattr(request, 'resolver_match', None) else 'unmatched'
+        REQUESTS.labels(endpoint, request.method, response.status_code).inc()
+        REQUEST_SECONDS.labels(endpoint).observe(duration)
+        DB_SECONDS.labels(endpoint).observe(profile.duration)
+        DB_QUERIES.labels(endpoint).observe(profile.count)
+    
+    def log(self, request, response, label, profile, duration, budget):
+        """Write one structured (JSON) line about a slow or over-budget request."""
+        record = {
+            'endpoint': label,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 1),
+            'db_ms': round(profile.duration * 1000, 1),
+            'queries': profile.count,
+            'query_budget': budget,
+            'duplicates': [
+                {'sql': sql, 'count': count}
+                for sql, count in profile.duplicates(self.config['DUPLICATE_THRESHOLD'])
+            ],
+        }
+        logger.warning(json.dumps(record, ensure_ascii=False), extra={'profile': record})
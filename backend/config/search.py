@@ -0,0 +1,220 @@
+"""
+Indexed, accent-insensitive text search for the API.
+
+Searchable models keep a `search_text` column with their searchable
+fields lowercased and without accents (see normalize_text), so the same
+normalization applied to the query makes "jose" match "José" on any
+database. The column is indexed per database:
+
+- PostgreSQL: a pg_trgm GIN index, used by the LIKE '%term%' filters;
+  results are ranked by trigram similarity.
+- SQLite: an FTS5 table with the trigram tokenizer, kept in sync by
+  triggers; results are ranked by bm25.
+
+Other databases, and terms shorter than three characters on SQLite, fall
+back to a plain LIKE over search_text.
+"""
+import unicodedata
+
+from django.db import connections
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+from rest_framework.settings import api_settings
+
+
+# Characters allowed in a query that is treated as a phone number
+PHONE_CHARS = set('0123456789+-(). ')
+
+# FTS5 trigram index only matches terms of at least three characters
+MIN_FTS_TERM = 3
+
+
+def normalize_text(value):
+    """Lowercase, strip accents and collapse whitespace."""
+    value = unicodedata.normalize('NFKD', value or '')
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    return ' '.join(value.lower().split())
+
+
+def digits_only(value):
+    """Keep only the digits of a phone number."""
+    return ''.join(char for char in value or '' if char.isdigit())
+
+
+def phone_query_digits(query, min_digits=1):
+    """
+    Return the digits of a query that looks like a phone number, else ''.
+    
+    A query made only of phone characters ("11 4567-8901") with at least
+    min_digits digits is treated as a phone number.
+    """
+    query = (query or '').strip()
+    if query and all(char in PHONE_CHARS for char in query):
+        digits = digits_only(query)
+        if len(digits) >= min_digits:
+            return digits
+    return ''
+
+
+def search_terms(query):
+    """
+    Split a query into normalized terms.
+    
+    A phone number becomes a single digits-only term, matching the
+    stored phone digits.
+    """
+    digits = phone_query_digits(query, MIN_FTS_TERM)
+    if digits:
+        return [digits]
+    return normalize_text((query or '').replace(',', ' ')).split()
+
+
+def fts_table(model):
+    return f'{model._meta.db_table}_fts'
+
+
+# (database name, table) of the FTS tables known to exist
+_fts_tables = set()
+
+
+def _has_table(connection, table):
+    key = (connection.settings_dict['NAME'], table)
+    if key not in _fts_tables:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [table])
+            if cursor.fetchone() is None:
+                return False
+        _fts_tables.add(key)
+    return True
+
+
+def search_queryset(queryset, query):
+    """
+    Filter a queryset of a searchable model by a free text query.
+    
+    Every term must match. When the database can rank results, rows are
+    annotated with search_rank (higher is more relevant).
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+    
+    model = queryset.model
+    connection = connections[queryset.db]
+    
+    if connection.vendor == 'postgresql':
+        # Imported here: needs the PostgreSQL driver
+        from django.contrib.postgres.search import TrigramSimilarity
+        
+        for term in terms:
+            queryset = queryset.filter(search_text__contains=term)
+        return queryset.annotate(
+            search_rank=TrigramSimilarity('search_text', ' '.join(terms))
+        )
+    
+    table = fts_table(model)
+    if (
+        connection.vendor == 'sqlite'
+        and all(len(term) >= MIN_FTS_TERM for term in terms)
+        and _has_table(connection, table)
+    ):
+        match = ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+        base = model._meta.db_table
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [match])
+        ).annotate(search_rank=RawSQL(
+            # bm25 is lower for better matches
+            f'SELECT -bm25({table}) FROM {table} WHERE {table} MATCH %s AND rowid = "{base}"."id"',
+            [match],
+            output_field=FloatField()
+        ))
+    
+    for term in terms:
+        queryset = queryset.filter(search_text__contains=term)
+    return queryset
+
+
+class SearchTextFilter(BaseFilterBackend):
+    """Filter backend for the `search` query param using search_queryset."""
+    search_param = api_settings.SEARCH_PARAM
+    
+    def filter_queryset(self, request, queryset, view):
+        return search_queryset(queryset, request.query_params.get(self.search_param, ''))
+    
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Texto a buscar (sin distinguir acentos ni mayúsculas).',
+            'schema': {'type': 'string'},
+        }]
+
+
+class RankedOrderingFilter(OrderingFilter):
+    """OrderingFilter that sorts search results by relevance by default."""
+    
+    def get_ordering(self, request, queryset, view):
+        ranked = 'search_rank' in queryset.query.annotations
+        if ranked and not request.query_params.get(self.ordering_param):
+            return ['-search_rank']
+        return super().get_ordering(request, queryset, view)
+
+
+def create_search_index(schema_editor, table):
+    """
+    Create the text search index of a table's search_text column.
+    
+    For use in migrations (RunPython). On SQLite without the FTS5 trigram
+    tokenizer, nothing is created and searches use LIKE.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {table}_search_trgm '
+            f'ON {table} USING gin (search_text gin_trgm_ops)'
+        )
+    elif vendor == 'sqlite':
+        fts = f'{table}_fts'
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                f"search_text, content='{table}', content_rowid='id', tokenize='trigram')"
+            )
+        except Exception:
+            return
+        create_search_triggers(schema_editor, table)
+        schema_editor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def create_search_triggers(schema_editor, table):
+    """(Re)create the triggers that keep a SQLite FTS5 table in sync."""
+    fts = f'{table}_fts'
+    schema_editor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN '
+        f'INSERT INTO {fts}(rowid, search_text) VALUES (new.id, new.search_text); END'
+    )
+    schema_editor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, search_text) VALUES ('delete', old.id, old.search_text); END"
+    )
+    schema_editor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF search_text ON {table} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+        f'INSERT INTO {fts}(rowid, search_text) VALUES (new.id, new.search_text); END'
+    )
+
+
+def drop_search_index(schema_editor, table):
+    """Reverse of create_search_index."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {table}_search_trgm')
+    elif vendor == 'sqlite':
+        fts = f'{table}_fts'
+        for suffix in ('insert', 'delete', 'update'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {fts}_{suffix}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {fts}')
+        _fts_tables.discard((schema_editor.connection.settings_dict['NAME'], fts))
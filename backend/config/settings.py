@@ -30,14 +30,19 @@ INSTALLED_APPS = [
     'django_filters',
     'corsheaders',
     # Local apps
+    'config.apps.ProjectConfig',
     'apps.users',
     'apps.products',
     'apps.orders',
     'apps.reports',
+    'apps.jobs',
+    'apps.customers',
+    'apps.benchmarks',
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'config.profiling.QueryProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -66,18 +71,52 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
-
-# Database - PostgreSQL
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': os.getenv('DB_NAME', 'alquiler_vajillas'),
-        'USER': os.getenv('DB_USER', 'postgres'),
-        'PASSWORD': os.getenv('DB_PASSWORD', ''),
-        'HOST': os.getenv('DB_HOST', 'localhost'),
-        'PORT': os.getenv('DB_PORT', '5432'),
+ASGI_APPLICATION = 'config.asgi.application'
+
+# Database - PostgreSQL, or SQLite to run everything locally without a
+# server (DB_ENGINE=sqlite; see config.database)
+DB_ENGINE = os.getenv('DB_ENGINE', 'postgresql').lower()
+if DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_SQLITE_PATH', str(BASE_DIR / 'db.sqlite3')),
+            'OPTIONS': {
+                # Seconds a write waits for the lock held by another process
+                'timeout': int(os.getenv('DB_SQLITE_TIMEOUT', 20)),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'alquiler_vajillas'),
+            'USER': os.getenv('DB_USER', 'postgres'),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            # Required behind PgBouncer in transaction pooling mode
+            'DISABLE_SERVER_SIDE_CURSORS': (
+                os.getenv('DB_DISABLE_SERVER_SIDE_CURSORS', 'False').lower() == 'true'
+            ),
+            'OPTIONS': {
+                'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
+                'application_name': os.getenv('DB_APPLICATION_NAME', 'alquiler_vajillas'),
+            },
+        }
     }
-}
+
+# Seconds a connection is reused by the following requests of the same
+# thread (0 closes it after each request; use 0 under ASGI and pool with
+# PgBouncer instead). Health checks replace connections the server closed.
+DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', 60))
+DATABASES['default']['CONN_HEALTH_CHECKS'] = (
+    os.getenv('DB_CONN_HEALTH_CHECKS', 'True').lower() == 'true'
+)
+
+# Check the database connection when the WSGI/ASGI application loads
+DB_STARTUP_CHECK = os.getenv('DB_STARTUP_CHECK', 'True').lower() == 'true'
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -108,7 +147,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'config.pagination.KeysetPagination',
     'PAGE_SIZE': 20,
 }
 
@@ -126,3 +165,85 @@ CSRF_TRUSTED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', 'http://localhost:3000'
 BUSINESS_NAME = os.getenv('BUSINESS_NAME', 'Alquileres "El Grillo"')
 BUSINESS_ADDRESS = os.getenv('BUSINESS_ADDRESS', '')
 BUSINESS_PHONE = os.getenv('BUSINESS_PHONE', '')
+
+# Rendered order PDF cache
+PDF_CACHE = {
+    'BACKEND': os.getenv('PDF_CACHE_BACKEND', 'apps.orders.pdf_cache.FileSystemPDFStore'),
+    'LOCATION': os.getenv('PDF_CACHE_DIR', str(BASE_DIR / 'cache' / 'pdf')),
+    'MAX_SIZE': int(os.getenv('PDF_CACHE_MAX_SIZE', 200 * 1024 * 1024)),
+}
+
+# Django cache (locmem is per process: use a shared backend such as
+# django.core.cache.backends.redis.RedisCache with several processes)
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Product catalog cache (see apps.products.cache)
+PRODUCT_CACHE = {
+    'ALIAS': 'default',
+    # Seconds a catalog entry is kept (also bounds staleness with locmem)
+    'TIMEOUT': int(os.getenv('PRODUCT_CACHE_TIMEOUT', 300)),
+    'LOCAL_MAX_ENTRIES': int(os.getenv('PRODUCT_CACHE_LOCAL_ENTRIES', 256)),
+}
+
+# Cached reports of closed periods (see apps.reports.conditional)
+REPORT_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': int(os.getenv('REPORT_CACHE_TIMEOUT', 24 * 3600)),
+}
+
+# Per-request SQL profiling (see config.profiling)
+QUERY_PROFILING = {
+    'ENABLED': os.getenv('QUERY_PROFILING', 'True').lower() == 'true',
+    'SERVER_TIMING': os.getenv('QUERY_PROFILING_SERVER_TIMING', str(DEBUG)).lower() == 'true',
+    # Requests slower than this (milliseconds) are logged
+    'SLOW_REQUEST_MS': int(os.getenv('SLOW_REQUEST_MS', 500)),
+    # Query shapes repeated this many times are reported as duplicates
+    'DUPLICATE_THRESHOLD': int(os.getenv('QUERY_DUPLICATE_THRESHOLD', 3)),
+    # Fail requests that go over their view's query budget (tests, CI)
+    'STRICT': os.getenv('QUERY_BUDGET_STRICT', 'False').lower() == 'true',
+}
+
+# Prometheus metrics served at /metrics (see config.metrics)
+METRICS = {
+    'ENABLED': os.getenv('METRICS_ENABLED', 'True').lower() == 'true',
+    # Shared directory for several server processes (gunicorn workers);
+    # empty keeps the metrics of each process in memory
+    'MULTIPROCESS_DIR': os.getenv('METRICS_MULTIPROCESS_DIR', ''),
+    # Bearer token required to read /metrics (empty: no token)
+    'TOKEN': os.getenv('METRICS_TOKEN', ''),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # Slow and over-budget requests, one JSON object per line
+        'config.profiling': {
+            'handlers': ['console'],
+            'level': os.getenv('QUERY_PROFILING_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
+# Processes of the pool that renders batch PDFs, started on the first
+# large batch and kept for the next ones (0 = one per CPU)
+PDF_BATCH_WORKERS = int(os.getenv('PDF_BATCH_WORKERS', 0))
+
+# Background jobs (see apps.jobs and the run_workers command)
+JOBS = {
+    'RESULTS_DIR': os.getenv('JOBS_RESULTS_DIR', str(BASE_DIR / 'cache' / 'jobs')),
+    # Seconds a finished job and its file are kept
+    'RESULT_TTL': int(os.getenv('JOBS_RESULT_TTL', 7 * 24 * 3600)),
+    # Seconds after which a running job is considered abandoned
+    'STALE_AFTER': int(os.getenv('JOBS_STALE_AFTER', 1800)),
+    'MAX_ATTEMPTS': int(os.getenv('JOBS_MAX_ATTEMPTS', 3)),
+}
@@ -0,0 +1,455 @@
+"""
+Tests for the project configuration: async views, database connections
+and query budgets.
+"""
+import multiprocessing
+import os
+import re
+import tempfile
+from datetime import date, timedelta
+from unittest import mock, skipUnless
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, connection
+from django.db.backends.signals import connection_created
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.orders.models import Order
+from apps.products.models import Product
+from . import search
+from . import database
+from . import metrics
+from .async_views import CONCURRENT_QUERY_THREADS, close_pool_connections
+from .profiling import QueryProfile
+
+
+READ_URLS = ['/api/orders/', '/api/products/', '/api/reports/summary/']
+
+
+def create_orders(count=5):
+    today = date.today()
+    for index in range(count):
+        Order.objects.create(
+            customer_name=f'Cliente {index}',
+            customer_phone=f'11-4000-{index:04d}',
+            event_date=today - timedelta(days=index),
+            delivery_date=today - timedelta(days=index),
+            return_date=today - timedelta(days=index),
+            status='entregado',
+        )
+    Product.objects.create(name='Silla', category='sillas', price_per_unit='10.00', stock=10)
+
+
+class ConnectionCounter:
+    """Count the database connections opened while in the block."""
+    
+    def __enter__(self):
+        self.count = 0
+        connection_created.connect(self.created)
+        return self
+    
+    def __exit__(self, *exc_info):
+        connection_created.disconnect(self.created)
+    
+    def created(self, sender, **kwargs):
+        self.count += 1
+
+
+class WSGIConnectionTests(TestCase):
+    """Async views served through WSGI reuse the request's connection."""
+    
+    def setUp(self):
+        create_orders()
+        self.client.force_login(User.objects.create_user('ana'))
+    
+    def test_repeated_reads_open_no_connections(self):
+        with ConnectionCounter() as counter:
+            for _ in range(5):
+                for url in READ_URLS + [f'/api/reports/monthly/?year={date.today().year}']:
+                    self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(counter.count, 0)
+
+
+class ASGIConnectionTests(TransactionTestCase):
+    """Under ASGI the concurrent queries reuse the connections of a fixed pool."""
+    
+    def setUp(self):
+        create_orders()
+        self.client = AsyncClient()
+        self.client.force_login(User.objects.create_user('ana'))
+        # The test database cannot be dropped while the pool is connected
+        self.addCleanup(close_pool_connections)
+    
+    def test_repeated_reads_reuse_pool_connections(self):
+        async def read():
+            for _ in range(10):
+                for url in READ_URLS:
+                    response = await self.client.get(url)
+                    self.assertEqual(response.status_code, 200)
+        
+        with ConnectionCounter() as counter:
+            async_to_sync(read)()
+        # One connection per pool thread at most, never one per request
+        self.assertLessEqual(counter.count, CONCURRENT_QUERY_THREADS)
+
+
+STRICT_PROFILING = dict(settings.QUERY_PROFILING, ENABLED=True, STRICT=True, SERVER_TIMING=True)
+
+
+def query_count(response):
+    """Queries the profiling middleware counted for a response (Server-Timing)."""
+    return int(re.search(r'"(\d+) queries"', response['Server-Timing']).group(1))
+
+
+class KeysetPaginationTests(TestCase):
+    
+    def setUp(self):
+        create_orders(count=5)
+        self.client.force_login(User.objects.create_user('ana'))
+    
+    def test_count_skips_the_totals(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/orders/?page_size=2')
+        self.assertEqual(response.json()['count'], 5)
+        counts = [query['sql'] for query in queries if 'COUNT(' in query['sql']]
+        self.assertEqual(len(counts), 1)
+        self.assertNotIn('orders_orderitem', counts[0])
+        self.assertNotIn('ORDER BY', counts[0])
+    
+    def test_pages_cover_every_order_once(self):
+        ids = []
+        url = '/api/orders/?page_size=2&count=false'
+        while url:
+            data = self.client.get(url).json()
+            self.assertNotIn('count', data)
+            ids.extend(order['id'] for order in data['results'])
+            url = data['next']
+        self.assertEqual(ids, list(Order.objects.order_by('-created_at', '-id').values_list('id', flat=True)))
+
+
+class QueryProfileTests(TestCase):
+    
+    def test_connection_setup_is_not_counted(self):
+        profile = QueryProfile()
+        for sql in ['PRAGMA journal_mode=WAL', "SET TIME ZONE 'UTC'", 'SAVEPOINT "s1"', 'SELECT 1']:
+            profile.add(sql, 0.001)
+        self.assertEqual(profile.count, 1)
+        self.assertEqual(list(profile.fingerprints), ['SELECT ?'])
+
+
+@override_settings(QUERY_PROFILING=STRICT_PROFILING)
+class QueryBudgetTests(TestCase):
+    """
+    Query counts of the endpoints, session and user lookups included.
+    
+    Strict mode makes a request over its view's budget fail, so these
+    also check the budgets.
+    """
+    
+    def setUp(self):
+        self.today = date.today()
+        # Bump the catalog version, so the product reads start on a cache miss
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products = [
+                Product.objects.create(name=f'Silla {index}', category='sillas', price_per_unit='10.00', stock=50)
+                for index in range(3)
+            ]
+        self.client.force_login(User.objects.create_user('ana'))
+        self.order_id = self.create_order()['id']
+    
+    def order_data(self, **fields):
+        data = {
+            'customer_name': 'Ana Pérez',
+            'customer_phone': '11-4000-1234',
+            'event_date': self.today.isoformat(),
+            'delivery_date': self.today.isoformat(),
+            'return_date': (self.today + timedelta(days=1)).isoformat(),
+            'items': [{'product': product.id, 'quantity': 2} for product in self.products],
+        }
+        data.update(fields)
+        return data
+    
+    def create_order(self, **fields):
+        response = self.client.post('/api/orders/', self.order_data(**fields), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+    
+    def assertQueryCount(self, response, expected):
+        self.assertLess(response.status_code, 400)
+        self.assertEqual(query_count(response), expected)
+    
+    def read_counts(self):
+        """Expected query count of each read endpoint."""
+        order_id = self.order_id
+        week = f'start_date={self.today}&end_date={self.today + timedelta(days=6)}'
+        expected = {
+            '/api/orders/': 4,
+            # SQLite also checks that its FTS table exists
+            '/api/orders/?search=Pérez': 5 if connection.vendor == 'sqlite' else 4,
+            f'/api/orders/{order_id}/': 5,
+            f'/api/orders/{order_id}/pdf/': 5,
+            f'/api/orders/pdf-batch/?ids={order_id}': 5,
+            f'/api/orders/logistics/?date={self.today}': 5,
+            '/api/orders/pending/': 4,
+            '/api/orders/export/': 2,
+            '/api/orders/export-items/': 2,
+            '/api/products/': 4,
+            f'/api/products/{self.products[0].id}/': 3,
+            f'/api/products/availability/?{week}': 4,
+            '/api/customers/': 4,
+            '/api/customers/autocomplete/?q=Ana': 3,
+            f'/api/reports/daily/?date={self.today}': 5,
+            f'/api/reports/weekly/?date={self.today}': 5,
+            f'/api/reports/monthly/?year={self.today.year}': 5,
+            f'/api/reports/custom/?{week}': 5,
+            '/api/reports/summary/': 3,
+            f'/api/reports/export/?{week}': 2,
+            '/api/jobs/': 4,
+        }
+        return expected
+    
+    def assertReadCounts(self):
+        # Forget the FTS tables found by earlier tests
+        search._fts_tables.clear()
+        for url, count in self.read_counts().items():
+            with self.subTest(url=url):
+                self.assertQueryCount(self.client.get(url), count)
+    
+    def test_read_endpoints(self):
+        self.assertReadCounts()
+    
+    def test_read_endpoints_with_many_orders(self):
+        for index in range(10):
+            self.create_order(customer_phone=f'11-5000-{index:04d}')
+        self.assertReadCounts()
+    
+    def test_order_writes(self):
+        url = f'/api/orders/{self.order_id}/'
+        response = self.client.post(
+            '/api/orders/', self.order_data(customer_phone='11-4000-5678'), content_type='application/json'
+        )
+        self.assertQueryCount(response, 18)
+        response = self.client.put(url, self.order_data(customer_phone='11-4000-9999'), content_type='application/json')
+        self.assertQueryCount(response, 19)
+        items = [{'product': self.products[0].id, 'quantity': 5}]
+        response = self.client.patch(url, {'items': items}, content_type='application/json')
+        self.assertQueryCount(response, 19)
+        # Worst case: new customer, new items and the revenue moved to another day
+        later = (self.today + timedelta(days=3)).isoformat()
+        data = self.order_data(customer_phone='11-4000-4321', event_date=later, delivery_date=later, return_date=later)
+        data['items'] = [{'product': product.id, 'quantity': 1} for product in self.products[1:]]
+        self.assertQueryCount(self.client.put(url, data, content_type='application/json'), 25)
+        response = self.client.patch(f'{url}change_status/', {'status': 'cancelado'}, content_type='application/json')
+        self.assertQueryCount(response, 13)
+        self.assertQueryCount(self.client.delete(f'/api/orders/{self.create_order()["id"]}/'), 13)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Solo con DB_ENGINE=sqlite.')
+class SQLiteConnectionTests(TestCase):
+    """configure_sqlite sets up file databases once per connection."""
+    
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_dict = dict(connection.settings_dict, NAME=os.path.join(directory.name, 'db.sqlite3'))
+        self.database = DatabaseWrapper(settings_dict, alias='sqlite_file')
+        self.addCleanup(self.database.close)
+        self.pragmas = []
+        self.database.execute_wrappers.append(self.record_pragma)
+    
+    def record_pragma(self, execute, sql, params, many, context):
+        if sql.startswith('PRAGMA journal_mode=') or sql.startswith('PRAGMA synchronous='):
+            self.pragmas.append(sql)
+        return execute(sql, params, many, context)
+    
+    def query(self, sql):
+        with self.database.cursor() as cursor:
+            cursor.execute(sql)
+            return cursor.fetchone()[0]
+    
+    def test_file_database_uses_wal(self):
+        self.assertEqual(self.query('PRAGMA journal_mode'), 'wal')
+        # NORMAL
+        self.assertEqual(self.query('PRAGMA synchronous'), 1)
+    
+    def test_pragmas_run_once_per_connection(self):
+        for _ in range(5):
+            # What request_started/request_finished do with a persistent connection
+            self.database.close_if_unusable_or_obsolete()
+            self.query('SELECT 1')
+        self.assertEqual(len(self.pragmas), 2)
+        
+        self.database.close()
+        self.query('SELECT 1')
+        self.assertEqual(len(self.pragmas), 4)
+    
+    def test_in_memory_database_is_left_alone(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'memory')
+
+
+class CheckDatabaseTests(TestCase):
+    
+    def check_ids(self, server=None, **config):
+        with mock.patch.dict(connection.settings_dict, config):
+            return [message.id for message in database.check_database(server=server)]
+    
+    def test_asgi_with_persistent_connections(self):
+        self.assertIn('database.W001', self.check_ids('asgi', CONN_MAX_AGE=60))
+        self.assertNotIn('database.W001', self.check_ids('asgi', CONN_MAX_AGE=0))
+        self.assertNotIn('database.W001', self.check_ids('wsgi', CONN_MAX_AGE=60))
+    
+    def test_persistent_connections_without_health_checks(self):
+        self.assertIn('database.W002', self.check_ids(CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=False))
+        self.assertNotIn('database.W002', self.check_ids(CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=True))
+        self.assertNotIn('database.W002', self.check_ids(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False))
+    
+    def test_sqlite_outside_debug(self):
+        with mock.patch.object(connection, 'vendor', 'sqlite'):
+            self.assertIn('database.W003', self.check_ids())
+            with self.settings(DEBUG=True):
+                self.assertNotIn('database.W003', self.check_ids())
+        with mock.patch.object(connection, 'vendor', 'postgresql'):
+            self.assertNotIn('database.W003', self.check_ids())
+    
+    def test_connection_error(self):
+        with mock.patch.object(connection, 'ensure_connection', side_effect=OperationalError('sin conexión')):
+            self.assertIn('database.E001', self.check_ids())
+    
+    def test_slow_connection(self):
+        self.assertNotIn('database.W004', self.check_ids())
+        with mock.patch.object(database, 'SLOW_CONNECT_MS', -1):
+            self.assertIn('database.W004', self.check_ids())
+
+
+class StartupCheckTests(TestCase):
+    
+    def setUp(self):
+        patcher = mock.patch.object(connection, 'close')
+        self.close = patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    @override_settings(DB_STARTUP_CHECK=False)
+    def test_disabled(self):
+        with mock.patch.object(database, 'check_database') as check_database:
+            database.startup_check('wsgi')
+        check_database.assert_not_called()
+    
+    @override_settings(DB_STARTUP_CHECK=True)
+    def test_warnings_are_logged(self):
+        with mock.patch.dict(connection.settings_dict, CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=False), \
+                self.assertLogs('config.database', 'WARNING') as logs:
+            database.startup_check('wsgi')
+        self.assertIn('database.W002', logs.output[0])
+        self.close.assert_called_once()
+    
+    @override_settings(DB_STARTUP_CHECK=True)
+    def test_errors_stop_the_server(self):
+        with mock.patch.object(connection, 'ensure_connection', side_effect=OperationalError('sin conexión')):
+            with self.assertRaises(ImproperlyConfigured):
+                database.startup_check('asgi')
+        self.close.assert_called_once()
+
+
+def add_metric_values(directory, amount):
+    """Run in a child process: write its own metrics file."""
+    values = metrics.MmapValues(directory)
+    values.inc(('jobs_total', (('kind', 'pdf'),)), amount)
+    values.inc(('jobs_total', (('kind', f'proceso-{amount}'),)), 1)
+
+
+class MmapValuesTests(TestCase):
+    """Values in the shared directory survive growth and add up over processes."""
+    
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+    
+    def test_file_grows_past_initial_size(self):
+        values = metrics.MmapValues(self.directory)
+        keys = [('request_seconds_bucket', (('view', f'vista-{index:04d}'), ('le', '0.1'))) for index in range(2000)]
+        for index, key in enumerate(keys):
+            values.inc(key, index)
+        values.inc(keys[0], 0.5)
+        
+        self.assertGreater(os.path.getsize(values.path), metrics.MmapValues.INITIAL_SIZE)
+        expected = {key: float(index) for index, key in enumerate(keys)}
+        expected[keys[0]] = 0.5
+        self.assertEqual(values.samples(), expected)
+        
+        # Reopening the file (a restarted worker with the same pid) keeps adding to it
+        reopened = metrics.MmapValues(self.directory)
+        reopened.inc(keys[-1], 1)
+        self.assertEqual(reopened.samples()[keys[-1]], 2000.0)
+        self.assertEqual(len(reopened.samples()), 2000)
+    
+    def test_processes_add_up(self):
+        values = metrics.MmapValues(self.directory)
+        values.inc(('jobs_total', (('kind', 'pdf'),)), 1)
+        context = multiprocessing.get_context('fork')
+        for amount in (2, 3):
+            process = context.Process(target=add_metric_values, args=(self.directory, amount))
+            process.start()
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+        
+        self.assertEqual(len(os.listdir(self.directory)), 3)
+        # Exited processes still count
+        self.assertEqual(values.samples(), {
+            ('jobs_total', (('kind', 'pdf'),)): 6.0,
+            ('jobs_total', (('kind', 'proceso-2'),)): 1.0,
+            ('jobs_total', (('kind', 'proceso-3'),)): 1.0,
+        })
+
+
+@override_settings(METRICS={'ENABLED': True, 'MULTIPROCESS_DIR': '', 'TOKEN': ''})
+class MetricsViewTests(TestCase):
+    
+    def setUp(self):
+        # Metrics created here stay out of the real registry
+        patcher = mock.patch.object(metrics, '_registry', [])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram('test_seconds', 'Duración de prueba', ['kind'], buckets=(0.125, 1))
+        for value in (0.0625, 0.125, 0.5, 4):
+            histogram.labels('pdf').observe(value)
+        metrics.Counter('test_total', 'Total de prueba').inc(2)
+        
+        self.assertEqual(metrics.render().splitlines(), [
+            '# HELP test_seconds Duración de prueba',
+            '# TYPE test_seconds histogram',
+            'test_seconds_bucket{kind="pdf",le="0.125"} 2.0',
+            'test_seconds_bucket{kind="pdf",le="1.0"} 3.0',
+            'test_seconds_bucket{kind="pdf",le="+Inf"} 4.0',
+            'test_seconds_sum{kind="pdf"} 4.6875',
+            'test_seconds_count{kind="pdf"} 4.0',
+            '# HELP test_total Total de prueba',
+            '# TYPE test_total counter',
+            'test_total 2.0',
+        ])
+    
+    def test_bearer_token(self):
+        with self.settings(METRICS=dict(settings.METRICS, TOKEN='secreto')):
+            metrics.Counter('test_total', 'Total de prueba').inc()
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+            self.assertEqual(
+                self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer otro').status_code, 401
+            )
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secreto')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        self.assertIn('test_total 1.0', response.content.decode())
+    
+    def test_disabled(self):
+        with self.settings(METRICS=dict(settings.METRICS, ENABLED=False)):
+            self.assertEqual(self.client.get('/metrics').status_code, 404)
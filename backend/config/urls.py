@@ -4,10 +4,15 @@ URL configuration for Alquiler de Vajillas project.
 from django.contrib import admin
 from django.urls import path, include
 
+from config.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('apps.users.urls')),
     path('api/products/', include('apps.products.urls')),
     path('api/orders/', include('apps.orders.urls')),
     path('api/reports/', include('apps.reports.urls')),
+    path('api/jobs/', include('apps.jobs.urls')),
+    path('api/customers/', include('apps.customers.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
@@ -3,7 +3,7 @@
 import { useState, useEffect } from 'react';
 import { useRouter } from 'next/navigation';
 import MainLayout from '@/components/layout/MainLayout';
-import { ordersAPI, productsAPI } from '@/lib/api';
+import { ordersAPI, productsAPI, customersAPI } from '@/lib/api';
 import { formatCurrency, getCurrentDate, getDateOffset, PRODUCT_CATEGORIES } from '@/lib/utils';
 import styles from './page.module.css';
 
@@ -25,6 +25,9 @@ export default function NewOrderPage() {
         observations: '',
     });
 
+    // Known customers matching the typed name
+    const [customerSuggestions, setCustomerSuggestions] = useState([]);
+
     // Order items
     const [orderItems, setOrderItems] = useState([]);
 
@@ -36,6 +39,23 @@ export default function NewOrderPage() {
         loadProducts();
     }, []);
 
+    useEffect(() => {
+        const query = formData.customer_name.trim();
+        if (query.length < 2) {
+            setCustomerSuggestions([]);
+            return;
+        }
+        // Wait until the user stops typing
+        const timer = setTimeout(async () => {
+            try {
+                setCustomerSuggestions(await customersAPI.autocomplete(query));
+            } catch (err) {
+                setCustomerSuggestions([]);
+            }
+        }, 250);
+        return () => clearTimeout(timer);
+    }, [formData.customer_name]);
+
     const loadProducts = async () => {
         try {
             const data = await productsAPI.list({ is_active: 'true' });
@@ -52,6 +72,23 @@ export default function NewOrderPage() {
         setFormData(prev => ({ ...prev, [name]: value }));
     };
 
+    const handleCustomerNameChange = (e) => {
+        const { value } = e.target;
+        const customer = customerSuggestions.find(c => c.name === value);
+        if (customer) {
+            // Picked a known customer: fill in their contact details
+            setFormData(prev => ({
+                ...prev,
+                customer_name: customer.name,
+                customer_phone: customer.phone || prev.customer_phone,
+                customer_address: customer.address || prev.customer_address,
+            }));
+            setCustomerSuggestions([]);
+            return;
+        }
+        setFormData(prev => ({ ...prev, customer_name: value }));
+    };
+
     const addItem = () => {
         if (!selectedProduct || quantity < 1) return;
 
@@ -166,11 +203,20 @@ export default function NewOrderPage() {
                                     type="text"
                                     name="customer_name"
                                     value={formData.customer_name}
-                                    onChange={handleChange}
+                                    onChange={handleCustomerNameChange}
                                     className="form-input"
                                     placeholder="Nombre completo"
+                                    list="customer-suggestions"
+                                    autoComplete="off"
                                     required
                                 />
+                                <datalist id="customer-suggestions">
+                                    {customerSuggestions.map(customer => (
+                                        <option key={customer.id} value={customer.name}>
+                                            {customer.phone}
+                                        </option>
+                                    ))}
+                                </datalist>
                             </div>
 
                             <div className="form-group">
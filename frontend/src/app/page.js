@@ -21,10 +21,10 @@ export default function DashboardPage() {
     try {
       const [summaryData, ordersData] = await Promise.all([
         reportsAPI.getSummary(),
-        ordersAPI.getPending(),
+        ordersAPI.getPending({ page_size: 5, count: 'false' }),
       ]);
       setSummary(summaryData);
-      setPendingOrders(ordersData.slice(0, 5)); // Show last 5
+      setPendingOrders(ordersData.results || ordersData); // Show last 5
     } catch (err) {
       setError('Error al cargar datos');
       console.error(err);
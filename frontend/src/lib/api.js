@@ -126,6 +126,11 @@ export const productsAPI = {
       method: 'DELETE',
     });
   },
+  
+  async availability(params = {}) {
+    const queryString = new URLSearchParams(params).toString();
+    return apiRequest(`/products/availability/?${queryString}`);
+  },
 };
 
 // ============ ORDERS API ============
@@ -168,12 +173,16 @@ export const ordersAPI = {
     });
   },
   
-  async getPending() {
-    return apiRequest('/orders/pending/');
+  async getPending(params = {}) {
+    const queryString = new URLSearchParams(params).toString();
+    const endpoint = queryString ? `/orders/pending/?${queryString}` : '/orders/pending/';
+    return apiRequest(endpoint);
   },
   
-  async getDelivered() {
-    return apiRequest('/orders/delivered/');
+  async getDelivered(params = {}) {
+    const queryString = new URLSearchParams(params).toString();
+    const endpoint = queryString ? `/orders/delivered/?${queryString}` : '/orders/delivered/';
+    return apiRequest(endpoint);
   },
   
   async downloadPDF(id) {
@@ -199,6 +208,25 @@ export const ordersAPI = {
   },
 };
 
+// ============ CUSTOMERS API ============
+
+export const customersAPI = {
+  async list(params = {}) {
+    const queryString = new URLSearchParams(params).toString();
+    const endpoint = queryString ? `/customers/?${queryString}` : '/customers/';
+    return apiRequest(endpoint);
+  },
+  
+  async get(id) {
+    return apiRequest(`/customers/${id}/`);
+  },
+  
+  async autocomplete(q) {
+    const queryString = new URLSearchParams({ q }).toString();
+    return apiRequest(`/customers/autocomplete/?${queryString}`);
+  },
+};
+
 // ============ REPORTS API ============
 
 export const reportsAPI = {